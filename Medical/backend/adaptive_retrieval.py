@@ -0,0 +1,94 @@
+# Medical/backend/adaptive_retrieval.py
+"""Per-endpoint top-k, distance cutoffs and early termination for vector retrieval.
+
+Each endpoint used to fetch a fixed number of facts (5 or 10) and score all of
+them, however far away they were. Now every endpoint has its own settings:
+- k, the number of facts to fetch
+- a cosine distance cutoff that is sent inside ``nearVector``, so facts that
+  are too far away never come over the wire
+- a stop bar; scoring ends at the first hit that clears it, which makes
+  clear-cut claims cheap
+
+Each call records how many hits were returned and how many were actually
+scored:
+
+    settings = settings_for("search")
+    query.with_near_vector(near_vector(embedding, settings)).with_limit(settings.k)
+    ...
+    record_hits("search", returned=len(hits), used=scored)
+
+Environment variables (ENDPOINT is COMPARE for the vote scorer behind
+app.compare_claims, SEARCH for the semantic scorer behind vector_search):
+
+    RETRIEVAL_<ENDPOINT>_K               facts fetched (5 / 10)
+    RETRIEVAL_<ENDPOINT>_MAX_DISTANCE    cosine distance cutoff (0.7 / 0.75); empty disables it
+    RETRIEVAL_<ENDPOINT>_STOP            stop bar (0.15 distance / 0.85 match score); empty disables it
+"""
+import os
+from typing import Dict, Optional, Sequence
+
+from instrumentation import registry
+
+HITS_BUCKETS = (1, 2, 3, 5, 10, 20, 50)
+HITS_RETURNED = registry.histogram("retrieval_hits_returned", "Facts returned by the vector query per endpoint.",
+                                   HITS_BUCKETS)
+HITS_USED = registry.histogram("retrieval_hits_used", "Facts scored before a verdict was reached per endpoint.",
+                               HITS_BUCKETS)
+EARLY_STOPS = registry.counter("retrieval_early_stop_total", "Scoring loops ended early by a clear-cut hit.")
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return float(value) if value.strip() else None
+
+
+class RetrievalSettings:
+    """Top-k, distance cutoff and stop bar for one endpoint."""
+
+    def __init__(self, k: int, max_distance: Optional[float], stop: Optional[float]):
+        self.k = k
+        self.max_distance = max_distance
+        self.stop = stop
+
+    def __repr__(self) -> str:
+        return f"RetrievalSettings(k={self.k}, max_distance={self.max_distance}, stop={self.stop})"
+
+
+def _load(endpoint: str, k: int, max_distance: Optional[float], stop: Optional[float]) -> RetrievalSettings:
+    prefix = f"RETRIEVAL_{endpoint.upper()}_"
+    return RetrievalSettings(
+        int(os.environ.get(prefix + "K", str(k))),
+        _env_float(prefix + "MAX_DISTANCE", max_distance),
+        _env_float(prefix + "STOP", stop)
+    )
+
+
+# compare: the stop bar is a distance (a near-exact fact decides the vote);
+# search: it is the combined semantic + lexical match score
+SETTINGS: Dict[str, RetrievalSettings] = {
+    "compare": _load("compare", 5, 0.7, 0.15),
+    "search": _load("search", 10, 0.75, 0.85),
+}
+
+
+def settings_for(endpoint: str) -> RetrievalSettings:
+    return SETTINGS[endpoint]
+
+
+def near_vector(embedding: Sequence[float], settings: RetrievalSettings) -> Dict[str, object]:
+    """nearVector argument with the endpoint's distance cutoff applied server-side."""
+    argument: Dict[str, object] = {"vector": embedding}
+    if settings.max_distance is not None:
+        argument["distance"] = settings.max_distance
+    return argument
+
+
+def record_hits(endpoint: str, returned: int, used: int) -> None:
+    """Record how many hits a query returned and how many scoring needed."""
+    HITS_RETURNED.labels(endpoint=endpoint).observe(returned)
+    HITS_USED.labels(endpoint=endpoint).observe(used)
+    if used < returned:
+        EARLY_STOPS.labels(endpoint=endpoint).inc()
+
@@ -1,36 +1,39 @@
 from dotenv import load_dotenv
 load_dotenv()
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import os
 import sys
-import json
 import time
 import logging
+import threading
 import datetime
 import praw
 import prawcore.exceptions
 from typing import List, Dict, Any, Optional, Tuple
-from functools import lru_cache
 from sentence_transformers import SentenceTransformer
 from weaviate import Client
 from weaviate.auth import AuthApiKey
 import random
+from log_config import setup_logging, lazy_json, sample
+from misinfo_classifier import contains_potential_misinformation, confidence_fields
+from semantic_classifier import annotate_posts
+from post_store import get_store, parse_timestamp, decode_cursor
+from trend_engine import TrendEngine, DAILY_BUCKETS, parse_window
+from streaming_stats import EngagementStats
+from http_cache import cached_response
+import serialization
+from verification_engine import create_engine, get_embedding, VerificationEngine, WeaviateRetriever, VoteScorer
+from instrumentation import Counter, timed, observe, stage_mean, cache_event, registry, render_prometheus, CONTENT_TYPE
 
 # Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("health_app.log"),
-        logging.StreamHandler()
-    ]
-)
+setup_logging("health_app.log")
 logger = logging.getLogger("health_app")
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+serialization.init_app(app)  # jsonify through orjson when installed
 
 # Initialize Weaviate client
 weaviate_url = os.environ.get('WEAVIATE_URL', "https://hbuwdzekqiyn5xieverkyq.c0.asia-southeast1.gcp.weaviate.cloud")
@@ -50,105 +53,76 @@ except Exception as e:
     sentence_model = None
     sys.exit(1)
 
-# Metrics tracking
+# Metrics tracking (thread-safe counters, also exported on /metrics)
 metrics = {
-    "successful_searches": 0,
-    "failed_searches": 0,
-    "subreddits_searched": 0,
-    "posts_retrieved": 0,
-    "cache_hits": 0,
-    "api_errors": 0,
-    "search_duration": []
+    "successful_searches": Counter(),
+    "failed_searches": Counter(),
+    "subreddits_searched": Counter(),
+    "posts_retrieved": Counter(),
+    "cache_hits": Counter(),
+    "api_errors": Counter()
 }
+registry.counter_callback(
+    "search_events_total",
+    "Post search counters from the metrics dict.",
+    lambda: [({"event": name}, counter.value) for name, counter in metrics.items()]
+)
+
+# Processed posts, kept across fetches; legacy JSON caches are imported once
+post_store = get_store()
+for _window in ("day", "week", "month"):
+    if post_store.last_fetch(_window) is None and os.path.exists(f'cached_posts_{_window}.json'):
+        logger.info(f"Imported {post_store.import_json(f'cached_posts_{_window}.json', _window)} posts from cached_posts_{_window}.json")
+
+# Category and subreddit trend counters, and engagement count/sum and percentile sketches.
+# Both are fed from the store by rowid, so posts written by other processes (the fetcher
+# script, reddit.py, the misinformation tracker) are counted too, each exactly once
+trend_engine = TrendEngine()
+engagement_stats = EngagementStats()
+_streams_lock = threading.Lock()
+_streams_rowid = 0
+
+def sync_streams() -> int:
+    """Fold posts stored since the last sync, by any writer, into trend_engine and engagement_stats."""
+    global _streams_rowid
+    with _streams_lock:
+        rows = post_store.rows_after(_streams_rowid)
+        if rows:
+            # Posts older than the daily ring would be counted nowhere
+            horizon = time.time() - DAILY_BUCKETS * 86400
+            trend_engine.load(row[1:5] for row in rows if row[2] is None or row[2] >= horizon)
+            engagement_stats.load((row[3], row[5], row[6]) for row in rows)
+            _streams_rowid = rows[-1][0]
+    return len(rows)
+
+sync_streams()
 
 # Track inaccessible subreddits
 inaccessible_subreddits = set()
 
-# Vector search functions
-def get_embedding(text: str, model: SentenceTransformer) -> List[float]:
-    """Get embedding for a text using the sentence transformer model."""
-    try:
-        return model.encode(text).tolist()
-    except Exception as e:
-        logger.error(f"Error generating embedding for text '{text}': {e}")
-        raise
+# Claim verification (vote scoring over fact/is_true/category facts; see verification_engine)
+verification_engine = create_engine(client, sentence_model, "app")
 
-@lru_cache(maxsize=1000)
-def compare_claims(claim: str, client: Client, sentence_model: SentenceTransformer, class_name: str = "MedicalFact", verbose: bool = False) -> Tuple[str, float, float, float]:
+def compare_claims(claim: str, client: Client = client, sentence_model: SentenceTransformer = sentence_model, class_name: str = "MedicalFact", verbose: bool = False) -> Tuple[str, float, float, float]:
     """Compare a claim with facts in the Weaviate database."""
-    try:
-        if not sentence_model:
-            logger.error("Sentence model not loaded")
-            return "error", 0.0, 0.0, 1.0
-
-        logger.info("Processing claim: %s", claim)
-        claim_embedding = get_embedding(claim, sentence_model)
-        logger.info("Claim embedding generated, length: %s", len(claim_embedding))
-
-        # Query Weaviate with distance metric for better confidence scoring
-        response = client.query.get(
-            class_name,
-            ["fact", "is_true", "category"]
-        ).with_near_vector({
-            "vector": claim_embedding
-        }).with_limit(5).with_additional(["distance"]).do()
-
-        logger.info("Weaviate response: %s", json.dumps(response, indent=2))
-        results = response.get('data', {}).get('Get', {}).get(class_name, [])
-        logger.info("Found %s results", len(results))
-
-        if not results:
-            logger.info("No similar facts found")
-            return "not_known", 0.1, 0.1, 0.8
-
-        # Calculate true/false counts and average distance
-        true_count = 0
-        false_count = 0
-        total_distance = 0
-        for result in results:
-            is_true = result.get('is_true')
-            distance = result.get('_additional', {}).get('distance', 1.0)
-            total_distance += distance
-            if is_true is True:
-                true_count += 1
-            elif is_true is False:
-                false_count += 1
-
-        unknown_count = len(results) - true_count - false_count
-        avg_distance = total_distance / len(results) if results else 1.0
-        logger.info("True: %s, False: %s, Unknown: %s, Avg Distance: %s", true_count, false_count, unknown_count, avg_distance)
-
-        # Adjust confidence based on counts and distance
-        if true_count > false_count:
-            prediction = "true"
-            true_confidence = 0.7 + (true_count / len(results) * 0.2) - (avg_distance * 0.1)
-            false_confidence = 0.2 - (true_count / len(results) * 0.1) + (avg_distance * 0.05)
-            not_known_confidence = 0.1
-        elif false_count > true_count:
-            prediction = "false"
-            false_confidence = 0.7 + (false_count / len(results) * 0.2) - (avg_distance * 0.1)
-            true_confidence = 0.2 - (false_count / len(results) * 0.1) + (avg_distance * 0.05)
-            not_known_confidence = 0.1
-        else:
-            prediction = "not_known"
-            not_known_confidence = 0.7 + (avg_distance * 0.1)
-            true_confidence = 0.15 - (avg_distance * 0.05)
-            false_confidence = 0.15 - (avg_distance * 0.05)
-
-        # Ensure confidences sum to 1 and are non-negative
-        total = true_confidence + false_confidence + not_known_confidence
-        true_confidence = max(0, true_confidence / total)
-        false_confidence = max(0, false_confidence / total)
-        not_known_confidence = max(0, not_known_confidence / total)
-
-        if verbose:
-            logger.info(f"Prediction: {prediction}, True: {true_confidence:.3f}, False: {false_confidence:.3f}, Not Known: {not_known_confidence:.3f}")
-
-        return prediction, true_confidence, false_confidence, not_known_confidence
-
-    except Exception as e:
-        logger.error(f"Error in compare_claims: {e}")
-        return "error", 0.0, 0.0, 1.0
+    if client is verification_engine.retriever.client and sentence_model is verification_engine.model:
+        engine = verification_engine
+    else:
+        engine = VerificationEngine(WeaviateRetriever(client, class_name), VoteScorer(), sentence_model)
+    verdict = engine.verify(claim)
+    logger.log(logging.INFO if verbose else logging.DEBUG,
+               "Prediction: %s, True: %.3f, False: %.3f, Not Known: %.3f", *verdict)
+    return verdict
+
+def verify_canonical_claim(claim: str) -> Tuple[str, float, float, float]:
+    """Verify a claim, reusing the verdict of a recent identical or near-identical claim.
+
+    Raises RuntimeError when retrieval or scoring failed, so routes answer with their error response.
+    """
+    verdict = verification_engine.verify_cached(claim)
+    if verdict[0] == "error":
+        raise RuntimeError("claim verification failed")
+    return verdict
 
 def populate_medical_facts():
     """Populate Weaviate with sample medical facts if the MedicalFact class is empty."""
@@ -214,16 +188,17 @@ def make_reddit_api_call(api_call, max_retries=5, initial_delay=5):
     """Execute a Reddit API call with retry logic for rate limiting."""
     for attempt in range(max_retries):
         try:
-            return api_call()
+            with timed("reddit_api"):
+                return api_call()
         except prawcore.exceptions.RequestException as e:
             if isinstance(e, prawcore.exceptions.TooManyRequests):
                 delay = initial_delay * (2 ** attempt) + random.uniform(0, 1)  # Exponential backoff with jitter
                 logger.warning(f"Rate limit hit, retrying after {delay:.2f} seconds...")
                 time.sleep(delay)
             else:
-                metrics["api_errors"] += 1
+                metrics["api_errors"].inc()
                 raise
-    metrics["api_errors"] += 1
+    metrics["api_errors"].inc()
     raise Exception("Max retries exceeded for Reddit API call")
 
 # Function to fetch posts related to health misinformation
@@ -243,7 +218,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                 "awards": 0,
                 "engagementScore": 104.0,
                 "permalink": "/r/UlcerativeColitis/comments/18bt1nc/natural_treatment/",
-                "isFalse": true,
+                "isFalse": True,
                 "category": "Natural Remedy Exaggeration",
                 "evidence": "While some natural substances have medicinal properties, claims of curing serious conditions often lack scientific support.",
                 "scientific_evidence": "Ulcerative colitis is a chronic autoimmune condition requiring medical management, such as anti-inflammatory drugs or immunosuppressants. Probiotics and dietary changes may support symptom management but lack evidence for curing UC. Studies (e.g., PubMed) show no consistent benefit from probiotics like VSL#3 or supplements like butyrate in achieving remission.",
@@ -262,7 +237,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                 "awards": 0,
                 "engagementScore": 61.0,
                 "permalink": "/r/neuropathy/comments/1j76xgl/is_there_any_natural_treatment_for_neuropathy/",
-                "isFalse": true,
+                "isFalse": True,
                 "category": "Natural Remedy Exaggeration",
                 "evidence": "While some natural substances have medicinal properties, claims of curing serious conditions often lack scientific support.",
                 "scientific_evidence": "Neuropathy, often caused by diabetes, injury, or other conditions, typically requires medical treatments like anticonvulsants or antidepressants. Natural remedies such as CBD or herbal teas lack robust clinical evidence for curing neuropathy. Limited studies suggest CBD may alleviate pain but not reverse nerve damage (Journal of Pain Research).",
@@ -281,7 +256,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                 "awards": 0,
                 "engagementScore": 3584.0,
                 "permalink": "/r/offmychest/comments/1f4pmdd/im_glad_i_have_cancer/",
-                "isFalse": true,
+                "isFalse": True,
                 "category": "General Health",
                 "evidence": "This post doesn't contain common misinformation markers.",
                 "scientific_evidence": "Stopping prescribed cancer treatments, such as chemotherapy or targeted therapies, can accelerate disease progression and reduce survival rates. Clinical guidelines (e.g., NCCN) emphasize adherence to treatment plans for inflammatory breast cancer to manage symptoms and extend life. Psychological support and palliative care can address distress without abandoning treatment.",
@@ -300,7 +275,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                 "awards": 0,
                 "engagementScore": 32.0,
                 "permalink": "/r/rheumatoid/comments/1gwsddh/natural_herbs_rheumatoid_arthritis/",
-                "isFalse": true,
+                "isFalse": True,
                 "category": "General Health",
                 "evidence": "This post doesn't contain common misinformation markers.",
                 "scientific_evidence": "Rheumatoid arthritis is a chronic autoimmune disease requiring DMARDs or biologics to manage progression. Turmeric and ginger may have anti-inflammatory effects, but clinical trials (e.g., Arthritis Research & Therapy) show they cannot cure RA or reverse joint deformities, which result from irreversible cartilage and bone damage.",
@@ -319,7 +294,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                 "awards": 0,
                 "engagementScore": 22.0,
                 "permalink": "/r/Health/comments/1kd802u/wisconsin_man_whos_spent_years_letting_deadly/",
-                "isFalse": true,
+                "isFalse": True,
                 "category": "General Health",
                 "evidence": "This post doesn't contain common misinformation markers.",
                 "scientific_evidence": "Antivenom is developed through controlled immunization of animals with venom, not by humans repeatedly enduring snake bites. Such practices are dangerous and lack scientific support for producing effective antivenom (World Health Organization guidelines on snakebite management).",
@@ -338,7 +313,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                 "awards": 0,
                 "engagementScore": 8.0,
                 "permalink": "/r/keratosis/comments/1h01le5/remedy_skin/",
-                "isFalse": true,
+                "isFalse": True,
                 "category": "General Health",
                 "evidence": "This post doesn't contain common misinformation markers.",
                 "scientific_evidence": "Keratosis pilaris is managed with exfoliants like urea or prescription retinoids. Over-the-counter lotions with 10% urea may provide mild relief, but dermatological studies (e.g., Journal of the American Academy of Dermatology) recommend 20–40% urea or tretinoin for significant improvement.",
@@ -352,7 +327,7 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
         # Validate posts
         if not provided_posts:
             logger.warning("No posts provided, using fallback data.")
-            metrics["failed_searches"] += 1
+            metrics["failed_searches"].inc()
             return get_fallback_posts()
 
         # Process posts
@@ -379,171 +354,48 @@ def fetch_health_misinformation_posts(time_filter: str = 'week') -> List[Dict[st
                     "category": potential_misinformation.get("category", "General Health"),
                     "evidence": potential_misinformation["evidence"],
                     "created_at": post["created_at"],
-                    "false_confidence": 0.85 + (0.15 * (engagement_score / 1000)),
-                    "true_confidence": 0.15 - (0.05 * (engagement_score / 1000)),
-                    "not_known_confidence": 0.05 - (0.01 * (engagement_score / 1000))
+                    "labels": list(potential_misinformation["labels"]),
+                    **confidence_fields(potential_misinformation)
                 }
                 
                 processed_posts.append(processed_post)
-                metrics["posts_retrieved"] += 1
-                logger.info(f"Processed post: {post['title']}")
+                metrics["posts_retrieved"].inc()
+                logger.info("Processed post: %s", post['title'])
             except Exception as e:
                 logger.error(f"Error processing post {post.get('title', 'unknown')}: {e}")
-                metrics["api_errors"] += 1
+                metrics["api_errors"].inc()
                 continue
 
         # If no posts were processed, use fallback
         if not processed_posts:
             logger.warning("No posts processed, using fallback data.")
-            metrics["failed_searches"] += 1
+            metrics["failed_searches"].inc()
             return get_fallback_posts()
 
+        # Semantic pass over the whole batch catches paraphrases the keyword rules miss
+        annotate_posts(processed_posts, sentence_model)
+
         # Sort by misinformation status and engagement
         processed_posts.sort(
             key=lambda x: (-1 if x["isFalse"] else 0, -x["engagementScore"])
         )
 
-        top_posts = processed_posts[:15]  # Limit to 15 posts
-        metrics["successful_searches"] += 1
+        top_posts = processed_posts[:POSTS_PAGE_SIZE]
+        metrics["successful_searches"].inc()
 
-        # Save to cache
-        save_posts_to_file(top_posts, time_filter)
+        # Every processed post joins the store's history; the response stays the top page
+        save_posts(processed_posts, time_filter)
 
         duration = time.time() - start_time
-        metrics["search_duration"].append(duration)
+        observe("fetch_posts", duration)
         logger.info(f"Fetch completed in {duration:.2f} seconds")
 
         return top_posts
     except Exception as e:
         logger.error(f'Error processing posts: {e}')
-        metrics["failed_searches"] += 1
+        metrics["failed_searches"].inc()
         return get_fallback_posts()
 
-# Comprehensive misinformation detection logic
-def contains_potential_misinformation(text: str) -> Dict[str, Any]:
-    """Detect potential misinformation in text related to health topics."""
-    misinformation_patterns = [
-        # Cancer misinformation
-        { 
-            "category": "Cancer", 
-            "terms": ['cure cancer', 'cures cancer', 'cancer cure', 'fight cancer naturally', 'alternative cancer', 'cancer treatment they', 'cancer fungus', 'baking soda cancer'],
-            "evidence": 'Claims of simple cancer cures contradict established medical understanding that cancer is a complex group of diseases requiring various evidence-based treatments.'
-        },
-        # Vaccine misinformation
-        {
-            "category": "Vaccines",
-            "terms": ['vaccine injury', 'vaccine damaged', 'vaccine danger', 'vaccines cause', 'microchip', '5g', 'government track', 'vaccine autism', 'vaccine mercury', 'heavy metals'],
-            "evidence": 'Vaccines undergo rigorous safety testing. Claims linking vaccines to autism have been debunked by large-scale studies. Modern vaccines do not contain microchips.'
-        },
-        # Detox myths
-        {
-            "category": "Detox",
-            "terms": ['detox', 'cleanse', 'toxin', 'flush toxins', 'body cleanse', 'clean your', 'rid your body', 'draw out toxins'],
-            "evidence": 'The concept of "detoxing" is not medically recognized. The body has sophisticated detoxification systems through the liver and kidneys.'
-        },
-        # pH/alkaline misinformation
-        {
-            "category": "Alkaline Treatments",
-            "terms": ['alkaline', 'alkalize', 'ph balance', 'acid environment', 'acidic body', 'alkaline diet', 'ph diet'],
-            "evidence": 'Blood pH is tightly regulated. Consuming alkaline foods cannot significantly change blood pH, and disease states like cancer are not caused by body acidity.'
-        },
-        # Conspiracy theories
-        {
-            "category": "Medical Conspiracies",
-            "terms": ['big pharma', 'what doctors don\'t', 'don\'t want you to know', 'suppressed cure', 'suppressed treatment', 'government hiding', 'medical establishment', 'doctors won\'t tell', 'conspiracy'],
-            "evidence": 'Conspiracy theories about hidden cures contradict the open nature of scientific research and regulatory processes.'
-        },
-        # Miracle cures
-        {
-            "category": "Miracle Cures",
-            "terms": ['miracle', 'cure all', 'magical', 'ancient secret', 'secret cure', 'one simple', 'this one trick', 'doctors hate', 'breakthrough they'],
-            "evidence": 'Claims of "miracle cures" lack scientific evidence and exploit hope among vulnerable populations.'
-        },
-        # Natural remedies
-        {
-            "category": "Natural Remedy Exaggeration",
-            "terms": ['natural cure', 'heal yourself', 'natural treatment', 'essential oil cure', 'herbal cure', 'ancient remedy', 'superfood cure'],
-            "evidence": 'While some natural substances have medicinal properties, claims of curing serious conditions often lack scientific support.'
-        },
-        # COVID-19 misinformation
-        {
-            "category": "COVID-19",
-            "terms": ['covid hoax', 'plandemic', 'covid conspiracy', 'coronavirus fake', 'fake virus', 'covid cure', 'covid prevention', 'prevents covid'],
-            "evidence": 'COVID-19 is a well-documented viral disease caused by SARS-CoV-2, studied extensively worldwide.'
-        },
-        # Alternative medicine
-        {
-            "category": "Alternative Medicine Claims",
-            "terms": ['homeopathy cure', 'alternative medicine cure', 'acupuncture cure', 'energy healing', 'quantum healing', 'vibrational medicine', 'frequency healing'],
-            "evidence": 'Claims of curing serious diseases with alternative therapies often lack rigorous scientific evidence.'
-        },
-        # Supplements
-        {
-            "category": "Supplement Claims",
-            "terms": ['vitamin c cure', 'megadose', 'vitamin d cure', 'zinc cure', 'supplement cure', 'boost immune system instantly', 'supercharge immunity'],
-            "evidence": 'No supplement has been proven to prevent or cure serious diseases on its own. High doses can cause adverse effects.'
-        },
-        # Mental health
-        {
-            "category": "Mental Health",
-            "terms": ['depression cure', 'anxiety cure', 'mental health miracle', 'natural depression', 'herbal anxiety', 'cure mental illness'],
-            "evidence": 'Mental health conditions require evidence-based treatments like therapy and medication. Natural remedies may support but not cure.'
-        },
-        # Women's health
-        {
-            "category": "Women's Health",
-            "terms": ['fertility cure', 'hormone cleanse', 'natural fertility', 'menopause cure', 'pcos cure'],
-            "evidence": 'Women’s health conditions like PCOS or infertility require medical evaluation. Natural remedies alone are insufficient.'
-        }
-    ]
-    
-    lower_text = text.lower()
-    
-    for pattern in misinformation_patterns:
-        for term in pattern["terms"]:
-            if term in lower_text:
-                return {
-                    "isLikelyFalse": True,
-                    "category": pattern["category"],
-                    "evidence": pattern["evidence"]
-                }
-    
-    word_pairs = [
-        {"pair": ['cure', 'disease'], "distance": 10},
-        {"pair": ['prevent', 'disease'], "distance": 10},
-        {"pair": ['secret', 'treatment'], "distance": 15},
-        {"pair": ['natural', 'cure'], "distance": 10},
-        {"pair": ['alternative', 'treatment'], "distance": 10}
-    ]
-    
-    words = lower_text.split()
-    
-    for pair_info in word_pairs:
-        pair = pair_info["pair"]
-        distance = pair_info["distance"]
-        first_word_indices = []
-        
-        for index, word in enumerate(words):
-            if pair[0] in word:
-                first_word_indices.append(index)
-        
-        for index in first_word_indices:
-            start_range = max(0, index - distance)
-            end_range = min(len(words) - 1, index + distance)
-            
-            for i in range(start_range, end_range + 1):
-                if pair[1] in words[i]:
-                    return {
-                        "isLikelyFalse": True,
-                        "category": "Health Claims",
-                        "evidence": "This post contains language patterns associated with medical misinformation."
-                    }
-    
-    return {
-        "isLikelyFalse": False,
-        "evidence": "This post doesn't contain common misinformation markers."
-    }
-
 # Comprehensive fallback data
 def get_fallback_posts() -> List[Dict[str, Any]]:
     """Return a list of fallback posts for when the API fails."""
@@ -733,38 +585,43 @@ def get_fallback_posts() -> List[Dict[str, Any]]:
         }
     ]
 
-# Function to save posts to file
-def save_posts_to_file(posts: List[Dict[str, Any]], time_filter: str) -> None:
-    """Save posts to a cache file specific to the time filter."""
+# Post cache (SQLite post store; a window is fresh for 6 hours after its last fetch)
+POSTS_MAX_AGE = 6 * 3600
+POSTS_PAGE_SIZE = 15
+POSTS_MAX_PAGE_SIZE = 100
+
+def freshness_left(time_filter: str) -> float:
+    """Seconds until a time window is due for a refetch; 0 if it is already stale."""
+    fetched_at = post_store.last_fetch(time_filter)
+    return max(0.0, POSTS_MAX_AGE - (time.time() - fetched_at)) if fetched_at else 0.0
+
+def save_posts(posts: List[Dict[str, Any]], time_filter: str) -> None:
+    """Store processed posts and mark the time window as freshly fetched."""
     try:
-        cache_file = f'cached_posts_{time_filter}.json'
-        with open(cache_file, 'w') as f:
-            json.dump(posts, f)
-        logger.info(f"Posts saved to {cache_file}")
+        post_store.save_posts(posts, window=time_filter)
+        # Streaming structures see each post once, at its first store
+        sync_streams()
     except Exception as e:
-        logger.error(f"Error saving posts to cache file: {e}")
+        logger.error(f"Error saving posts to the post store: {e}")
 
-# Function to load posts from file
-def load_posts_from_file(time_filter: str) -> Optional[List[Dict[str, Any]]]:
-    """Load posts from cache file if it exists and is recent."""
+def load_cached_posts(time_filter: str, limit: Optional[int] = POSTS_PAGE_SIZE) -> Optional[List[Dict[str, Any]]]:
+    """Posts of a time window from the store if the window was fetched recently."""
     try:
-        cache_file = f'cached_posts_{time_filter}.json'
-        if not os.path.exists(cache_file):
-            logger.info(f"Cache file {cache_file} does not exist")
+        if not post_store.is_fresh(time_filter, POSTS_MAX_AGE):
+            logger.info(f"No recent fetch for time window '{time_filter}'")
+            cache_event("posts", hit=False)
             return None
         
-        file_mod_time = os.path.getmtime(cache_file)
-        if time.time() - file_mod_time > 6 * 3600:  # 6 hours
-            logger.info(f"Cache file {cache_file} is too old")
+        posts = post_store.window_posts(time_filter, limit=limit)
+        if not posts:
+            cache_event("posts", hit=False)
             return None
-        
-        with open(cache_file, 'r') as f:
-            posts = json.load(f)
-        logger.info(f"Loaded {len(posts)} posts from {cache_file}")
-        metrics["cache_hits"] += 1
+        logger.info(f"Loaded {len(posts)} posts for time window '{time_filter}'")
+        metrics["cache_hits"].inc()
+        cache_event("posts", hit=True)
         return posts
     except Exception as e:
-        logger.error(f"Error loading posts from cache file: {e}")
+        logger.error(f"Error loading posts from the post store: {e}")
         return None
 
 # Function to check required environment variables
@@ -812,18 +669,57 @@ def health_check():
         'timestamp': datetime.datetime.now().isoformat()
     })
 
+def _time_arg(name: str) -> Optional[float]:
+    """Epoch seconds of a date query parameter; ValueError if it is present but unparseable."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    timestamp = parse_timestamp(value)
+    if timestamp is None:
+        raise ValueError(f"{name}={value!r}")
+    return timestamp
+
 @app.route('/api/posts', methods=['GET'])
+@cached_response(generation=post_store.generation,
+                 max_age=lambda: freshness_left(request.args.get('time_filter', 'week')),
+                 fresh=lambda: post_store.is_fresh(request.args.get('time_filter', 'week'), POSTS_MAX_AGE))
 def get_posts():
-    """Get posts with potential health misinformation."""
+    """Get posts with potential health misinformation, one keyset page at a time.
+
+    Query parameters: time_filter, category, subreddit, since/until (ISO
+    dates or epoch seconds), min_confidence, fields (comma-separated),
+    limit (at most POSTS_MAX_PAGE_SIZE) and cursor (next_cursor of the
+    previous page).
+    """
     try:
         time_filter = request.args.get('time_filter', 'week')
+        cursor = request.args.get('cursor')
+        try:
+            limit = min(max(int(request.args.get('limit', POSTS_PAGE_SIZE)), 1), POSTS_MAX_PAGE_SIZE)
+            since, until = (_time_arg(name) for name in ('since', 'until'))
+            min_confidence = float(request.args['min_confidence']) if 'min_confidence' in request.args else None
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+        fields = [field for field in request.args.get('fields', '').split(',') if field] or None
         
-        cached_posts = load_posts_from_file(time_filter)
-        if cached_posts:
-            return jsonify({'posts': cached_posts})
+        fetched = None
+        if not cursor and not post_store.is_fresh(time_filter, POSTS_MAX_AGE):
+            cache_event("posts", hit=False)
+            fetched = fetch_health_misinformation_posts(time_filter=time_filter)
+        elif not cursor:
+            metrics["cache_hits"].inc()
+            cache_event("posts", hit=True)
         
-        posts = fetch_health_misinformation_posts(time_filter=time_filter)
-        return jsonify({'posts': posts})
+        posts, next_cursor = post_store.page(
+            time_filter, category=request.args.get('category'), subreddit=request.args.get('subreddit'),
+            since=since, until=until, min_confidence=min_confidence, cursor=cursor, limit=limit, fields=fields
+        )
+        if not posts and fetched and not cursor:
+            # Sample and fallback posts can fall outside the window; return what was fetched as before
+            posts = [{field: post[field] for field in fields if field in post} for post in fetched] if fields else fetched
+        return jsonify({'posts': posts, 'next_cursor': next_cursor})
     except Exception as e:
         logger.error(f"Error in get_posts: {e}")
         return jsonify({'error': str(e)}), 500
@@ -838,13 +734,11 @@ def verify_claim():
         return jsonify({"error": "No claim provided"}), 400
     
     claim = data['claim']
-    logger.info(f"Received claim: {claim}")
+    logger.info("Received claim: %s", claim)
     
     try:
         # Get verification result using the vector search
-        prediction, true_confidence, false_confidence, not_known_confidence = compare_claims(
-            claim, client, sentence_model, class_name="MedicalFact", verbose=True
-        )
+        prediction, true_confidence, false_confidence, not_known_confidence = verify_canonical_claim(claim)
         
         # Prepare evidence text based on the result
         if prediction == "true":
@@ -865,6 +759,8 @@ def verify_claim():
                 "evidence": evidence
             }
         }
+        # Full payloads only for a sample of requests, serialized only if DEBUG is on
+        logger.debug("Verify-claim response: %s", lazy_json(response), extra=sample(0.05))
         
         return jsonify(response)
     
@@ -891,9 +787,7 @@ def fact_check():
         if not claim:
             return jsonify({'error': 'Claim is required'}), 400
         
-        prediction, true_conf, false_conf, not_known_conf = compare_claims(
-            claim, client, sentence_model, class_name="MedicalFact", verbose=True
-        )
+        prediction, true_conf, false_conf, not_known_conf = verify_canonical_claim(claim)
         
         return jsonify({
             'claim': claim,
@@ -910,61 +804,80 @@ def fact_check():
         }), 500
 
 @app.route('/api/stats', methods=['GET'])
+@cached_response(generation=post_store.generation, max_age=lambda: freshness_left('week'),
+                 fresh=lambda: engagement_stats.count > 0)
 def get_stats():
-    """Get aggregated statistics on health misinformation."""
+    """Get aggregated statistics on health misinformation, read from the streaming summaries."""
     try:
-        cached_posts = load_posts_from_file('week') or fetch_health_misinformation_posts(time_filter='week')
-        
-        total_posts = len(cached_posts)
-        misinformation_posts = sum(1 for post in cached_posts if post.get('isFalse', False))
-        verified_posts = total_posts - misinformation_posts
+        sync_streams()
+        if engagement_stats.count == 0:
+            fetch_health_misinformation_posts(time_filter='week')
+        snapshot = engagement_stats.snapshot()
         
-        categories = {}
-        for post in cached_posts:
-            category = post.get('category', 'Uncategorized')
-            categories[category] = categories.get(category, 0) + 1
-        
-        sorted_categories = sorted(
-            [{'name': k, 'count': v} for k, v in categories.items()],
-            key=lambda x: x['count'], 
-            reverse=True
-        )
-        
-        avg_engagement = sum(post.get('engagementScore', 0) for post in cached_posts) / total_posts if total_posts > 0 else 0
-        mis_engagement = sum(post.get('engagementScore', 0) for post in cached_posts if post.get('isFalse', False)) / misinformation_posts if misinformation_posts > 0 else 0
-        verified_engagement = sum(post.get('engagementScore', 0) for post in cached_posts if not post.get('isFalse', False)) / verified_posts if verified_posts > 0 else 0
+        total_posts = snapshot['overall']['count']
+        misinformation = snapshot['labels']['misinformation']
+        verified = snapshot['labels']['verified']
         
         return jsonify({
             'total_posts': total_posts,
-            'misinformation_posts': misinformation_posts,
-            'verified_posts': verified_posts,
-            'misinformation_percentage': round((misinformation_posts / total_posts * 100), 2) if total_posts > 0 else 0,
-            'categories': sorted_categories,
-            'avg_engagement': round(avg_engagement, 2),
-            'misinformation_engagement': round(mis_engagement, 2),
-            'verified_engagement': round(verified_engagement, 2)
+            'misinformation_posts': misinformation['count'],
+            'verified_posts': verified['count'],
+            'misinformation_percentage': round((misinformation['count'] / total_posts * 100), 2) if total_posts > 0 else 0,
+            'categories': [
+                {'name': category['name'], 'count': category['count'],
+                 'engagement': {key: category[key] for key in ('mean', 'p50', 'p90', 'p99')}}
+                for category in snapshot['categories']
+            ],
+            'avg_engagement': snapshot['overall']['mean'],
+            'misinformation_engagement': misinformation['mean'],
+            'verified_engagement': verified['mean'],
+            'engagement_percentiles': {
+                'all': {key: snapshot['overall'][key] for key in ('p50', 'p90', 'p99')},
+                'misinformation': {key: misinformation[key] for key in ('p50', 'p90', 'p99')},
+                'verified': {key: verified[key] for key in ('p50', 'p90', 'p99')}
+            }
         })
     except Exception as e:
         logger.error(f"Error in get_stats: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/trending-topics', methods=['GET'])
+# Trend buckets roll over hourly even without new posts
+@cached_response(generation=lambda: (post_store.generation(), int(time.time() // 3600)),
+                 max_age=lambda: min(freshness_left('week'), 3600 - time.time() % 3600),
+                 fresh=lambda: post_store.is_fresh('week', POSTS_MAX_AGE))
 def get_trending_topics():
-    """Get trending health misinformation topics."""
+    """Get trending health misinformation topics.
+
+    Query parameters: window (time_filter name, "6h"/"3d" duration or
+    seconds; default week), by (category, subreddit or pair), sort (count,
+    velocity, acceleration or zscore) and limit.
+    """
     try:
-        cached_posts = load_posts_from_file('week') or fetch_health_misinformation_posts(time_filter='week')
+        if not post_store.is_fresh('week', POSTS_MAX_AGE):
+            fetch_health_misinformation_posts(time_filter='week')
+        sync_streams()
         
-        categories = {}
-        for post in cached_posts:
-            category = post.get('category', 'Uncategorized')
-            categories[category] = categories.get(category, 0) + 1
+        try:
+            window = parse_window(request.args.get('window', 'week'))
+            limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+            by = request.args.get('by', 'category')
+            sort = request.args.get('sort', 'count')
+            top_topics = trend_engine.trending(window, by=by, limit=limit, sort=sort)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query parameter: {e}'}), 400
         
-        topics = [
-            {'category': category, 'count': count}
-            for category, count in categories.items()
-        ]
-        topics.sort(key=lambda x: x['count'], reverse=True)
-        top_topics = topics[:10]
+        if not top_topics and by == 'category':
+            # Sample and fallback posts predate the ring buffers; count the cached list as before
+            cached_posts = load_cached_posts('week', limit=None) or fetch_health_misinformation_posts(time_filter='week')
+            categories = {}
+            for post in cached_posts:
+                category = post.get('category', 'Uncategorized')
+                categories[category] = categories.get(category, 0) + 1
+            top_topics = sorted(
+                ({'category': category, 'count': count} for category, count in categories.items()),
+                key=lambda x: x['count'], reverse=True
+            )[:limit]
         
         return jsonify({'topics': top_topics})
     except Exception as e:
@@ -972,17 +885,18 @@ def get_trending_topics():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/metrics', methods=['GET'])
+@cached_response(volatile=True)
 def get_metrics():
     """Get search performance metrics."""
     try:
-        avg_search_duration = sum(metrics["search_duration"]) / len(metrics["search_duration"]) if metrics["search_duration"] else 0
+        avg_search_duration = stage_mean("fetch_posts")
         return jsonify({
-            'successful_searches': metrics["successful_searches"],
-            'failed_searches': metrics["failed_searches"],
-            'subreddits_searched': metrics["subreddits_searched"],
-            'posts_retrieved': metrics["posts_retrieved"],
-            'cache_hits': metrics["cache_hits"],
-            'api_errors': metrics["api_errors"],
+            'successful_searches': metrics["successful_searches"].value,
+            'failed_searches': metrics["failed_searches"].value,
+            'subreddits_searched': metrics["subreddits_searched"].value,
+            'posts_retrieved': metrics["posts_retrieved"].value,
+            'cache_hits': metrics["cache_hits"].value,
+            'api_errors': metrics["api_errors"].value,
             'avg_search_duration': round(avg_search_duration, 2),
             'inaccessible_subreddits': list(inaccessible_subreddits)
         })
@@ -990,6 +904,11 @@ def get_metrics():
         logger.error(f"Error in get_metrics: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Expose stage latency histograms and counters in Prometheus text format."""
+    return Response(render_prometheus(), content_type=CONTENT_TYPE)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
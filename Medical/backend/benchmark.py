@@ -0,0 +1,575 @@
+# Medical/backend/benchmark.py
+"""Benchmark runner for the verification and classification hot paths.
+
+Runs every benchmark against fixed, seeded synthetic corpora and writes a JSON
+report that can be diffed across commits:
+
+    python benchmark.py --sizes 10 1000 100000 --output bench_results
+    python benchmark.py --compare bench_results/old.json bench_results/new.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+import subprocess
+from types import SimpleNamespace
+from typing import List, Dict, Any, Callable, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fake_weaviate import FakeWeaviate, FakeWeaviateClient, load_objects, start_server
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+EMBEDDING_DIM = 384
+SEED = 1337
+
+# Vocabulary used to build the synthetic corpora
+DISEASES = ['diabetes', 'asthma', 'influenza', 'measles', 'arthritis', 'migraine', 'hypertension',
+            'eczema', 'colitis', 'neuropathy', 'cancer', 'covid-19', 'autism', 'depression', 'anemia']
+CAUSES = ['viral infection', 'genetic factors', 'autoimmune response', 'poor diet', 'smoking',
+          'bacterial infection', 'insulin resistance', 'allergens', 'stress', 'aging']
+SYMPTOMS = ['fever', 'fatigue', 'joint pain', 'headache', 'rash', 'cough', 'nausea', 'bleeding',
+            'shortness of breath', 'numbness', 'weight loss', 'dizziness']
+MEASURES = ['vaccination', 'regular exercise', 'balanced diet', 'hand washing', 'screening',
+            'avoiding smoking', 'sleep hygiene', 'stress management']
+CURES = ['antibiotics', 'insulin therapy', 'chemotherapy', 'antivirals', 'physical therapy',
+         'immunosuppressants', 'antidepressants', 'surgery', 'no known cure']
+CLAIM_TEMPLATES = [
+    "{disease} is caused by {cause}",
+    "{cure} cures {disease}",
+    "{measure} prevents {disease}",
+    "{disease} causes {symptom} and {symptom2}",
+    "drinking lemon water with baking soda cures {disease}, and {measure} is useless",
+]
+MISINFO_SNIPPETS = [
+    "Big Pharma doesn't want you to know this simple cure.",
+    "Vaccines cause autism and contain microchips for 5G tracking.",
+    "This detox cleanse will flush toxins out of your body overnight.",
+    "An alkaline diet cured my stage 4 cancer in weeks.",
+    "Essential oil cure for every infection, doctors hate it.",
+]
+NEUTRAL_SNIPPETS = [
+    "My doctor adjusted the dose and the symptoms are better now.",
+    "Has anyone tried physical therapy after knee surgery?",
+    "Went for a scope last week, waiting on the results.",
+    "Sleep and regular exercise have helped my migraines a lot.",
+    "The side effects were rough for the first month but settled down.",
+]
+SUBREDDITS = ['health', 'medicine', 'alternativehealth', 'conspiracy', 'nutrition',
+              'supplements', 'covid19', 'naturalremedies', 'cancer', 'offmychest']
+
+
+# Synthetic corpora
+def make_facts(n: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """Build n synthetic MedicalFact objects covering both fact schemas."""
+    rng = random.Random(seed)
+    facts = []
+    for i in range(n):
+        disease = rng.choice(DISEASES)
+        template = rng.choice(CLAIM_TEMPLATES)
+        fact_text = template.format(
+            disease=disease, cause=rng.choice(CAUSES), cure=rng.choice(CURES),
+            measure=rng.choice(MEASURES), symptom=rng.choice(SYMPTOMS), symptom2=rng.choice(SYMPTOMS)
+        )
+        facts.append({
+            "fact": fact_text,
+            "is_true": rng.random() < 0.5,
+            "category": rng.choice(DISEASES).title(),
+            "diseaseName": disease,
+            "cause": rng.choice(CAUSES),
+            "symptoms": ", ".join(rng.sample(SYMPTOMS, 3)),
+            "measures": ", ".join(rng.sample(MEASURES, 2)),
+            "cure": rng.choice(CURES),
+        })
+    return facts
+
+
+def make_claims(n: int, seed: int = SEED + 1) -> List[str]:
+    """Build n synthetic user claims, some of them compound."""
+    rng = random.Random(seed)
+    return [
+        rng.choice(CLAIM_TEMPLATES).format(
+            disease=rng.choice(DISEASES), cause=rng.choice(CAUSES), cure=rng.choice(CURES),
+            measure=rng.choice(MEASURES), symptom=rng.choice(SYMPTOMS), symptom2=rng.choice(SYMPTOMS)
+        )
+        for _ in range(n)
+    ]
+
+
+def make_text(rng: random.Random, sentences: int) -> str:
+    """Build a post body from a mix of misinformation and neutral sentences."""
+    parts = []
+    for _ in range(sentences):
+        pool = MISINFO_SNIPPETS if rng.random() < 0.15 else NEUTRAL_SNIPPETS
+        parts.append(rng.choice(pool))
+    return " ".join(parts)
+
+
+def make_posts(n: int, seed: int = SEED + 2) -> List[Dict[str, Any]]:
+    """Build n synthetic post records in the cached_posts_*.json format."""
+    rng = random.Random(seed)
+    base = datetime.datetime(2025, 5, 1)
+    posts = []
+    for i in range(n):
+        score = int(rng.paretovariate(1.2) * 10)
+        comments = int(rng.paretovariate(1.4) * 5)
+        awards = rng.choice([0, 0, 0, 1, 2])
+        is_false = rng.random() < 0.6
+        posts.append({
+            "username": f"user{i}",
+            "subreddit": f"r/{rng.choice(SUBREDDITS)}",
+            "title": make_text(rng, 1),
+            "content": make_text(rng, rng.randint(0, 12)),
+            "score": score,
+            "comments": comments,
+            "awards": awards,
+            "engagementScore": score + comments * 2 + awards * 1.5,
+            "permalink": f"/r/synthetic/comments/{i:x}/post_{i}/",
+            "isFalse": is_false,
+            "category": rng.choice(DISEASES).title() if is_false else "General Health",
+            "evidence": "Synthetic evidence text.",
+            "created_at": (base + datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 7))).isoformat(),
+            "false_confidence": 0.85,
+            "true_confidence": 0.10,
+            "not_known_confidence": 0.05
+        })
+    return posts
+
+
+def make_submissions(n: int, seed: int = SEED + 3) -> List[SimpleNamespace]:
+    """Build n objects that look like PRAW submissions to the post processing loop."""
+    rng = random.Random(seed)
+    submissions = []
+    for i in range(n):
+        submissions.append(SimpleNamespace(
+            id=f"{i:x}",
+            title=make_text(rng, 1),
+            selftext=make_text(rng, rng.randint(0, 12)),
+            score=int(rng.paretovariate(1.2) * 10),
+            num_comments=int(rng.paretovariate(1.4) * 5),
+            total_awards_received=rng.choice([0, 0, 1]),
+            author=SimpleNamespace(name=f"user{i}"),
+            subreddit=SimpleNamespace(display_name=rng.choice(SUBREDDITS)),
+            permalink=f"/r/synthetic/comments/{i:x}/post_{i}/",
+            created_utc=1714521600 + rng.randint(0, 7 * 86400),
+            stickied=False,
+        ))
+    return submissions
+
+
+def make_long_text(words: int, seed: int = SEED + 4) -> str:
+    """Build a long post body of roughly the given number of words."""
+    rng = random.Random(seed)
+    parts = []
+    count = 0
+    while count < words:
+        sentence = rng.choice(NEUTRAL_SNIPPETS)
+        parts.append(sentence)
+        count += len(sentence.split())
+    return " ".join(parts)
+
+
+# Encoders
+class HashingEncoder:
+    """Deterministic stand-in for SentenceTransformer that isolates pipeline overhead."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, show_progress_bar=False, **kwargs):
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.stack([self._encode_one(s) for s in sentences]) if sentences else np.zeros((0, self.dim), dtype=np.float32)
+
+
+def load_encoder(name: str):
+    """Return the encoder used by the benchmarks ('minilm' or 'hash')."""
+    if name == 'hash':
+        return HashingEncoder()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+
+# Fake Weaviate
+def build_fake_client(facts: List[Dict[str, Any]], encoder) -> FakeWeaviateClient:
+    """Embed a fact corpus and load it into an in-process fake Weaviate."""
+    fake = FakeWeaviate()
+    load_objects(fake, [dict(f) for f in facts], encoder=encoder, text_fields=("fact", "diseaseName", "cause"))
+    return FakeWeaviateClient(fake)
+
+
+# Timing helpers
+def time_call(fn: Callable[[], Any], repeat: int = 5, number: int = 1, warmup: int = 1) -> Dict[str, float]:
+    """Time fn and return per-call statistics in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1000)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(mean, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+        "ops_per_sec": round(1000 / mean, 2) if mean else 0.0,
+        "repeat": repeat,
+        "number": number
+    }
+
+
+def record(name: str, params: Dict[str, Any], stats: Optional[Dict[str, float]] = None,
+           skipped: Optional[str] = None) -> Dict[str, Any]:
+    """Build one result entry for the JSON report."""
+    entry = {"name": name, "params": params}
+    if skipped:
+        entry["skipped"] = skipped
+    else:
+        entry["stats"] = stats
+    return entry
+
+
+_weaviate_server = None
+
+
+def _import_app():
+    """Import app.py lazily against a local fake Weaviate so no cloud cluster is touched."""
+    global _weaviate_server
+    if 'app' not in sys.modules and _weaviate_server is None:
+        _weaviate_server = start_server(FakeWeaviate())
+        host, port = _weaviate_server.server_address[:2]
+        os.environ['WEAVIATE_URL'] = f"http://{host}:{port}"
+        os.environ.setdefault('POST_STORE_PATH', os.path.join(tempfile.mkdtemp(), 'posts.db'))
+    try:
+        import app
+        return app, None
+    except (Exception, SystemExit) as e:
+        return None, f"app.py could not be imported: {e!r}"
+
+
+# Benchmarks
+def bench_get_embedding(encoder, args) -> List[Dict[str, Any]]:
+    """Cold and warm vector_search.get_embedding, plus a batched encode for reference."""
+    import vector_search
+    claims = make_claims(64)
+    results = []
+
+    def cold():
+        vector_search.get_embedding.cache_clear()
+        for claim in claims:
+            vector_search.get_embedding(claim, encoder)
+
+    def warm():
+        for claim in claims:
+            vector_search.get_embedding(claim, encoder)
+
+    def batched():
+        encoder.encode(claims, show_progress_bar=False)
+
+    results.append(record("get_embedding.cold", {"texts": len(claims)}, time_call(cold, args.repeat)))
+    vector_search.get_embedding.cache_clear()
+    results.append(record("get_embedding.warm", {"texts": len(claims)}, time_call(warm, args.repeat)))
+    results.append(record("encode.batched", {"texts": len(claims)}, time_call(batched, args.repeat)))
+    return results
+
+
+def bench_vector_search(encoder, args) -> List[Dict[str, Any]]:
+    """Semantic and vote verification engines over growing fake Weaviate corpora."""
+    import vector_search
+    from verification_engine import VerificationEngine, WeaviateRetriever, VoteScorer
+    claims = make_claims(16)
+    results = []
+    for size in args.sizes:
+        client = build_fake_client(make_facts(size), encoder)
+        vote_engine = VerificationEngine(WeaviateRetriever(client), VoteScorer(), encoder)
+
+        def single():
+            for claim in claims:
+                vector_search.process_single_claim(claim, client, encoder)
+
+        def compare():
+            for claim in claims:
+                vector_search.compare_claims(claim, client, encoder)
+
+        def vote():
+            for claim in claims:
+                vote_engine.verify(claim)
+
+        params = {"facts": size, "claims": len(claims)}
+        results.append(record("vector_search.process_single_claim", params, time_call(single, args.repeat)))
+        results.append(record("vector_search.compare_claims", params, time_call(compare, args.repeat)))
+        results.append(record("verification_engine.vote", params, time_call(vote, args.repeat)))
+    return results
+
+
+def bench_app_compare_claims(encoder, args) -> List[Dict[str, Any]]:
+    """app.compare_claims (no verdict cache) over growing fact corpora."""
+    app, error = _import_app()
+    if not app:
+        return [record("app.compare_claims", {}, skipped=error)]
+    claims = make_claims(16)
+    results = []
+    for size in args.sizes:
+        client = build_fake_client(make_facts(size), encoder)
+
+        def compare():
+            for claim in claims:
+                app.compare_claims(claim, client, encoder)
+
+        params = {"facts": size, "claims": len(claims)}
+        results.append(record("app.compare_claims", params, time_call(compare, args.repeat)))
+    return results
+
+
+def legacy_contains_potential_misinformation(text: str, rules: Dict[str, Any]) -> Dict[str, Any]:
+    """First-match keyword loop the classifier replaced, kept as the speed baseline."""
+    # The original rebuilt its pattern table on every call
+    misinformation_patterns = [dict(pattern, terms=list(pattern["terms"])) for pattern in rules["categories"]]
+    lower_text = text.lower()
+    for pattern in misinformation_patterns:
+        for term in pattern["terms"]:
+            if term in lower_text:
+                return {"isLikelyFalse": True, "category": pattern["category"], "evidence": pattern["evidence"]}
+    words = lower_text.split()
+    for pair_info in rules["word_pairs"]:
+        pair = pair_info["pair"]
+        distance = pair_info["distance"]
+        first_word_indices = [index for index, word in enumerate(words) if pair[0] in word]
+        for index in first_word_indices:
+            for i in range(max(0, index - distance), min(len(words) - 1, index + distance) + 1):
+                if pair[1] in words[i]:
+                    return {"isLikelyFalse": True, **rules["word_pair_match"]}
+    return {"isLikelyFalse": False, "evidence": rules["no_match_evidence"]}
+
+
+def bench_misinformation(encoder, args) -> List[Dict[str, Any]]:
+    """Scored multi-label classifier against the legacy first-match loop on short, long and flagged texts."""
+    import misinfo_classifier
+    from misinfo_classifier import contains_potential_misinformation
+    with open(misinfo_classifier.RULES_PATH, encoding='utf-8') as f:
+        rules = json.load(f)
+    rng = random.Random(SEED)
+    texts = {
+        "short": [make_text(rng, 1) for _ in range(1000)],
+        "long": [make_long_text(600, seed=SEED + i) for i in range(50)],
+        "posts": [post["title"] + " " + post["content"] for post in make_posts(1000)],
+        # Every text matches early, the best case for the first-match loop
+        "flagged": [rng.choice(MISINFO_SNIPPETS) + " " + make_text(rng, 8) for _ in range(1000)],
+    }
+    results = []
+    for label, batch in texts.items():
+        def classify():
+            for text in batch:
+                contains_potential_misinformation(text)
+
+        def legacy():
+            for text in batch:
+                legacy_contains_potential_misinformation(text, rules)
+
+        params = {"texts": len(batch), "kind": label}
+        results.append(record("contains_potential_misinformation", params, time_call(classify, args.repeat)))
+        results.append(record("legacy_first_match", params, time_call(legacy, args.repeat)))
+    return results
+
+
+def bench_semantic(encoder, args) -> List[Dict[str, Any]]:
+    """semantic_classifier.classify_texts throughput over batches of synthetic posts."""
+    import semantic_classifier
+    semantic_classifier.get_centroids(encoder)
+    results = []
+    for size in args.sizes:
+        texts = [post["title"] + "\n" + post["content"] for post in make_posts(min(size, 10000))]
+
+        def classify():
+            semantic_classifier.classify_texts(texts, encoder)
+
+        results.append(record("semantic_classifier.classify_texts", {"texts": len(texts)},
+                              time_call(classify, max(1, args.repeat if len(texts) < 10000 else 2))))
+
+    # Long selftexts are chunked into sentence windows and pooled per post
+    long_texts = [make_long_text(600, seed=SEED + i) for i in range(50)]
+    for pooling in ("max", "mean"):
+        def classify_long():
+            semantic_classifier.classify_texts(long_texts, encoder, pooling=pooling)
+
+        results.append(record("semantic_classifier.classify_texts", {"texts": len(long_texts), "kind": "long",
+                                                                     "pooling": pooling},
+                              time_call(classify_long, args.repeat)))
+    return results
+
+
+def bench_post_processing(encoder, args) -> List[Dict[str, Any]]:
+    """Post processing loop of fetch_health_misinformation_posts over synthetic submissions."""
+    import fetch_health_misinformation_posts as fetcher
+    results = []
+    for size in args.sizes:
+        submissions = make_submissions(size)
+
+        def process():
+            fetcher.process_posts(submissions, min_engagement_score=0, model=encoder)
+
+        results.append(record("fetch_health_misinformation_posts.process_posts", {"posts": size},
+                              time_call(process, max(1, args.repeat if size < 100000 else 2))))
+    return results
+
+
+def bench_stats_endpoint(encoder, args) -> List[Dict[str, Any]]:
+    """GET /api/stats served from streaming summaries fed a growing number of posts."""
+    app, error = _import_app()
+    if not app:
+        return [record("api.stats", {}, skipped=error)]
+    from streaming_stats import EngagementStats
+    from http_cache import response_cache
+    results = []
+    test_client = app.app.test_client()
+    for size in args.sizes:
+        app.engagement_stats = EngagementStats()
+        app.engagement_stats.ingest(make_posts(size))
+
+        def stats():
+            response = test_client.get('/api/stats')
+            assert response.status_code == 200
+
+        def uncached():
+            # The store's generation does not change here, so every call would hit the first size's body
+            response_cache.clear()
+            stats()
+
+        results.append(record("api.stats", {"posts": size}, time_call(uncached, args.repeat)))
+        response_cache.clear()
+        results.append(record("api.stats_cached", {"posts": size}, time_call(stats, args.repeat)))
+    return results
+
+
+def bench_serialization(encoder, args) -> List[Dict[str, Any]]:
+    """Encode/decode throughput of post lists: stdlib json against the serialization module's backend."""
+    import serialization
+    backends = [("json", lambda obj: json.dumps(obj).encode('utf-8'), json.loads)]
+    if serialization.BACKEND != "json":
+        backends.append((serialization.BACKEND, serialization.dumps_bytes, serialization.loads))
+    results = []
+    for size in args.sizes:
+        posts = make_posts(min(size, 100000))
+        repeat = max(1, args.repeat if len(posts) < 100000 else 2)
+        for backend, encode, decode in backends:
+            data = encode(posts)
+            params = {"posts": len(posts), "backend": backend, "bytes": len(data)}
+            results.append(record("serialization.encode", params, time_call(lambda: encode(posts), repeat)))
+            results.append(record("serialization.decode", params, time_call(lambda: decode(data), repeat)))
+            # The post store encodes and decodes one row per post
+            results.append(record("serialization.encode_rows", params,
+                                  time_call(lambda: [encode(post) for post in posts], repeat)))
+    return results
+
+
+BENCHMARKS = {
+    "get_embedding": bench_get_embedding,
+    "vector_search": bench_vector_search,
+    "app_compare_claims": bench_app_compare_claims,
+    "misinformation": bench_misinformation,
+    "semantic": bench_semantic,
+    "post_processing": bench_post_processing,
+    "stats_endpoint": bench_stats_endpoint,
+    "serialization": bench_serialization,
+}
+
+
+# Reporting
+def git_revision() -> str:
+    """Return the current git commit, or 'unknown' outside a checkout."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def compare_reports(old_path: str, new_path: str) -> None:
+    """Print median latency ratios between two benchmark reports."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def key(entry):
+        return entry["name"], json.dumps(entry["params"], sort_keys=True)
+
+    old_results = {key(e): e for e in old["results"] if "stats" in e}
+    print(f"{'benchmark':<55} {'params':<30} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for entry in new["results"]:
+        if "stats" not in entry or key(entry) not in old_results:
+            continue
+        before = old_results[key(entry)]["stats"]["median_ms"]
+        after = entry["stats"]["median_ms"]
+        ratio = after / before if before else float('inf')
+        params = json.dumps(entry["params"], sort_keys=True)
+        print(f"{entry['name']:<55} {params:<30} {before:>10.3f} {after:>10.3f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Health Fact Finder backend hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Corpus sizes (facts/posts) to benchmark")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Run a subset of benchmarks")
+    parser.add_argument('--encoder', choices=['minilm', 'hash'], default='minilm',
+                        help="Real MiniLM model, or a hashing encoder that isolates pipeline overhead")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions per benchmark")
+    parser.add_argument('--output', default='bench_results', help="Directory for the JSON report")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Compare two reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_reports(*args.compare)
+        return
+
+    encoder = load_encoder(args.encoder)
+    results = []
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...")
+        results.extend(BENCHMARKS[name](encoder, args))
+
+    revision = git_revision()
+    report = {
+        "revision": revision,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "encoder": args.encoder,
+        "sizes": args.sizes,
+        "seed": SEED,
+        "results": results
+    }
+    os.makedirs(args.output, exist_ok=True)
+    output_file = os.path.join(args.output, f"{revision}-{args.encoder}.json")
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+# Medical/backend/bm25_index.py
+"""Local BM25 inverted index over the MedicalFact corpus for hybrid retrieval.
+
+The index is built from Weaviate on a background thread (paged with the
+cursor API, so the build is not capped by QUERY_MAXIMUM_RESULTS) and
+rebuilt periodically while the previous index keeps serving. Lexical relevance of any fact is then a dictionary lookup per
+query term, and lexical hits that the vector search missed can join the
+candidate pool through reciprocal-rank fusion:
+
+    index = get_index(client)
+    fused = reciprocal_rank_fusion([vector_ids, [doc_id for doc_id, _ in index.search(claim)]])
+
+Environment variables:
+
+    BM25_FIELDS=fact,diseaseName,cause,symptoms,measures,cure
+    BM25_REFRESH_SECONDS=3600     rebuild interval
+    BM25_PAGE_SIZE=500            objects fetched per Weaviate page
+"""
+import os
+import re
+import math
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from instrumentation import timed
+from claim_canonicalizer import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+FIELDS = tuple(os.environ.get('BM25_FIELDS', 'fact,diseaseName,cause,symptoms,measures,cure').split(','))
+REFRESH_SECONDS = float(os.environ.get('BM25_REFRESH_SECONDS', '3600'))
+PAGE_SIZE = int(os.environ.get('BM25_PAGE_SIZE', '500'))
+RRF_K = 60
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over documents made of several text fields."""
+
+    def __init__(self, fields: Tuple[str, ...] = FIELDS, k1: float = 1.5, b: float = 0.75):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.documents: List[Dict[str, Any]] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        self._impacts: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_impacts: List[Dict[str, float]] = []
+        self._positions: Dict[str, int] = {}
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, doc_id: str, properties: Dict[str, Any]) -> None:
+        """Index one document; call finalize() once all documents are added."""
+        doc = len(self.ids)
+        tokens = tokenize(" ".join(str(properties.get(field) or "") for field in self.fields))
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            self._postings.setdefault(token, []).append((doc, count))
+        self.ids.append(doc_id)
+        self.documents.append(properties)
+        self._lengths.append(len(tokens))
+
+    def finalize(self) -> "BM25Index":
+        """Precompute every posting's BM25 contribution after the last add()."""
+        total = len(self.ids)
+        avg_length = (sum(self._lengths) / total if total else 0.0) or 1.0
+        norms = [self.k1 * (1 - self.b + self.b * length / avg_length) for length in self._lengths]
+        self._doc_impacts = [{} for _ in range(total)]
+        self._impacts = {}
+        for term, postings in self._postings.items():
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            weights = [idf * count * (self.k1 + 1) / (count + norms[doc]) for doc, count in postings]
+            for (doc, _), weight in zip(postings, weights):
+                self._doc_impacts[doc][term] = weight
+            self._impacts[term] = (np.fromiter((doc for doc, _ in postings), dtype=np.intp, count=len(postings)),
+                                   np.asarray(weights, dtype=np.float32))
+        self._postings = {}
+        self._positions = {doc_id: doc for doc, doc_id in enumerate(self.ids)}
+        self.built_at = time.time()
+        return self
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Top documents for a query as (document index, score), best first."""
+        impacts = [self._impacts[term] for term in set(tokenize(query)) if term in self._impacts]
+        if not impacts:
+            return []
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for docs, weights in impacts:
+            # A term lists each document once, so fancy-index accumulation is safe
+            scores[docs] += weights
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(doc), float(scores[doc])) for doc in candidates]
+
+    def score(self, query_terms: Iterable[str], doc: int) -> float:
+        """BM25 score of a single document, looked up from its precomputed term impacts."""
+        impacts = self._doc_impacts[doc]
+        return sum(impacts.get(term, 0.0) for term in query_terms)
+
+    def coverage(self, query_terms: Iterable[str], doc: int) -> float:
+        """Fraction of the query terms that occur in a document, in [0, 1]."""
+        terms = set(query_terms)
+        if not terms:
+            return 0.0
+        impacts = self._doc_impacts[doc]
+        return sum(1 for term in terms if term in impacts) / len(terms)
+
+    def position(self, doc_id: str) -> Optional[int]:
+        """Document index for a Weaviate object id."""
+        return self._positions.get(doc_id)
+
+
+def build_from_weaviate(client, class_name: str = "MedicalFact", fields: Tuple[str, ...] = FIELDS,
+                        page_size: int = PAGE_SIZE) -> BM25Index:
+    """Page through every object of a class by id cursor and index its text fields."""
+    try:
+        # Only request fields the class actually has; app.py and vector_search.py use different schemas
+        schema = client.schema.get(class_name)
+        available = {prop["name"] for prop in schema.get("properties", [])}
+        fields = tuple(field for field in fields if field in available) or fields
+    except Exception as e:
+        logger.debug(f"Could not read {class_name} schema, indexing all configured fields: {e}")
+    index = BM25Index(fields)
+    after = None
+    with timed("bm25_build"):
+        while True:
+            query = client.query.get(class_name, list(fields)) \
+                .with_additional(["id"]) \
+                .with_limit(page_size)
+            # Offsets stop at QUERY_MAXIMUM_RESULTS (10k by default); the cursor does not
+            if after is not None:
+                query = query.with_after(after)
+            response = query.do()
+            if response.get('errors'):
+                raise RuntimeError(f"Weaviate error while paging {class_name}: {response['errors']}")
+            objects = response.get('data', {}).get('Get', {}).get(class_name, []) or []
+            for obj in objects:
+                after = (obj.get("_additional") or {}).get("id")
+                if not after:
+                    raise RuntimeError(f"{class_name} object without an id; cannot continue the cursor")
+                index.add(after, obj)
+            if len(objects) < page_size:
+                break
+    logger.info(f"Built BM25 index over {len(index)} {class_name} objects")
+    return index.finalize()
+
+
+_indexes: Dict[Tuple[int, str], BM25Index] = {}
+_failures: Dict[Tuple[int, str], float] = {}
+_building: Set[Tuple[int, str]] = set()
+_lock = threading.Lock()
+
+
+def _rebuild(client, class_name: str, key: Tuple[int, str]) -> None:
+    """Build a fresh index off the request path and swap it in once it is complete."""
+    try:
+        index = build_from_weaviate(client, class_name)
+        # A single dict store: readers see either the old index or the finished new one
+        _indexes[key] = index
+        _failures.pop(key, None)
+    except Exception as e:
+        logger.warning(f"BM25 index build failed for {class_name}: {e}")
+        _failures[key] = time.time()
+    finally:
+        with _lock:
+            _building.discard(key)
+
+
+def get_index(client, class_name: str = "MedicalFact") -> Optional[BM25Index]:
+    """Shared index for a client and class; None until the first background build finishes.
+
+    A stale index keeps being served while its replacement is built on a
+    background thread, so requests never wait on a rebuild.
+    """
+    key = (id(client), class_name)
+    index = _indexes.get(key)
+    now = time.time()
+    if index is not None and now - index.built_at < REFRESH_SECONDS:
+        return index
+    # After a failed build, retry at most once a minute and serve the stale index meanwhile
+    if now - _failures.get(key, 0.0) < 60:
+        return index
+    with _lock:
+        if key in _building:
+            return index
+        _building.add(key)
+    threading.Thread(target=_rebuild, args=(client, class_name, key),
+                     name=f"bm25-build-{class_name}", daemon=True).start()
+    return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[Any]], k: int = RRF_K) -> List[Tuple[Any, float]]:
+    """Fuse ranked lists of keys by summing 1 / (k + rank); best first."""
+    scores: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
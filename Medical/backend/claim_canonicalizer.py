@@ -0,0 +1,166 @@
+# Medical/backend/claim_canonicalizer.py
+"""Claim canonicalization and a verdict cache for recently verified claims.
+
+"vaccines cause autism" and "Vaccines CAUSE autism!!" are the same claim but
+miss every exact-key cache. ``canonicalize`` folds Unicode, case, punctuation
+and whitespace, and ``claim_key`` hashes the canonical text with stopwords
+removed. ``VerdictCache`` returns a stored verdict for an identical key, or
+for a recent claim whose embedding lies within a tight cosine radius, so
+repeats skip Weaviate and Gemini entirely:
+
+    canonical = canonicalize(claim)
+    verdict = verdict_cache.lookup(canonical, embedding)
+    if verdict is None:
+        verdict = verify(claim)
+        verdict_cache.store(canonical, verdict, embedding)
+
+Environment variables:
+
+    VERDICT_CACHE_SIZE=2048       claims remembered
+    VERDICT_CACHE_TTL=3600        seconds a verdict is reused
+    VERDICT_CACHE_RADIUS=0.97     cosine similarity needed for a near match
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from instrumentation import cache_event
+
+CACHE_SIZE = int(os.environ.get('VERDICT_CACHE_SIZE', '2048'))
+CACHE_TTL = float(os.environ.get('VERDICT_CACHE_TTL', '3600'))
+CACHE_RADIUS = float(os.environ.get('VERDICT_CACHE_RADIUS', '0.97'))
+
+_NON_WORD = re.compile(r"[^\w\s'-]+")
+_SPACES = re.compile(r'\s+')
+
+# Words that never change what a claim asserts; negations are deliberately absent
+STOPWORDS = frozenset("""
+a an the this that these those is are was were be been being am do does did
+it its of in on at to for with by from as into about than then so
+really actually very just also totally completely definitely literally
+i me my we our you your they them their he she his her
+""".split())
+NEGATIONS = frozenset("""
+not no never none nothing neither nor without cannot can't don't doesn't didn't
+isn't aren't wasn't weren't won't wouldn't shouldn't couldn't hasn't haven't
+""".split())
+
+
+def canonicalize(claim: str) -> str:
+    """Unicode-folded, lowercased claim with punctuation dropped and whitespace collapsed."""
+    text = unicodedata.normalize('NFKC', claim).casefold()
+    text = text.replace('’', "'").replace('‘', "'")
+    text = _NON_WORD.sub(' ', text)
+    # Keep hyphens and apostrophes inside words ("covid-19", "doesn't"), drop stray ones
+    words = [word.strip("'-") for word in _SPACES.split(text)]
+    return ' '.join(word for word in words if word)
+
+
+def content_words(canonical: str) -> List[str]:
+    """Canonical words with stopwords removed, in order."""
+    return [word for word in canonical.split() if word not in STOPWORDS]
+
+
+def claim_key(claim: str) -> str:
+    """Stopword-insensitive hash of a claim."""
+    canonical = canonicalize(claim)
+    words = content_words(canonical) or canonical.split()
+    return hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _polarity(canonical: str) -> frozenset:
+    """Negation words in a claim; near matches must agree on them."""
+    return frozenset(word for word in canonical.split() if word in NEGATIONS)
+
+
+class VerdictCache:
+    """LRU of recent verdicts, looked up by claim key or by embedding similarity."""
+
+    def __init__(self, size: int = CACHE_SIZE, ttl: float = CACHE_TTL, radius: float = CACHE_RADIUS):
+        self.size = size
+        self.ttl = ttl
+        self.radius = radius
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = [None] * size
+        self._free: List[int] = list(range(size - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        slot = entry.get("slot")
+        if slot is not None:
+            self._slot_keys[slot] = None
+            self._matrix[slot] = 0.0
+            self._free.append(slot)
+
+    def _live(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry["stored_at"] > self.ttl:
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def lookup(self, canonical: str, embedding: Optional[Sequence[float]] = None) -> Optional[Any]:
+        """Stored verdict for the same or a near-identical claim, else None."""
+        now = time.time()
+        key = claim_key(canonical)
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is None and embedding is not None and self._matrix is not None and self._entries:
+                vector = np.asarray(embedding, dtype=np.float32)
+                norm = float(np.linalg.norm(vector))
+                if norm:
+                    similarities = self._matrix @ (vector / norm)
+                    slot = int(similarities.argmax())
+                    candidate = self._slot_keys[slot]
+                    if candidate is not None and similarities[slot] >= self.radius:
+                        entry = self._live(candidate, now)
+                        if entry is not None and entry["polarity"] != _polarity(canonical):
+                            entry = None
+        cache_event("claim_verdict", entry is not None)
+        return entry["verdict"] if entry is not None else None
+
+    def store(self, canonical: str, verdict: Any, embedding: Optional[Sequence[float]] = None) -> None:
+        """Remember the verdict for a claim, evicting the least recently used one if full."""
+        key = claim_key(canonical)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            while len(self._entries) >= self.size:
+                self._evict(next(iter(self._entries)))
+            entry = {"verdict": verdict, "stored_at": time.time(), "polarity": _polarity(canonical), "slot": None}
+            if embedding is not None:
+                vector = np.asarray(embedding, dtype=np.float32)
+                norm = float(np.linalg.norm(vector))
+                if norm:
+                    if self._matrix is None:
+                        self._matrix = np.zeros((self.size, vector.shape[0]), dtype=np.float32)
+                    slot = self._free.pop()
+                    self._matrix[slot] = vector / norm
+                    self._slot_keys[slot] = key
+                    entry["slot"] = slot
+            self._entries[key] = entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._slot_keys = [None] * self.size
+            self._free = list(range(self.size - 1, -1, -1))
+
+
+verdict_cache = VerdictCache()
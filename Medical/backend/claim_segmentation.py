@@ -0,0 +1,116 @@
+# Medical/backend/claim_segmentation.py
+"""Splits compound claims into a bounded set of verifiable segments.
+
+Every segment costs an encode and a Weaviate query, so splitting a pasted
+paragraph on each " and " or ", " fanned out into dozens of queries, and it
+broke apart noun phrases like "vitamin C and zinc" along the way. Claims are
+split into sentences first. Within a sentence, clause separators only split
+when both sides are long enough to be claims on their own, which keeps lists
+and "X and Y" phrases together. Near-identical segments are dropped, and at
+most ``MAX_SEGMENTS`` of the most salient segments are kept, in their
+original order:
+
+    segment_claim("Vitamin C and zinc cure colds. Vaccines cause autism!")
+    # ['Vitamin C and zinc cure colds', 'Vaccines cause autism']
+
+Environment variables:
+
+    CLAIM_MAX_SEGMENTS=4          segments verified per claim
+    CLAIM_MIN_SEGMENT_WORDS=3     words each side of a separator needs to split
+"""
+import os
+import re
+from typing import List, Tuple
+
+from claim_canonicalizer import canonicalize, content_words
+from instrumentation import inc
+from misinfo_classifier import contains_potential_misinformation
+
+MAX_SEGMENTS = int(os.environ.get('CLAIM_MAX_SEGMENTS', '4'))
+MIN_SEGMENT_WORDS = int(os.environ.get('CLAIM_MIN_SEGMENT_WORDS', '3'))
+MIN_SEGMENT_CHARS = 10
+DUPLICATE_OVERLAP = 0.8
+
+_ABBREVIATIONS = ('e.g.', 'i.e.', 'etc.', 'vs.', 'dr.', 'mr.', 'mrs.', 'ms.', 'approx.', 'no.')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|[\r\n]+')
+# Captured so the separator can be put back when two pieces are merged again
+_CLAUSE_SEPARATOR = re.compile(
+    r'(\s*;\s*|,\s*(?:and|but|or|while|whereas)\s+|\s+(?:and|but|while|whereas)\s+|,\s+)',
+    re.IGNORECASE
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences without breaking after common abbreviations."""
+    sentences = []
+    pending = ""
+    for piece in _SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {piece}" if pending else piece
+        if not pending.lower().endswith(_ABBREVIATIONS):
+            sentences.append(pending.strip())
+            pending = ""
+    if pending:
+        sentences.append(pending.strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+def split_clauses(sentence: str, min_words: int = MIN_SEGMENT_WORDS) -> List[str]:
+    """Split a sentence at clause separators whose both sides stand alone as claims."""
+    parts = _CLAUSE_SEPARATOR.split(sentence)
+    clauses = []
+    current = parts[0]
+    for separator, piece in zip(parts[1::2], parts[2::2]):
+        # Short sides are list items or halves of an "X and Y" phrase; keep them attached
+        if len(current.split()) >= min_words and len(piece.split()) >= min_words:
+            clauses.append(current)
+            current = piece
+        else:
+            current = current + separator + piece
+    clauses.append(current)
+    return [clause.strip(" ,;.!?") for clause in clauses]
+
+
+def _overlap(first: set, second: set) -> float:
+    if not first or not second:
+        return 1.0 if first == second else 0.0
+    return len(first & second) / min(len(first), len(second))
+
+
+def deduplicate(segments: List[str], threshold: float = DUPLICATE_OVERLAP) -> List[str]:
+    """Drop segments whose content words are (nearly) contained in an earlier segment."""
+    kept: List[Tuple[str, set]] = []
+    for segment in segments:
+        words = set(content_words(canonicalize(segment)))
+        if any(_overlap(words, other) >= threshold for _, other in kept):
+            continue
+        kept.append((segment, words))
+    return [segment for segment, _ in kept]
+
+
+def salience(segment: str) -> float:
+    """Rough informativeness of a segment; known misinformation patterns rank first."""
+    words = set(content_words(canonicalize(segment)))
+    score = min(len(words), 12) + 0.1 * sum(1 for word in words if len(word) > 6)
+    if contains_potential_misinformation(segment)["isLikelyFalse"]:
+        score += 5
+    return score
+
+
+def segment_claim(claim: str, max_segments: int = MAX_SEGMENTS, min_words: int = MIN_SEGMENT_WORDS) -> List[str]:
+    """Sentence- and clause-level segments of a claim, deduplicated and capped by salience."""
+    segments = [
+        clause
+        for sentence in split_sentences(claim)
+        for clause in split_clauses(sentence, min_words)
+        if len(clause) > MIN_SEGMENT_CHARS
+    ]
+    segments = deduplicate(segments)
+    if not segments:
+        stripped = claim.strip()
+        return [stripped] if stripped else []
+    if len(segments) > max_segments:
+        inc("claim_segments_dropped_total", len(segments) - max_segments)
+        # Keep the most salient segments, earlier ones first on ties, then restore reading order
+        ranked = sorted(range(len(segments)), key=lambda i: (-salience(segments[i]), i))[:max_segments]
+        segments = [segments[i] for i in sorted(ranked)]
+    return segments
@@ -0,0 +1,502 @@
+# Medical/backend/fake_weaviate.py
+"""Local Weaviate stand-in for offline benchmarking and load testing.
+
+Implements the subset of Weaviate the backend relies on, backed by an
+in-memory NumPy index:
+
+- GraphQL ``Get`` with ``nearVector`` (optional ``distance``/``certainty``),
+  ``limit``, ``offset``, the ``after`` cursor and ``_additional { id distance certainty }``
+- ``POST /v1/objects`` (``client.data_object.create``)
+- ``POST /v1/batch/objects`` (``client.batch``)
+- ``GET /v1/schema``, ``GET /v1/meta``, ``GET /v1/nodes`` and the readiness probe
+
+Latency and error rates are configurable on the command line or at runtime
+through ``POST /_fake/config`` so the backend's own limits can be measured:
+
+    python fake_weaviate.py --port 8090 --load facts.json --latency-ms 20 --error-rate 0.01
+    WEAVIATE_URL=http://localhost:8090 python app.py
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import argparse
+import threading
+from bisect import bisect_right
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FAKE_WEAVIATE_VERSION = "1.21.2"
+
+
+class FakeWeaviateError(Exception):
+    """Raised for injected failures and malformed requests."""
+
+
+# In-memory vector index
+class VectorIndex:
+    """Append-only cosine index for one Weaviate class."""
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 1024):
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32) if dim else None
+        self._size = 0
+        self.ids: List[str] = []
+        self.objects: List[Dict[str, Any]] = []
+        self._id_order: List[int] = []
+        self._sorted_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def add(self, properties: Dict[str, Any], vector, object_id: Optional[str] = None) -> str:
+        """Insert one object and return its id."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        object_id = object_id or str(uuid.uuid4())
+        with self._lock:
+            if self._vectors is None:
+                self.dim = vector.shape[0]
+                self._vectors = np.zeros((1024, self.dim), dtype=np.float32)
+            if vector.shape[0] != self.dim:
+                raise FakeWeaviateError(f"vector length mismatch: expected {self.dim}, got {vector.shape[0]}")
+            if self._size == self._vectors.shape[0]:
+                grown = np.zeros((self._size * 2, self.dim), dtype=np.float32)
+                grown[:self._size] = self._vectors[:self._size]
+                self._vectors = grown
+            self._vectors[self._size] = vector
+            self.ids.append(object_id)
+            self.objects.append(dict(properties))
+            self._size += 1
+        return object_id
+
+    def search(self, vector, limit: int, offset: int = 0,
+               max_distance: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Return (row, cosine distance) pairs for the nearest objects."""
+        # Snapshot under the lock: add() may be growing the array or filling the next row
+        with self._lock:
+            size = self._size
+            vectors = self._vectors[:size] if size else None
+        if not size or limit <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        distances = 1.0 - vectors @ query
+        wanted = min(size, limit + offset)
+        if wanted < size:
+            top = np.argpartition(distances, wanted - 1)[:wanted]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(distances[top], kind='stable')][offset:]
+        hits = [(int(row), float(distances[row])) for row in top]
+        if max_distance is not None:
+            hits = [hit for hit in hits if hit[1] <= max_distance]
+        return hits
+
+    def scan(self, limit: int, offset: int = 0, after: Optional[str] = None) -> List[Tuple[int, None]]:
+        """Return rows in id order when no vector is given, as Weaviate's object store does.
+
+        ``after`` is the cursor API: rows whose id sorts after the given one.
+        """
+        with self._lock:
+            size = self._size
+            if len(self._id_order) != size:
+                self._id_order = sorted(range(size), key=self.ids.__getitem__)
+                self._sorted_ids = [self.ids[row] for row in self._id_order]
+            order, sorted_ids = self._id_order, self._sorted_ids
+        start = bisect_right(sorted_ids, after) if after is not None else offset
+        return [(row, None) for row in order[start:start + limit]]
+
+
+class FakeWeaviate:
+    """Classes, objects and fault injection shared by the HTTP server and in-process client."""
+
+    def __init__(self, classes: Tuple[str, ...] = ("MedicalFact",), latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.indexes: Dict[str, VectorIndex] = {name: VectorIndex() for name in classes}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "objects_created": 0, "injected_errors": 0}
+
+    def configure(self, latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None,
+                  error_rate: Optional[float] = None) -> Dict[str, float]:
+        """Update fault injection settings and return the active configuration."""
+        if latency_ms is not None:
+            self.latency_ms = float(latency_ms)
+        if jitter_ms is not None:
+            self.jitter_ms = float(jitter_ms)
+        if error_rate is not None:
+            self.error_rate = float(error_rate)
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms, "error_rate": self.error_rate}
+
+    def index(self, class_name: str) -> VectorIndex:
+        """Return the index for a class, creating it on first use."""
+        with self._lock:
+            if class_name not in self.indexes:
+                self.indexes[class_name] = VectorIndex()
+            return self.indexes[class_name]
+
+    def inject_faults(self) -> None:
+        """Sleep for the configured latency and raise for the configured error rate."""
+        if self.latency_ms or self.jitter_ms:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            time.sleep(delay / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            raise FakeWeaviateError("injected failure")
+
+    def add_object(self, class_name: str, properties: Dict[str, Any], vector,
+                   object_id: Optional[str] = None) -> str:
+        """Insert one object into a class."""
+        if vector is None:
+            raise FakeWeaviateError("objects must be created with an explicit vector")
+        object_id = self.index(class_name).add(properties, vector, object_id)
+        self.stats["objects_created"] += 1
+        return object_id
+
+    def get(self, class_name: str, properties: List[str], vector=None, limit: int = 10,
+            offset: int = 0, additional: Tuple[str, ...] = (), max_distance: Optional[float] = None,
+            min_certainty: Optional[float] = None, after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run a Get query and shape the hits like a Weaviate GraphQL response."""
+        self.inject_faults()
+        self.stats["queries"] += 1
+        index = self.index(class_name)
+        if min_certainty is not None:
+            # Weaviate certainty for cosine is 1 - distance / 2
+            certainty_distance = 2 * (1 - min_certainty)
+            max_distance = certainty_distance if max_distance is None else min(max_distance, certainty_distance)
+        if vector is None:
+            hits = index.scan(limit, offset, after)
+        elif after is not None:
+            raise FakeWeaviateError("after cannot be combined with a search")
+        else:
+            hits = index.search(vector, limit, offset, max_distance)
+        results = []
+        for row, distance in hits:
+            stored = index.objects[row]
+            item = {prop: stored.get(prop) for prop in properties}
+            extra = {}
+            if "id" in additional:
+                extra["id"] = index.ids[row]
+            if "distance" in additional and distance is not None:
+                extra["distance"] = distance
+            if "certainty" in additional and distance is not None:
+                extra["certainty"] = 1 - distance / 2
+            if extra:
+                item["_additional"] = extra
+            results.append(item)
+        return results
+
+    def schema(self) -> Dict[str, Any]:
+        """Return a minimal schema listing every known class."""
+        classes = []
+        for name, index in self.indexes.items():
+            properties = sorted({key for obj in index.objects[:100] for key in obj})
+            classes.append({"class": name, "properties": [{"name": p, "dataType": ["text"]} for p in properties]})
+        return {"classes": classes}
+
+    def nodes(self, class_name: Optional[str] = None) -> Dict[str, Any]:
+        """Return a single healthy node with one shard per class, like ``GET /v1/nodes``."""
+        shards = [{"name": f"{name.lower()}_shard", "class": name, "objectCount": len(index)}
+                  for name, index in self.indexes.items() if class_name in (None, name)]
+        # No batchStats/ratePerSecond, so weaviate-client turns dynamic batch sizing off as for Weaviate < 1.22
+        return {"nodes": [{
+            "name": "fake-weaviate",
+            "status": "HEALTHY",
+            "version": FAKE_WEAVIATE_VERSION,
+            "gitHash": "fake",
+            "stats": {"shardCount": len(shards), "objectCount": sum(shard["objectCount"] for shard in shards)},
+            "shards": shards
+        }]}
+
+
+# GraphQL subset
+def _matching_brace(text: str, start: int) -> int:
+    """Return the index of the bracket that closes the one at text[start]."""
+    pairs = {'{': '}', '(': ')', '[': ']'}
+    opening = text[start]
+    closing = pairs[opening]
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == opening:
+            depth += 1
+        elif text[i] == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+    raise FakeWeaviateError("unbalanced GraphQL query")
+
+
+def parse_get_query(query: str) -> Dict[str, Any]:
+    """Parse the ``{Get{Class(nearVector: ... limit: n){props _additional{...}}}}`` subset."""
+    match = re.search(r'Get\s*{\s*(\w+)\s*', query)
+    if not match:
+        raise FakeWeaviateError("only Get queries are supported")
+    parsed = {"class_name": match.group(1), "vector": None, "limit": 10, "offset": 0,
+              "max_distance": None, "min_certainty": None, "after": None}
+    position = match.end()
+    if query[position] == '(':
+        close = _matching_brace(query, position)
+        arguments = query[position + 1:close]
+        position = close + 1
+        near = re.search(r'nearVector\s*:\s*{', arguments)
+        if near:
+            near_body = arguments[near.end() - 1:_matching_brace(arguments, near.end() - 1) + 1]
+            vector_match = re.search(r'vector\s*:\s*\[([^\]]*)\]', near_body)
+            if vector_match:
+                parsed["vector"] = np.array(
+                    [float(v) for v in vector_match.group(1).replace(',', ' ').split()], dtype=np.float32
+                )
+            distance_match = re.search(r'distance\s*:\s*([-\d.eE+]+)', near_body)
+            if distance_match:
+                parsed["max_distance"] = float(distance_match.group(1))
+            certainty_match = re.search(r'certainty\s*:\s*([-\d.eE+]+)', near_body)
+            if certainty_match:
+                parsed["min_certainty"] = float(certainty_match.group(1))
+            arguments = arguments[:near.start()] + arguments[near.end() - 1 + len(near_body):]
+        limit_match = re.search(r'\blimit\s*:\s*(\d+)', arguments)
+        if limit_match:
+            parsed["limit"] = int(limit_match.group(1))
+        offset_match = re.search(r'\boffset\s*:\s*(\d+)', arguments)
+        if offset_match:
+            parsed["offset"] = int(offset_match.group(1))
+        after_match = re.search(r'\bafter\s*:\s*"([^"]*)"', arguments)
+        if after_match:
+            parsed["after"] = after_match.group(1)
+    selection_start = query.index('{', position)
+    selection = query[selection_start + 1:_matching_brace(query, selection_start)]
+    additional = ()
+    additional_match = re.search(r'_additional\s*{([^}]*)}', selection)
+    if additional_match:
+        additional = tuple(additional_match.group(1).split())
+        selection = selection[:additional_match.start()] + selection[additional_match.end():]
+    parsed["properties"] = selection.split()
+    parsed["additional"] = additional
+    return parsed
+
+
+# HTTP server
+class _Handler(BaseHTTPRequestHandler):
+    """Routes the REST and GraphQL endpoints used by weaviate-client v3."""
+
+    server_version = "FakeWeaviate/" + FAKE_WEAVIATE_VERSION
+    fake: FakeWeaviate = None
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status: int, payload: Any = None) -> None:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path in ('/v1/.well-known/ready', '/v1/.well-known/live'):
+            self._send(200)
+        elif path == '/v1/meta':
+            self._send(200, {"hostname": "http://[::]:8080", "version": FAKE_WEAVIATE_VERSION, "modules": {}})
+        elif path == '/v1/schema':
+            self._send(200, self.fake.schema())
+        elif path == '/v1/nodes' or path.startswith('/v1/nodes/'):
+            self._send(200, self.fake.nodes(path[len('/v1/nodes/'):] or None))
+        elif path == '/_fake/stats':
+            counts = {name: len(index) for name, index in self.fake.indexes.items()}
+            self._send(200, {**self.fake.stats, "objects": counts, "config": self.fake.configure()})
+        else:
+            self._send(404, {"error": [{"message": f"no route for {path}"}]})
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        try:
+            body = self._read_json()
+            if path == '/v1/graphql':
+                query = parse_get_query(body.get("query", ""))
+                class_name = query.pop("class_name")
+                results = self.fake.get(class_name, **query)
+                self._send(200, {"data": {"Get": {class_name: results}}})
+            elif path == '/v1/objects':
+                self.fake.inject_faults()
+                object_id = self.fake.add_object(body["class"], body.get("properties", {}),
+                                                 body.get("vector"), body.get("id"))
+                self._send(200, {**body, "id": object_id, "vector": None})
+            elif path == '/v1/batch/objects':
+                self.fake.inject_faults()
+                results = []
+                for obj in body.get("objects", []):
+                    try:
+                        object_id = self.fake.add_object(obj["class"], obj.get("properties", {}),
+                                                         obj.get("vector"), obj.get("id"))
+                        results.append({**obj, "id": object_id, "vector": None, "result": {}})
+                    except FakeWeaviateError as e:
+                        results.append({**obj, "vector": None, "result": {"errors": {"error": [{"message": str(e)}]}}})
+                self._send(200, results)
+            elif path == '/v1/schema':
+                self.fake.index(body["class"])
+                self._send(200, body)
+            elif path == '/_fake/config':
+                self._send(200, self.fake.configure(**body))
+            else:
+                self._send(404, {"error": [{"message": f"no route for {path}"}]})
+        except FakeWeaviateError as e:
+            self._send(503, {"error": [{"message": str(e)}]})
+        except (KeyError, ValueError, TypeError) as e:
+            self._send(422, {"error": [{"message": f"invalid request: {e}"}]})
+
+
+def start_server(fake: FakeWeaviate, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Serve a FakeWeaviate on a background thread and return the server."""
+    handler = type('FakeWeaviateHandler', (_Handler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-weaviate", daemon=True)
+    thread.start()
+    logger.info("Fake Weaviate listening on http://%s:%s", *server.server_address[:2])
+    return server
+
+
+# In-process client
+class _GetQuery:
+    """Chainable stand-in for the weaviate-client v3 GetBuilder."""
+
+    def __init__(self, fake: FakeWeaviate, class_name: str, properties: List[str]):
+        self._fake = fake
+        self._class_name = class_name
+        self._properties = list(properties)
+        self._vector = None
+        self._limit = 10
+        self._offset = 0
+        self._max_distance = None
+        self._min_certainty = None
+        self._after = None
+        self._additional: Tuple[str, ...] = ()
+
+    def with_near_vector(self, content: Dict[str, Any]):
+        self._vector = content["vector"]
+        self._max_distance = content.get("distance")
+        self._min_certainty = content.get("certainty")
+        return self
+
+    def with_limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def with_offset(self, offset: int):
+        self._offset = offset
+        return self
+
+    def with_after(self, after_uuid: str):
+        self._after = str(after_uuid)
+        return self
+
+    def with_additional(self, properties):
+        if isinstance(properties, str):
+            properties = [properties]
+        self._additional = tuple(self._additional) + tuple(properties)
+        return self
+
+    def do(self) -> Dict[str, Any]:
+        try:
+            results = self._fake.get(
+                self._class_name, self._properties, self._vector, self._limit, self._offset,
+                self._additional, self._max_distance, self._min_certainty, self._after
+            )
+        except FakeWeaviateError as e:
+            return {"errors": [{"message": str(e)}]}
+        return {"data": {"Get": {self._class_name: results}}}
+
+
+class FakeWeaviateClient:
+    """Duck-typed ``weaviate.Client`` that talks to a FakeWeaviate without HTTP."""
+
+    def __init__(self, fake: Optional[FakeWeaviate] = None):
+        self.fake = fake or FakeWeaviate()
+        self.query = SimpleNamespace(get=lambda class_name, properties: _GetQuery(self.fake, class_name, properties))
+        self.data_object = SimpleNamespace(create=self._create)
+        self.schema = SimpleNamespace(get=self.fake.schema)
+
+    def _create(self, data_object: Dict[str, Any], class_name: str, uuid: Optional[str] = None,
+                vector=None) -> str:
+        self.fake.inject_faults()
+        return self.fake.add_object(class_name, data_object, vector, uuid)
+
+
+def load_objects(fake: FakeWeaviate, objects: List[Dict[str, Any]], class_name: str = "MedicalFact",
+                 vectors=None, encoder=None, text_fields: Tuple[str, ...] = ("fact",)) -> int:
+    """Bulk load objects, embedding them with encoder when vectors are not supplied."""
+    if vectors is None:
+        vectors = [obj.pop("vector", None) for obj in objects]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            if encoder is None:
+                raise FakeWeaviateError(f"{len(missing)} objects have no vector and no encoder was given")
+            texts = [" ".join(str(objects[i].get(field, "")) for field in text_fields) for i in missing]
+            encoded = encoder.encode(texts, show_progress_bar=False, batch_size=256)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+    for obj, vector in zip(objects, vectors):
+        fake.add_object(class_name, obj, vector)
+    return len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Weaviate stand-in.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--load', help="JSON list of objects (with optional 'vector') to preload")
+    parser.add_argument('--class-name', default='MedicalFact')
+    parser.add_argument('--text-fields', nargs='+', default=['fact'],
+                        help="Fields embedded with all-MiniLM-L6-v2 for objects without a vector")
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    fake = FakeWeaviate(classes=(args.class_name,), latency_ms=args.latency_ms,
+                        jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed)
+    if args.load:
+        with open(args.load) as f:
+            objects = json.load(f)
+        encoder = None
+        if any("vector" not in obj for obj in objects):
+            from sentence_transformers import SentenceTransformer
+            encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        count = load_objects(fake, objects, args.class_name, encoder=encoder, text_fields=tuple(args.text_fields))
+        logger.info("Loaded %s objects into %s", count, args.class_name)
+
+    server = start_server(fake, args.host, args.port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,10 @@
 import praw
 import os
-import json
 import datetime
 import time
 from typing import List, Dict, Any, Optional
+from ingestion_pipeline import stream_posts, TopPosts
+from post_store import get_store
 
 # Configuration for the Reddit PRAW API
 def initialize_reddit():
@@ -35,15 +36,18 @@ def initialize_reddit():
         return None
 
 # Function to fetch posts related to health misinformation from Reddit
-def fetch_health_misinformation_posts() -> List[Dict[str, Any]]:
-    """Fetch posts related to health misinformation from Reddit."""
+def fetch_health_misinformation_posts(fallback: bool = True) -> List[Dict[str, Any]]:
+    """Fetch posts related to health misinformation from Reddit.
+
+    When the crawl fails or finds nothing, returns the fallback posts, or an empty list with fallback=False.
+    """
     try:
         # Initialize Reddit API
         reddit = initialize_reddit()
         
         # If initialization failed, use fallback data
         if not reddit:
-            return get_fallback_posts()
+            return get_fallback_posts() if fallback else []
 
         # Define subreddits likely to contain health discussions (both mainstream and alternative)
         subreddits = [
@@ -62,233 +66,59 @@ def fetch_health_misinformation_posts() -> List[Dict[str, Any]]:
             'covid conspiracy', 'alternative medicine'
         ]
 
-        # Prepare search parameters for Reddit API
-        all_posts = []
         network_error_occurred = False
         
-        # Modified search approach: Run one search per subreddit with all keywords combined
-        for subreddit_name in subreddits:
-            # Break early if we've had network errors to avoid more failed requests
-            if network_error_occurred:
-                break
-            
-            # Combine search terms with OR operator for Reddit's search syntax
-            combined_terms = ' OR '.join(search_terms)
-            
-            try:
-                subreddit = reddit.subreddit(subreddit_name)
-                # Use PRAW's search functionality
-                search_results = subreddit.search(
-                    query=combined_terms, 
-                    sort='relevance', 
-                    time_filter='week', 
-                    limit=20
-                )
+        def crawl():
+            """Yield raw search results; runs on the ingestion producer thread."""
+            nonlocal network_error_occurred
+            # Modified search approach: Run one search per subreddit with all keywords combined
+            for subreddit_name in subreddits:
+                # Break early if we've had network errors to avoid more failed requests
+                if network_error_occurred:
+                    break
+                
+                # Combine search terms with OR operator for Reddit's search syntax
+                combined_terms = ' OR '.join(search_terms)
                 
-                # Process search results
-                for post in search_results:
-                    if not post.stickied:  # Skip stickied posts
-                        all_posts.append(post)
-            except Exception as e:
-                print(f"Error searching in r/{subreddit_name}: {e}")
-                # Check if it's a network error (connection-related exceptions)
-                if isinstance(e, (praw.exceptions.PRAWException, 
-                                   ConnectionError, 
-                                   TimeoutError)):
-                    print('Network error detected. Using fallback data.')
-                    network_error_occurred = True
-                # Continue with other subreddits if it's not a network error
-                continue
+                try:
+                    subreddit = reddit.subreddit(subreddit_name)
+                    # Use PRAW's search functionality
+                    search_results = subreddit.search(
+                        query=combined_terms, 
+                        sort='relevance', 
+                        time_filter='week', 
+                        limit=20
+                    )
+                    
+                    # Hand results to the pipeline as they arrive
+                    yield from search_results
+                except Exception as e:
+                    print(f"Error searching in r/{subreddit_name}: {e}")
+                    # Check if it's a network error (connection-related exceptions)
+                    if isinstance(e, (praw.exceptions.PRAWException, 
+                                       ConnectionError, 
+                                       TimeoutError)):
+                        print('Network error detected. Using fallback data.')
+                        network_error_occurred = True
+                    # Continue with other subreddits if it's not a network error
+                    continue
         
-        # If we have network errors or no posts found, use fallback data
-        if network_error_occurred or len(all_posts) == 0:
-            return get_fallback_posts()
-
-        # Remove duplicates by post ID
-        unique_posts = []
-        seen_ids = set()
-        for post in all_posts:
-            if post.id not in seen_ids:
-                unique_posts.append(post)
-                seen_ids.add(post.id)
+        # fetch -> dedupe -> classify -> merge -> score, keeping only the top 10 most relevant posts
+        top = TopPosts(10)
+        for post in stream_posts(crawl()):
+            top.push(post)
+        top_posts = top.items()
         
-        # Check if we found any posts
-        if len(unique_posts) == 0:
+        # If we have network errors or no posts found, use fallback data
+        if network_error_occurred or not top_posts:
             print("No posts found, using default values")
-            return get_fallback_posts()
-        
-        # Process the posts to match your required format
-        processed_posts = []
-        for post in unique_posts:
-            # Get post content
-            content = post.selftext if hasattr(post, 'selftext') else ""
-            
-            # Run these posts through our misinformation detection logic
-            potential_misinformation = contains_potential_misinformation(post.title + " " + content)
-            
-            # Calculate an engagement score to prioritize higher engagement posts
-            engagement_score = (post.score or 0) + \
-                              (post.num_comments or 0) * 2 + \
-                              (getattr(post, 'total_awards_received', 0) or 0) * 1.5
-            
-            processed_posts.append({
-                "username": post.author.name if post.author else "Unknown",
-                "subreddit": f"r/{post.subreddit.display_name}" if hasattr(post, 'subreddit') else "r/unknown",
-                "title": post.title,
-                "content": content,
-                "score": post.score,
-                "comments": post.num_comments,
-                "awards": getattr(post, 'total_awards_received', 0),
-                "engagementScore": engagement_score,
-                "permalink": post.permalink,
-                "isFalse": potential_misinformation["isLikelyFalse"],
-                "category": potential_misinformation.get("category", "General Health"),
-                "evidence": potential_misinformation["evidence"],
-                "created_at": datetime.datetime.fromtimestamp(post.created_utc).isoformat()
-            })
-        
-        # Sort posts by whether they contain misinformation and then by engagement score
-        processed_posts.sort(
-            key=lambda x: (-1 if x["isFalse"] else 0, -x["engagementScore"])
-        )
-        
-        # Limit to the top 10 most relevant posts
-        top_posts = processed_posts[:10]
+            return get_fallback_posts() if fallback else []
         
         return top_posts
     except Exception as e:
         print(f'Error fetching Reddit posts: {e}')
         # Return fallback data in case of API failure
-        return get_fallback_posts()
-
-# Comprehensive misinformation detection logic for medical topics
-def contains_potential_misinformation(text: str) -> Dict[str, Any]:
-    """Detect potential misinformation in text related to health topics."""
-    # Categorized list of medical misinformation markers with evidence-based rebuttals
-    misinformation_patterns = [
-        # Cancer misinformation
-        { 
-            "category": "Cancer", 
-            "terms": ['cure cancer', 'cures cancer', 'cancer cure', 'fight cancer naturally', 'alternative cancer', 'cancer treatment they'],
-            "evidence": 'Claims of simple cancer cures contradict established medical understanding that cancer is a complex group of diseases requiring various evidence-based treatments. No single remedy, food, or supplement has been proven to cure all cancers.'
-        },
-        
-        # Vaccine misinformation
-        {
-            "category": "Vaccines",
-            "terms": ['vaccine injury', 'vaccine damaged', 'vaccine danger', 'vaccines cause', 'microchip', '5g', 'government track', 'vaccine autism', 'vaccine mercury', 'heavy metals'],
-            "evidence": 'Vaccines undergo rigorous safety testing and are continuously monitored. Claims linking vaccines to autism have been thoroughly debunked by numerous large-scale studies. Modern vaccines do not contain dangerous levels of mercury or microchips for tracking.'
-        },
-        
-        # Body detox and cleansing myths
-        {
-            "category": "Detox",
-            "terms": ['detox', 'cleanse', 'toxin', 'flush toxins', 'body cleanse', 'clean your', 'rid your body', 'draw out toxins'],
-            "evidence": 'The concept of "detoxing" as marketed in popular health trends is not medically recognized. The human body has sophisticated detoxification systems through the liver, kidneys, and other organs that efficiently process and eliminate waste.'
-        },
-        
-        # pH/alkaline misinformation
-        {
-            "category": "Alkaline Treatments",
-            "terms": ['alkaline', 'alkalize', 'ph balance', 'acid environment', 'acidic body', 'alkaline diet', 'ph diet'],
-            "evidence": 'Blood pH is tightly regulated by the body within a narrow range (7.35-7.45). Consuming alkaline foods or drinks cannot significantly change blood pH, and disease states like cancer are not simply caused by body acidity.'
-        },
-        
-        # Conspiracy theories
-        {
-            "category": "Medical Conspiracies",
-            "terms": ['big pharma', 'what doctors don\'t', 'don\'t want you to know', 'suppressed cure', 'suppressed treatment', 'government hiding', 'medical establishment', 'doctors won\'t tell', 'conspiracy'],
-            "evidence": 'While pharmaceutical companies are profit-driven businesses, conspiracy theories about hiding cures contradict how scientific research, peer review, and regulatory approval work internationally with thousands of independent researchers.'
-        },
-        
-        # Miracle cures and oversimplified treatments
-        {
-            "category": "Miracle Cures",
-            "terms": ['miracle', 'cure all', 'magical', 'ancient secret', 'secret cure', 'one simple', 'this one trick', 'doctors hate', 'breakthrough they'],
-            "evidence": 'Claims of "miracle cures" typically lack scientific evidence and exploit hope among vulnerable populations. Effective medical treatments undergo rigorous testing and peer review before being adopted into clinical practice.'
-        },
-        
-        # Natural remedies overselling
-        {
-            "category": "Natural Remedy Exaggeration",
-            "terms": ['natural cure', 'heal yourself', 'natural treatment', 'essential oil cure', 'herbal cure', 'ancient remedy', 'superfood cure'],
-            "evidence": 'While some natural substances have legitimate medicinal properties that have led to pharmaceuticals, claims of "natural cures" for serious conditions often lack scientific support and proper dosage control.'
-        },
-        
-        # COVID-19 misinformation
-        {
-            "category": "COVID-19",
-            "terms": ['covid hoax', 'plandemic', 'covid conspiracy', 'coronavirus fake', 'fake virus', 'covid cure', 'covid prevention', 'prevents covid'],
-            "evidence": 'COVID-19 is a well-documented viral disease caused by SARS-CoV-2. The virus has been isolated, sequenced, and studied extensively by thousands of independent researchers worldwide.'
-        },
-        
-        # Alternative medicine exaggeration
-        {
-            "category": "Alternative Medicine Claims",
-            "terms": ['homeopathy cure', 'alternative medicine cure', 'acupuncture cure', 'energy healing', 'quantum healing', 'vibrational medicine', 'frequency healing'],
-            "evidence": 'While complementary approaches may offer symptom relief and improved quality of life, claims of curing serious diseases often lack rigorous scientific evidence. Many complementary therapies have not been subjected to the same level of scientific scrutiny as conventional treatments.'
-        },
-        
-        # Specific supplements overstatements
-        {
-            "category": "Supplement Claims",
-            "terms": ['vitamin c cure', 'megadose', 'vitamin d cure', 'zinc cure', 'supplement cure', 'boost immune system instantly', 'supercharge immunity'],
-            "evidence": 'While proper nutrition is important for immune function, no supplement has been proven to prevent or cure serious diseases on its own. Extremely high doses of some vitamins and minerals can cause adverse effects.'
-        }
-    ]
-    
-    # Convert text to lowercase for case-insensitive matching
-    lower_text = text.lower()
-    
-    # Check if the text contains any misinformation patterns
-    for pattern in misinformation_patterns:
-        for term in pattern["terms"]:
-            if term in lower_text:
-                return {
-                    "isLikelyFalse": True,
-                    "category": pattern["category"],
-                    "evidence": pattern["evidence"]
-                }
-    
-    # Secondary check for specific combinations of words that might indicate misinformation
-    word_pairs = [
-        {"pair": ['cure', 'disease'], "distance": 10},
-        {"pair": ['prevent', 'disease'], "distance": 10},
-        {"pair": ['secret', 'treatment'], "distance": 15},
-        {"pair": ['natural', 'cure'], "distance": 10},
-        {"pair": ['alternative', 'treatment'], "distance": 10}
-    ]
-    
-    words = lower_text.split()
-    
-    for pair_info in word_pairs:
-        pair = pair_info["pair"]
-        distance = pair_info["distance"]
-        first_word_indices = []
-        
-        # Find all occurrences of the first word
-        for index, word in enumerate(words):
-            if pair[0] in word:
-                first_word_indices.append(index)
-        
-        # For each occurrence of first word, check if second word is within distance
-        for index in first_word_indices:
-            start_range = max(0, index - distance)
-            end_range = min(len(words) - 1, index + distance)
-            
-            for i in range(start_range, end_range + 1):
-                if pair[1] in words[i]:
-                    return {
-                        "isLikelyFalse": True,
-                        "category": "Health Claims",
-                        "evidence": "This post contains language patterns commonly associated with medical misinformation. Health claims about cures, treatments, or prevention methods should be verified with credible medical sources."
-                    }
-    
-    # If no patterns matched, it's possibly not misinformation
-    return {
-        "isLikelyFalse": False,
-        "evidence": "This post doesn't contain common misinformation markers, but always verify health information with credible medical sources and healthcare professionals."
-    }
+        return get_fallback_posts() if fallback else []
 
 # Comprehensive fallback data covering different medical misinformation categories for Reddit
 def get_fallback_posts() -> List[Dict[str, Any]]:
@@ -449,48 +279,33 @@ def get_fallback_posts() -> List[Dict[str, Any]]:
         }
     ]
 
-# Function to save posts to a JSON file with timestamp
-def save_posts_to_file(posts, filename='health_misinfo_posts.json'):
-    """Save posts to a JSON file with timestamp."""
-    posts_data = {
-        "timestamp": time.time(),
-        "data": posts
-    }
-    with open(filename, 'w') as f:
-        json.dump(posts_data, f)
+# Posts live in the shared SQLite post store; the tracker logs its fetches as "tracker"
+TRACKER_FETCH = "tracker"
+TRACKER_LIMIT = 10
 
-# Function to get posts from a JSON file
-def get_posts_from_file(filename='health_misinfo_posts.json'):
-    """Get posts from a JSON file."""
-    try:
-        with open(filename, 'r') as f:
-            posts_data = json.load(f)
-        return posts_data
-    except (FileNotFoundError, json.JSONDecodeError):
-        return None
+def save_posts(posts, store=None):
+    """Store posts and record the tracker's fetch time."""
+    (store or get_store()).save_posts(posts, window=TRACKER_FETCH)
 
 # Function to check if posts need to be refreshed (older than 12 hours)
-def should_refresh_posts(filename='health_misinfo_posts.json'):
+def should_refresh_posts(store=None):
     """Check if posts need to be refreshed (older than 12 hours)."""
-    posts_data = get_posts_from_file(filename)
-    if not posts_data:
-        return True
-    
     twelve_hours_in_seconds = 12 * 60 * 60
-    current_time = time.time()
-    
-    return current_time - posts_data["timestamp"] > twelve_hours_in_seconds
+    return not (store or get_store()).is_fresh(TRACKER_FETCH, twelve_hours_in_seconds)
 
 # Main function to get health misinformation posts
-def get_health_misinfo_posts(filename='health_misinfo_posts.json'):
+def get_health_misinfo_posts(store=None):
     """Main function to get health misinformation posts."""
-    if should_refresh_posts(filename):
-        posts = fetch_health_misinformation_posts()
-        save_posts_to_file(posts, filename)
-        return posts
+    store = store or get_store()
+    if should_refresh_posts(store):
+        posts = fetch_health_misinformation_posts(fallback=False)
+        if posts:
+            save_posts(posts, store)
+            return posts
+        # Made-up fallback posts are never stored; serve the last real crawl while there is one
+        return store.fetched_posts(TRACKER_FETCH, limit=TRACKER_LIMIT) or get_fallback_posts()
     else:
-        posts_data = get_posts_from_file(filename)
-        return posts_data["data"]
+        return store.fetched_posts(TRACKER_FETCH, limit=TRACKER_LIMIT)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+# Medical/backend/http_cache.py
+"""Conditional GETs and precompressed bodies for the read-only JSON endpoints.
+
+``@cached_response`` wraps a Flask view. The post store's generation is the
+latest time anything was written to it. A response is cached per
+(path + query string, generation) together with its gzip and, if the
+``brotli`` package is installed, brotli encodings. The strong ETag is
+derived from the same key, so while the generation is unchanged:
+
+    If-None-Match matches   -> 304 with no body, the view is not called
+    otherwise               -> the cached body in the negotiated encoding
+
+``fresh`` reports whether the underlying data is still current. When it
+returns False the view runs, so it can refetch from Reddit, and its
+response is sent uncached. Endpoints
+whose body changes without a store write, like /api/metrics, set
+``volatile=True``. The view then always runs, and its ETag is a hash of
+the body, which still spares the client the transfer.
+
+    @app.route('/api/stats')
+    @cached_response(generation=post_store.generation, max_age=lambda: 3600)
+    def get_stats(): ...
+
+Environment variables:
+
+    HTTP_CACHE_ENTRIES=256       cached responses kept (least recently used evicted)
+    HTTP_CACHE_MIN_COMPRESS=512  bodies smaller than this many bytes are sent uncompressed
+"""
+import os
+import gzip
+import hashlib
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from flask import Response, request
+
+from instrumentation import cache_event, inc
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = int(os.environ.get('HTTP_CACHE_ENTRIES', '256'))
+MIN_COMPRESS = int(os.environ.get('HTTP_CACHE_MIN_COMPRESS', '512'))
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+class CachedBody:
+    """One response body with its ETag and precompressed encodings."""
+
+    __slots__ = ("etag", "mimetype", "bodies")
+
+    def __init__(self, etag: str, body: bytes, mimetype: str):
+        self.etag = etag
+        self.mimetype = mimetype
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli:
+                self.bodies["br"] = brotli.compress(body, quality=5)
+
+
+class ResponseCache:
+    """Bounded LRU of CachedBody entries keyed by request and generation."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, entry: CachedBody) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("\n".join(str(part) for part in parts).encode('utf-8'), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(etag: str) -> bool:
+    """Whether the request's If-None-Match lists this ETag (or *)."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return "*" in candidates or etag in candidates
+
+
+def negotiate_encoding(available: Dict[str, bytes]) -> str:
+    """Best encoding of the ones available that the client accepts."""
+    accepted = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _cache_control(max_age: float) -> str:
+    if max_age <= 0:
+        return "no-cache"
+    return f"public, max-age={int(max_age)}, must-revalidate"
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    response = Response(status=304)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def _send(entry: CachedBody, cache_control: str) -> Response:
+    encoding = negotiate_encoding(entry.bodies)
+    response = Response(entry.bodies[encoding], mimetype=entry.mimetype)
+    if encoding != "identity":
+        response.headers['Content-Encoding'] = encoding
+    response.headers['ETag'] = entry.etag
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def cached_response(generation: Callable[[], Any] = lambda: None, max_age: Callable[[], float] = lambda: 0,
+                    fresh: Callable[[], bool] = lambda: True, volatile: bool = False):
+    """Serve a GET view with ETags, 304s, Cache-Control and cached compressed bodies.
+
+    Only 200 responses are cached; errors pass through untouched.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            endpoint = request.endpoint or view.__name__
+            key = None
+            if not volatile:
+                try:
+                    # Read once, before the view: a write while the body is built must not file a
+                    # stale body under the newer generation
+                    if fresh():
+                        key = (request.full_path, generation())
+                except Exception as e:
+                    logger.warning(f"HTTP cache bypassed for {endpoint}: {e}")
+
+            if key is not None:
+                cache_control = _cache_control(max_age())
+                etag = make_etag(*key)
+                if etag_matches(etag):
+                    inc("http_not_modified_total", endpoint=endpoint)
+                    return _not_modified(etag, cache_control)
+                entry = response_cache.get(key)
+                cache_event("http_response", hit=entry is not None)
+                if entry is not None:
+                    return _send(entry, cache_control)
+
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data()
+            # Read after the view, which may have refreshed the data
+            cache_control = _cache_control(max_age())
+            if volatile:
+                # Tag by content so revalidation still skips the transfer
+                etag = make_etag(request.full_path, hashlib.blake2b(body, digest_size=16).hexdigest())
+                if etag_matches(etag):
+                    inc("http_not_modified_total", endpoint=endpoint)
+                    return _not_modified(etag, cache_control)
+                entry = CachedBody(etag, body, response.mimetype)
+            elif key is not None:
+                entry = CachedBody(make_etag(*key), body, response.mimetype)
+                response_cache.put(key, entry)
+            else:
+                # Data was stale (the view refreshed it) or the generation unreadable: no key to file it under
+                response.headers['Cache-Control'] = cache_control
+                return response
+            return _send(entry, cache_control)
+        return wrapper
+    return decorator
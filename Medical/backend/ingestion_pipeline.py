@@ -0,0 +1,454 @@
+# Medical/backend/ingestion_pipeline.py
+"""Streaming ingestion of Reddit submissions as composable generator stages.
+
+    fetch -> filter -> dedupe -> cluster -> classify -> merge -> score
+
+    adapted_submissions    listing-only field access (see submission_adapter)
+                           and the engagement filter, before any other work
+    unique_submissions     drops repeated submission ids
+    submission_records     plain, picklable records of the fields used below
+    cluster_records        marks crossposts and reposts as copies of an
+                           earlier record, on title + body
+    classified_posts       producer thread + classifier process pool (below),
+                           then the semantic pass on each finished batch;
+                           only cluster representatives are classified
+    merge_near_duplicates  folds each copy into its representative post
+    engaged                minimum engagement filter on merged clusters
+    TopPosts               bounded heap of the best N by (isFalse, engagementScore)
+
+Nothing materializes the whole crawl. Memory is O(N) for the heap plus
+the bounded queue, the in-flight batches and the merge window, and
+callers see posts while the crawl is still running:
+
+    top = TopPosts(10)
+    for post in stream_posts(crawl(), min_engagement_score=50, model=sentence_model):
+        top.push(post)
+    top.items()
+
+Classification runs in two stages joined by a bounded queue. A producer
+thread iterates the crawl (network-bound), turning each submission into
+a record and clustering it. A ProcessPoolExecutor then does keyword
+classification, engagement scoring and post dict construction, with
+workers that keep the compiled rule table warm. The producer blocks
+once INGEST_QUEUE_SIZE batches are waiting, and results come back in
+crawl order. The semantic pass runs in the calling process, because the
+sentence model already encodes on every core.
+
+The first copy of a near-duplicate cluster represents it and is the only
+one classified. Later copies add their engagement to it and are not
+emitted themselves. The representative is then emitted again with its
+grown score, so consumers treat a post seen twice as an update. Only the INGEST_DEDUP_WINDOW most
+recent clusters are kept, with their signatures, so the merge state is
+bounded too. A copy of an older cluster starts a new one and is emitted
+as its representative. Clusters never merge with each other once both
+exist, so an emitted representative is never orphaned. Copies below the
+engagement minimum never reach the merge stage.
+
+Environment variables:
+
+    INGEST_WORKERS=<cpu count>   classifier processes; 1 classifies inline
+    INGEST_QUEUE_SIZE=8          batches buffered between the producer and the classifiers
+    INGEST_BATCH_SIZE=25         submissions per work unit
+    INGEST_DEDUP_WINDOW=2000     recent clusters that near-duplicates are merged into
+"""
+import os
+import heapq
+import queue
+import atexit
+import logging
+import datetime
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set
+
+from misinfo_classifier import contains_potential_misinformation, confidence_fields, get_rules
+from semantic_classifier import annotate_posts
+from near_duplicates import StreamingDuplicateIndex
+from instrumentation import inc, timed
+from submission_adapter import SubmissionAdapter, CrawlStats
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.environ.get('INGEST_WORKERS', str(os.cpu_count() or 1)))
+QUEUE_SIZE = int(os.environ.get('INGEST_QUEUE_SIZE', '8'))
+BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '25'))
+DEDUP_WINDOW = int(os.environ.get('INGEST_DEDUP_WINDOW', '2000'))
+
+_DONE = object()
+
+
+def submission_record(post: SubmissionAdapter) -> Dict[str, Any]:
+    """Plain-dict copy of the submission fields the classifiers need."""
+    return {
+        "id": post.id,
+        "title": post.title,
+        "content": post.selftext,
+        "score": post.score,
+        "comments": post.num_comments,
+        "awards": post.total_awards_received,
+        "username": post.author_name,
+        "subreddit": post.subreddit_name,
+        "permalink": post.permalink,
+        "created_utc": post.created_utc
+    }
+
+
+def record_engagement(record: Dict[str, Any]) -> float:
+    return record["score"] + record["comments"] * 2 + record["awards"] * 1.5
+
+
+def classify_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker: keyword-classify and score submission records into post dicts; copies pass through as records."""
+    posts = []
+    for record in records:
+        if record.get("_duplicate"):
+            posts.append(record)
+            continue
+        try:
+            potential_misinformation = contains_potential_misinformation(record["title"] + " " + record["content"])
+            post = {
+                "username": record["username"],
+                "subreddit": record["subreddit"],
+                "title": record["title"],
+                "content": record["content"],
+                "score": record["score"],
+                "comments": record["comments"],
+                "awards": record["awards"],
+                "engagementScore": record_engagement(record),
+                "permalink": record["permalink"],
+                "isFalse": potential_misinformation["isLikelyFalse"],
+                "category": potential_misinformation.get("category", "General Health"),
+                "evidence": potential_misinformation["evidence"],
+                "created_at": datetime.datetime.fromtimestamp(record["created_utc"]).isoformat(),
+                "labels": list(potential_misinformation["labels"]),
+                **confidence_fields(potential_misinformation)
+            }
+        except Exception as e:
+            # One bad record must not fail the whole batch (and with it the pool)
+            logger.error(f"Error processing post {record.get('title', 'unknown')}: {e}")
+            continue
+        if "_cluster" in record:
+            post["_cluster"] = record["_cluster"]
+        posts.append(post)
+    return posts
+
+
+def _init_worker() -> None:
+    # Compile the rule table once per worker instead of on its first batch
+    get_rules()
+
+
+def _ping(_: int) -> None:
+    pass
+
+
+# Classifier pool (started once and reused by every crawl)
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers: int = WORKERS) -> Optional[ProcessPoolExecutor]:
+    """Shared warm process pool; None when classification runs inline."""
+    global _executor, _executor_workers
+    if workers <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+                # Start every worker now, before a producer thread exists to be forked mid-operation
+                list(executor.map(_ping, range(workers)))
+            except Exception as e:
+                logger.error(f"Classifier pool unavailable, classifying inline: {e}")
+                return None
+            _executor, _executor_workers = executor, workers
+            logger.info(f"Started {workers} classifier worker processes")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+atexit.register(shutdown_executor)
+
+
+class IngestionPipeline:
+    """Producer thread feeding a bounded queue that a classifier process pool drains."""
+
+    def __init__(self, workers: int = WORKERS, queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+    def _produce(self, submissions: Iterable[Any], batches: queue.Queue, failure: List[BaseException],
+                 stop: threading.Event) -> None:
+        batch = []
+        try:
+            for post in submissions:
+                if stop.is_set():
+                    return
+                if isinstance(post, dict):
+                    batch.append(post)
+                else:
+                    record = _read_record(post)
+                    if record is None:
+                        continue
+                    batch.append(record)
+                if len(batch) >= self.batch_size:
+                    batches.put(batch)
+                    batch = []
+            if batch:
+                batches.put(batch)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            batches.put(_DONE)
+
+    def _submit(self, executor: Optional[ProcessPoolExecutor], batch: List[Dict[str, Any]]) -> Future:
+        if executor is not None:
+            try:
+                return executor.submit(classify_records, batch)
+            except (BrokenProcessPool, RuntimeError) as e:
+                logger.error(f"Classifier pool failed, classifying inline: {e}")
+                shutdown_executor()
+        future = Future()
+        future.set_result(classify_records(batch))
+        return future
+
+    def _collect(self, batch: List[Dict[str, Any]], future: Future) -> List[Dict[str, Any]]:
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            logger.error(f"Classifier pool failed, classifying inline: {e}")
+            shutdown_executor()
+            return classify_records(batch)
+
+    def iter_classify(self, submissions: Iterable[Any]) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate submissions on a producer thread and yield classified batches in crawl order."""
+        executor = get_executor(self.workers)
+        batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        failure: List[BaseException] = []
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(submissions, batches, failure, stop),
+                                    name="ingest-producer", daemon=True)
+        producer.start()
+
+        pending = deque()
+        in_flight = 2 * max(1, self.workers)
+        try:
+            while True:
+                batch = batches.get()
+                if batch is _DONE:
+                    break
+                pending.append((batch, self._submit(executor, batch)))
+                while len(pending) > in_flight:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+        finally:
+            # A consumer that stops early must not leave the producer blocked on a full queue
+            stop.set()
+            while producer.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+        if failure:
+            raise failure[0]
+
+    def classify(self, submissions: Iterable[Any]) -> List[Dict[str, Any]]:
+        """All classified posts of a crawl, in crawl order."""
+        return [post for batch in self.iter_classify(submissions) for post in batch]
+
+
+def _read_record(post: Any) -> Optional[Dict[str, Any]]:
+    try:
+        return submission_record(post if isinstance(post, SubmissionAdapter) else SubmissionAdapter(post))
+    except Exception as e:
+        logger.error(f"Error reading submission {getattr(post, 'id', 'unknown')}: {e}")
+        return None
+
+
+# Stages
+def adapted_submissions(submissions: Iterable[Any], min_engagement_score: float = 0,
+                        stats: Optional[CrawlStats] = None) -> Iterator[SubmissionAdapter]:
+    """Wrap PRAW submissions in SubmissionAdapter, dropping low-engagement ones before anything reads more fields."""
+    stats = stats or CrawlStats()
+    try:
+        for submission in submissions:
+            post = SubmissionAdapter(submission, stats)
+            stats.seen += 1
+            if post.engagement < min_engagement_score:
+                stats.below_engagement += 1
+                continue
+            yield post
+    finally:
+        stats.record()
+
+
+def unique_submissions(submissions: Iterable[SubmissionAdapter]) -> Iterator[SubmissionAdapter]:
+    """Fetch results without stickied posts and repeated ids (one post matches several searches)."""
+    seen_ids: Set[str] = set()
+    for post in submissions:
+        if not post.stickied and post.id not in seen_ids:
+            seen_ids.add(post.id)
+            yield post
+    logger.info(f"Found {len(seen_ids)} unique posts after deduplication")
+
+
+def submission_records(submissions: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    """Plain records of submissions; unreadable ones are logged and skipped."""
+    for post in submissions:
+        record = _read_record(post)
+        if record is not None:
+            yield record
+
+
+def cluster_records(records: Iterable[Dict[str, Any]], window: int = DEDUP_WINDOW) -> Iterator[Dict[str, Any]]:
+    """Tag each record with its near-duplicate cluster; copies are marked so nothing classifies them."""
+    index = StreamingDuplicateIndex(window)
+    copies = 0
+    try:
+        for record in records:
+            cluster, new = index.add(record["title"] + " " + record["content"])
+            record["_cluster"] = cluster
+            if not new:
+                copies += 1
+                inc("near_duplicate_posts_total")
+                record["_duplicate"] = True
+            yield record
+    finally:
+        inc("near_duplicate_evictions_total", index.evicted)
+        logger.info(f"Merged {copies} near-duplicate posts; {index.evicted} clusters aged out of the window")
+
+
+def classified_posts(submissions: Iterable[Any], pipeline: Optional[IngestionPipeline] = None,
+                     model=None) -> Iterator[Dict[str, Any]]:
+    """Keyword-classified posts from the process pool, each batch then passed through the semantic classifier."""
+    for batch in (pipeline or IngestionPipeline()).iter_classify(submissions):
+        # Semantic pass catches paraphrases the keyword rules miss
+        annotate_posts([post for post in batch if not post.get("_duplicate")], model)
+        yield from batch
+
+
+def merge_near_duplicates(posts: Iterable[Dict[str, Any]], window: int = DEDUP_WINDOW) -> Iterator[Dict[str, Any]]:
+    """Fold copies marked by cluster_records into their representative, re-emitting it with summed engagement.
+
+    The window mirrors cluster_records' index: both see the same clusters in the same order and evict
+    the same least recently active one, so every copy's representative is still held.
+    """
+    representatives: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+    for post in posts:
+        cluster = post.pop("_cluster", None)
+        if not post.pop("_duplicate", False):
+            post.setdefault("duplicates", 0)
+            post.setdefault("crosspostSubreddits", [])
+            if cluster is not None:
+                representatives[cluster] = post
+                if len(representatives) > window:
+                    representatives.popitem(last=False)
+            yield post
+            continue
+        representative = representatives.get(cluster)
+        if representative is None:
+            # The representative failed to classify, or the two windows fell out of step
+            logger.warning(f"Dropping a near-duplicate of evicted cluster {cluster}")
+            continue
+        representatives.move_to_end(cluster)
+        for field in ("score", "comments", "awards"):
+            representative[field] += post[field]
+        representative["engagementScore"] += record_engagement(post)
+        representative["duplicates"] += 1
+        if post["subreddit"] not in (representative["subreddit"], "r/unknown"):
+            representative["crosspostSubreddits"] = sorted({*representative["crosspostSubreddits"], post["subreddit"]})
+        yield representative
+
+
+def engaged(posts: Iterable[Dict[str, Any]], min_engagement_score: float = 0) -> Iterator[Dict[str, Any]]:
+    """Posts whose engagement score clears the minimum."""
+    for post in posts:
+        if post["engagementScore"] >= min_engagement_score:
+            yield post
+
+
+class TopPosts:
+    """The best n posts by (isFalse, engagementScore) in a bounded min-heap; ties keep arrival order."""
+
+    def __init__(self, n: int):
+        self.n = n
+        # Entries are [key, -arrival, push serial, post]; the serial keeps comparisons off the post dicts
+        self._heap: List[List[Any]] = []
+        self._entries: Dict[int, List[Any]] = {}
+        self._seq = 0
+        self._pushes = 0
+
+    def _key(self, post: Dict[str, Any]) -> tuple:
+        return bool(post.get("isFalse")), post.get("engagementScore", 0)
+
+    def _live(self, entry: List[Any]) -> bool:
+        return self._entries.get(id(entry[3])) is entry
+
+    def _push(self, key: tuple, arrival: int, post: Dict[str, Any]) -> None:
+        self._pushes += 1
+        entry = [key, arrival, self._pushes, post]
+        heapq.heappush(self._heap, entry)
+        self._entries[id(post)] = entry
+
+    def push(self, post: Dict[str, Any]) -> None:
+        """Offer a post; a post already held (a merged representative) has its rank refreshed."""
+        entry = self._entries.get(id(post))
+        if entry is not None:
+            key = self._key(post)
+            if key != entry[0]:
+                # The old entry stays behind as a tombstone, so a refresh is O(log n) rather than a heapify
+                self._push(key, entry[1], post)
+                if len(self._heap) > 2 * len(self._entries):
+                    self._heap = [held for held in self._heap if self._live(held)]
+                    heapq.heapify(self._heap)
+            return
+        self._seq += 1
+        # The worst post sits at the root; among equal keys the latest arrival is the worst
+        key = self._key(post)
+        if len(self._entries) >= self.n:
+            while not self._live(self._heap[0]):
+                heapq.heappop(self._heap)
+            if (key, -self._seq) <= tuple(self._heap[0][:2]):
+                return
+            del self._entries[id(heapq.heappop(self._heap)[3])]
+        self._push(key, -self._seq, post)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Held posts, best first."""
+        return [entry[3] for entry in sorted(self._entries.values(), key=lambda entry: entry[:2], reverse=True)]
+
+
+def stream_posts(submissions: Iterable[Any], min_engagement_score: float = 0, model=None,
+                 pipeline: Optional[IngestionPipeline] = None,
+                 stats: Optional[CrawlStats] = None) -> Iterator[Dict[str, Any]]:
+    """fetch -> filter -> dedupe -> cluster -> classify -> merge -> score as one generator of processed posts."""
+    adapted = adapted_submissions(submissions, min_engagement_score, stats)
+    # Runs on the producer thread, so hashing overlaps with classification
+    records = cluster_records(submission_records(unique_submissions(adapted)))
+    return engaged(merge_near_duplicates(classified_posts(records, pipeline, model)), min_engagement_score)
+
+
+def process_submissions(submissions: Iterable[Any], min_engagement_score: float = 0, model=None,
+                        pipeline: Optional[IngestionPipeline] = None) -> List[Dict[str, Any]]:
+    """Every processed post of a crawl once, in first-seen order."""
+    with timed("ingest_classify"):
+        return list({id(post): post for post in stream_posts(submissions, min_engagement_score, model,
+                                                             pipeline)}.values())
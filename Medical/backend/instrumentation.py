@@ -0,0 +1,232 @@
+# Medical/backend/instrumentation.py
+"""Thread-safe counters and fixed-bucket latency histograms with Prometheus export.
+
+Every series is a fixed number of integers, so memory stays bounded no matter
+how many requests are observed:
+
+    from instrumentation import timed, inc
+    with timed("weaviate_query"):
+        response = query.do()
+    inc("cache_requests_total", cache="posts", result="hit")
+"""
+import time
+import threading
+from bisect import bisect_left
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+PREFIX = "health_app_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond scoring up to slow Gemini and Reddit calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter for one label set."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """Cumulative histogram over fixed bucket bounds for one label set."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Return (per-bucket counts, sum, count) taken atomically."""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    @property
+    def mean(self) -> float:
+        with self._lock:
+            return self._sum / self._count if self._count else 0.0
+
+
+class _Family:
+    """A named metric with one child per label set."""
+
+    def __init__(self, name: str, help_text: str, kind: str, factory: Callable[[], Any]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self._factory = factory
+        self._children: Dict[LabelKey, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = _label_key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def items(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self._families: Dict[str, _Family] = {}
+        self._callbacks: Dict[str, Tuple[str, str, Callable[[], Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, help_text: str, kind: str, factory: Callable[[], Any]) -> _Family:
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.setdefault(name, _Family(name, help_text, kind, factory))
+        return family
+
+    def counter(self, name: str, help_text: str = "") -> _Family:
+        return self._family(name, help_text, "counter", Counter)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> _Family:
+        return self._family(name, help_text, "histogram", lambda: Histogram(buckets))
+
+    def gauge_callback(self, name: str, help_text: str, fn: Callable[[], Any]) -> None:
+        """Register a gauge evaluated at render time; fn returns a number or [(labels, value)]."""
+        with self._lock:
+            self._callbacks[name] = (help_text, "gauge", fn)
+
+    def counter_callback(self, name: str, help_text: str, fn: Callable[[], Any]) -> None:
+        """Register a counter read at render time, for totals kept elsewhere; name should end in _total."""
+        with self._lock:
+            self._callbacks[name] = (help_text, "counter", fn)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for family in list(self._families.values()):
+            full_name = self.prefix + family.name
+            lines.append(f"# HELP {full_name} {family.help}")
+            lines.append(f"# TYPE {full_name} {family.kind}")
+            for key, child in family.items():
+                if family.kind == "counter":
+                    lines.append(f"{full_name}{_format_labels(key)} {_format_value(child.value)}")
+                    continue
+                counts, total, count = child.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(child.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{full_name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{full_name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{full_name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{full_name}_count{_format_labels(key)} {count}")
+        for name, (help_text, kind, fn) in list(self._callbacks.items()):
+            full_name = self.prefix + name
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            samples = value if isinstance(value, list) else [({}, value)]
+            for labels, sample in samples:
+                lines.append(f"{full_name}{_format_labels(_label_key(labels))} {_format_value(sample)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+STAGE_DURATION = registry.histogram(
+    "stage_duration_seconds",
+    "Latency of backend pipeline stages (encode, weaviate_query, scoring, gemini, reddit_api, ...)."
+)
+CACHE_REQUESTS = registry.counter("cache_requests_total", "Cache lookups by cache name and result.")
+
+
+class timed:
+    """Context manager recording the wall time of a pipeline stage."""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, stage: str):
+        self._histogram = STAGE_DURATION.labels(stage=stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record an externally measured stage duration."""
+    STAGE_DURATION.labels(stage=stage).observe(seconds)
+
+
+def stage_mean(stage: str) -> float:
+    """Mean duration of a stage in seconds, computed in O(1)."""
+    return STAGE_DURATION.labels(stage=stage).mean
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """Increment a counter family by name."""
+    registry.counter(name).labels(**labels).inc(amount)
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def lru_cache_gauge(name: str, cached_fn) -> None:
+    """Expose hits and misses of a functools.lru_cache as a counter and its size as a gauge."""
+    def lookups():
+        info = cached_fn.cache_info()
+        return [({"result": "hit"}, info.hits), ({"result": "miss"}, info.misses)]
+    registry.counter_callback(f"lru_cache_{name}_requests_total", f"functools.lru_cache lookups for {name}.", lookups)
+    registry.gauge_callback(f"lru_cache_{name}_size", f"functools.lru_cache entries held for {name}.",
+                            lambda: cached_fn.cache_info().currsize)
+
+
+def render_prometheus() -> str:
+    """Render the default registry."""
+    return registry.render()
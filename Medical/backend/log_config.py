@@ -0,0 +1,168 @@
+# Medical/backend/log_config.py
+"""Structured, non-blocking logging setup shared by the backend entry points.
+
+Request threads only enqueue log records; a QueueListener thread formats them
+as JSON and writes them to the log file and console. Messages whose arguments
+are all immutable (strings, numbers, None, tuples of those) are formatted on
+the listener thread; any other argument could change before then, so those
+messages are formatted when they are logged. Wrap expensive payloads in
+``lazy_json`` or ``lazy`` and they are only serialized for records that are
+actually kept, on the listener thread. They are read at that point, so pass
+them objects the caller no longer mutates:
+
+    logger.debug("Weaviate response: %s", lazy_json(response), extra=sample(0.01))
+
+Environment variables:
+
+    LOG_LEVEL=INFO                               root level
+    LOG_LEVELS=vector_search=DEBUG,health_app=INFO   per-module levels
+    LOG_FORMAT=json|text                         output format (default json)
+"""
+import os
+import queue
+import atexit
+import random
+import logging
+import datetime
+import logging.handlers
+from typing import Dict, Any, Optional, Callable
+
+from serialization import dumps
+
+# Attributes present on every LogRecord; anything else came from ``extra=``
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return dumps(entry)
+
+
+_IMMUTABLE_ARGS = (str, int, float, bytes, type(None), datetime.date, datetime.time, datetime.timedelta)
+
+
+def _frozen(arg: Any) -> bool:
+    if isinstance(arg, tuple):
+        return all(_frozen(item) for item in arg)
+    return isinstance(arg, _IMMUTABLE_ARGS) or isinstance(arg, lazy)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread when that is safe."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(_frozen(arg) for arg in args)):
+            # A mutable argument could change before the listener formats it; snapshot the message now
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps records carrying a ``sample_rate`` attribute with that probability."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        return rate is None or random.random() < rate
+
+
+class lazy:
+    """Defers an expensive call until the record is formatted."""
+
+    __slots__ = ("_fn", "_args", "_kwargs")
+
+    def __init__(self, fn: Callable[..., Any], *args, **kwargs):
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self._fn(*self._args, **self._kwargs))
+
+    __repr__ = __str__
+
+
+def lazy_json(obj: Any, **kwargs) -> lazy:
+    """Serialize obj to JSON only if the record is emitted."""
+    return lazy(dumps, obj, bool(kwargs.get("indent")))
+
+
+def sample(rate: float) -> Dict[str, float]:
+    """``extra=`` payload that keeps a record with the given probability."""
+    return {"sample_rate": rate}
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse 'module=LEVEL,other=LEVEL' into a logger name to level mapping."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        if name and level:
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def setup_logging(log_file: Optional[str] = None, level: Optional[str] = None,
+                  module_levels: Optional[Dict[str, Any]] = None, fmt: Optional[str] = None) -> None:
+    """Route all logging through a queue to file/console handlers on a background thread."""
+    global _listener
+    fmt = (fmt or os.environ.get('LOG_FORMAT', 'json')).lower()
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel((level or os.environ.get('LOG_LEVEL', 'INFO')).upper())
+
+    levels = parse_levels(os.environ.get('LOG_LEVELS', ''))
+    levels.update(module_levels or {})
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,256 @@
+# Medical/backend/misinfo_classifier.py
+"""Rule-based health misinformation classifier shared by the backend modules.
+
+The rule table lives in ``misinfo_rules.json`` (or the file named by
+``MISINFO_RULES_PATH``) and is compiled once into regular expressions. The
+compiled rules are swapped atomically by ``reload_rules()``, and the file's
+mtime is checked at most every ``MISINFO_RULES_CHECK_INTERVAL`` seconds so
+edited rules are picked up without restarting workers.
+
+Terms match at the start of a word, including after punctuation. Every term
+occurrence adds its weight (``{"term": ..., "weight": ...}`` or
+the category ``weight``, default 1.0) to its category in a single scan of
+the text, and the result carries every matched label ranked by score.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "misinfo_rules.json")
+RULES_PATH = os.environ.get('MISINFO_RULES_PATH', DEFAULT_RULES_PATH)
+RULES_CHECK_INTERVAL = float(os.environ.get('MISINFO_RULES_CHECK_INTERVAL', '30'))
+
+# Punctuation and whitespace become plain spaces before the term scan, so a term after a quote,
+# bracket, hyphen, slash or tab still starts on a space. A string table indexed by code point
+# translates about twice as fast as a dict; characters past its end are left as they are
+_SEPARATOR_CHARS = '!"#$%&\'()*+,-./:;<=>?@[\\]^`{|}~\t\n\r\f\v\xa0\xab\xbb\u2013\u2014\u2018\u2019\u201c\u201d\u2026'
+_SEPARATORS = ''.join(' ' if chr(code) in _SEPARATOR_CHARS else chr(code)
+                      for code in range(max(map(ord, _SEPARATOR_CHARS)) + 1))
+# Most posts are ASCII; a bytes table lowercases and folds them in one pass, which with the
+# encode and decode is still about twice as fast as str.lower() followed by str.translate()
+_ASCII_FOLD = bytes(ord(' ') if chr(code) in _SEPARATOR_CHARS else ord(chr(code).lower()) if code < 128 else code
+                    for code in range(256))
+
+
+def _scan_form(text: str) -> str:
+    """Lowercased text with every separator folded to a space."""
+    if text.isascii():
+        return text.encode('ascii').translate(_ASCII_FOLD).decode('ascii')
+    return text.lower().translate(_SEPARATORS)
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """Build a prefix-factored regex alternation, which sre matches much faster than a flat one."""
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class CompiledRules:
+    """Immutable compiled form of one version of the rule table."""
+
+    def __init__(self, rules: Dict[str, Any], source: Optional[str] = None, mtime: float = 0.0):
+        self.version = rules.get("version", 0)
+        self.source = source
+        self.mtime = mtime
+        self.labels: List[str] = []
+        self.evidence: List[str] = []
+        self.term_index: Dict[str, Tuple[int, float]] = {}
+        # Terms in the separator-folded form the scan sees ("don't" -> "don t")
+        self.scan_index: Dict[str, Tuple[int, float]] = {}
+        for index, pattern in enumerate(rules["categories"]):
+            self.labels.append(pattern["category"])
+            self.evidence.append(pattern["evidence"])
+            category_weight = float(pattern.get("weight", 1.0))
+            for term in pattern["terms"]:
+                if isinstance(term, dict):
+                    term, weight = term["term"], float(term.get("weight", category_weight))
+                else:
+                    weight = category_weight
+                term = term.lower()
+                # A term listed twice keeps its first (highest priority) category
+                scan_term = ' '.join(_scan_form(term).split())
+                if scan_term and scan_term not in self.scan_index:
+                    self.term_index[term] = self.scan_index[scan_term] = (index, weight)
+        # One scan finds every term occurrence; anchoring terms on the space before a word lets
+        # sre jump between spaces instead of trying the whole trie at every character. A (?<!\w)
+        # anchor matches the same word starts but is tried everywhere and scans about 3x slower
+        self.any_term = re.compile(' (' + _trie_pattern(list(self.scan_index)) + ')' if self.scan_index else r'(?!)')
+        self.word_pairs = [
+            (pair["pair"][0].lower(), pair["pair"][1].lower(), int(pair["distance"]))
+            for pair in rules.get("word_pairs", [])
+        ]
+        # Pairs grouped by second word, each word with its scan form for the presence check, so a
+        # second word shared by several pairs is looked for once per text
+        grouped: Dict[str, List[Tuple[str, str, int]]] = {}
+        for first, second, distance in self.word_pairs:
+            grouped.setdefault(second, []).append((first, _scan_form(first), distance))
+        self.pair_groups = [(second, _scan_form(second), firsts) for second, firsts in grouped.items()]
+        pair_match = rules.get("word_pair_match", {})
+        self.word_pair_index = len(self.labels)
+        self.word_pair_weight = float(pair_match.get("weight", 1.0))
+        self.labels.append(pair_match.get("category", "Health Claims"))
+        self.evidence.append(pair_match.get("evidence", ""))
+        # Confidence that a post is misinformation after a total matched weight w is 1 - (1 - c) ** w
+        self.term_confidence = float(rules.get("term_confidence", 0.6))
+        self._miss_rate = 1 - self.term_confidence
+        # Matched weights repeat across posts (1.0, 2.0, 1.5...), so the rounded power is memoized
+        self._confidences: Dict[float, float] = {}
+        self.no_match_result = MappingProxyType({
+            "isLikelyFalse": False,
+            "evidence": rules.get("no_match_evidence", ""),
+            "labels": (),
+            "confidence": 0.0
+        })
+
+    def count_word_pairs(self, text: str, scan: Optional[str] = None) -> int:
+        """Number of configured word pairs that occur within their token distance."""
+        if scan is None:
+            scan = _scan_form(text)
+        words = None
+        matched = 0
+        for second, scan_second, firsts in self.pair_groups:
+            # Cheap whole-text checks skip the token scan for almost every post; a word in the
+            # lowercased text is always in its scan form too
+            if scan_second not in scan:
+                continue
+            second_indices = None
+            for first, scan_first, distance in firsts:
+                if scan_first not in scan:
+                    continue
+                if words is None:
+                    words = text.lower().split()
+                if second_indices is None:
+                    second_indices = [i for i, word in enumerate(words) if second in word]
+                if not second_indices:
+                    break
+                for index, word in enumerate(words):
+                    if first in word:
+                        nearest = bisect_left(second_indices, index - distance)
+                        if nearest < len(second_indices) and second_indices[nearest] <= index + distance:
+                            matched += 1
+                            break
+        return matched
+
+    def classify(self, text: str):
+        """Score every category in one pass and return the ranked labels."""
+        scan = _scan_form(text)
+        scores: Dict[int, float] = {}
+        scan_index = self.scan_index
+        for term in self.any_term.findall(' ' + scan):
+            index, weight = scan_index[term]
+            scores[index] = scores.get(index, 0.0) + weight
+        pairs = self.count_word_pairs(text, scan)
+        if pairs:
+            scores[self.word_pair_index] = pairs * self.word_pair_weight
+        if not scores:
+            return self.no_match_result
+        # Highest score first; ties keep rule table order, since the second sort is stable
+        ranked = list(scores.items())
+        if len(ranked) > 1:
+            ranked.sort()
+            ranked.sort(key=itemgetter(1), reverse=True)
+        total = sum(scores.values())
+        confidence = self._confidences.get(total)
+        if confidence is None:
+            confidence = round(1 - self._miss_rate ** total, 4)
+            if len(self._confidences) < 4096:
+                self._confidences[total] = confidence
+        labels = self.labels
+        top = ranked[0][0]
+        return {
+            "isLikelyFalse": True,
+            "category": labels[top],
+            "evidence": self.evidence[top],
+            "labels": [{"category": labels[index], "score": score} for index, score in ranked],
+            "confidence": confidence
+        }
+
+
+_rules: Optional[CompiledRules] = None
+_reload_lock = threading.Lock()
+_next_check = 0.0
+
+
+def load_rules(path: str = RULES_PATH) -> CompiledRules:
+    """Read and compile a rule table file."""
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    return CompiledRules(rules, source=path, mtime=os.path.getmtime(path))
+
+
+def reload_rules(path: Optional[str] = None) -> CompiledRules:
+    """Recompile the rule table and swap it in for subsequent calls."""
+    global _rules
+    with _reload_lock:
+        compiled = load_rules(path or (_rules.source if _rules else RULES_PATH))
+        _rules = compiled
+    logger.info("Loaded misinformation rules v%s from %s", compiled.version, compiled.source)
+    return compiled
+
+
+def _maybe_reload() -> None:
+    """Reload the rule table if its file changed since it was compiled."""
+    global _next_check
+    _next_check = time.monotonic() + RULES_CHECK_INTERVAL
+    try:
+        if os.path.getmtime(_rules.source) != _rules.mtime:
+            reload_rules()
+    except Exception as e:
+        logger.error(f"Failed to reload misinformation rules, keeping v{_rules.version}: {e}")
+
+
+def get_rules() -> CompiledRules:
+    """Return the active compiled rules, checking for file changes periodically."""
+    if _rules is None:
+        reload_rules()
+    elif RULES_CHECK_INTERVAL >= 0 and time.monotonic() >= _next_check:
+        _maybe_reload()
+    return _rules
+
+
+def rules_version() -> int:
+    """Version number of the active rule table."""
+    return get_rules().version
+
+
+def contains_potential_misinformation(text: str):
+    """Detect potential misinformation in text related to health topics."""
+    return get_rules().classify(text or "")
+
+
+def confidence_fields(result) -> Dict[str, float]:
+    """Map a classifier result onto the false/true/not_known confidence fields of a post record."""
+    if not result["isLikelyFalse"]:
+        return {"false_confidence": 0.1, "true_confidence": 0.3, "not_known_confidence": 0.6}
+    confidence = result["confidence"]
+    remainder = 1 - confidence
+    return {
+        "false_confidence": confidence,
+        "true_confidence": round(remainder * 0.4, 4),
+        "not_known_confidence": round(remainder * 0.6, 4)
+    }
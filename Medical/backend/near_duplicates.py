@@ -0,0 +1,210 @@
+# Medical/backend/near_duplicates.py
+"""MinHash + LSH near-duplicate detection for ingested Reddit posts.
+
+Crossposts and copy-pasted misinformation get a new post id in every
+subreddit, so deduplicating by id leaves them to be classified and ranked
+separately. Each post's normalized title+body is reduced to a MinHash
+signature over word shingles. Signatures are bucketed by LSH bands, and
+candidates whose estimated Jaccard similarity clears the threshold are
+merged with union-find:
+
+    clusters = cluster_texts([post.title + " " + post.selftext for post in posts])
+
+Streams use ``StreamingDuplicateIndex`` instead, which keeps only a
+bounded window of recently active clusters and never merges two clusters
+once both exist, so a cluster reported to the caller stays valid.
+
+Environment variables:
+
+    DEDUP_THRESHOLD=0.7    estimated Jaccard similarity to merge two posts
+    DEDUP_NUM_PERM=64      MinHash permutations
+    DEDUP_BANDS=16         LSH bands (rows per band = NUM_PERM / BANDS)
+"""
+import os
+import re
+import zlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Iterable, Set, Tuple
+
+import numpy as np
+
+THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', '0.7'))
+NUM_PERM = int(os.environ.get('DEDUP_NUM_PERM', '64'))
+BANDS = int(os.environ.get('DEDUP_BANDS', '16'))
+SHINGLE_SIZE = 3
+SEED = 42
+
+# Mersenne prime 2^31 - 1 keeps a * x + b inside uint64
+_PRIME = (1 << 31) - 1
+_URL = re.compile(r'https?://\S+|www\.\S+')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop URLs and collapse punctuation and whitespace to single spaces."""
+    return _NON_WORD.sub(' ', _URL.sub(' ', text.lower())).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[int]:
+    """Hashes of the word n-grams of the normalized text."""
+    words = normalize(text).split()
+    if len(words) <= size:
+        return [zlib.crc32(' '.join(words).encode('utf-8'))] if words else []
+    return list({zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)})
+
+
+class MinHasher:
+    """Computes MinHash signatures with universal hash permutations."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)[:, None]
+        self._b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)[:, None]
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text)
+        if not hashes:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        values = np.asarray(hashes, dtype=np.uint64) % _PRIME
+        return ((self._a * values[None, :] + self._b) % _PRIME).min(axis=1)
+
+
+class NearDuplicateIndex:
+    """Incremental LSH index that groups near-duplicate texts into clusters."""
+
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self._min_agreement = threshold * num_perm
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self._parent: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _find(self, item: int) -> int:
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def _union(self, first: int, second: int) -> None:
+        first, second = self._find(first), self._find(second)
+        if first != second:
+            # The earlier item stays the root so clusters keep insertion order
+            self._parent[max(first, second)] = min(first, second)
+
+    def add(self, text: str) -> int:
+        """Index a text and return its position; it joins any cluster it duplicates."""
+        item = len(self._signatures)
+        signature = self.hasher.signature(text)
+        self._signatures.append(signature)
+        self._parent.append(item)
+        checked = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            bucket = buckets.setdefault(key, [])
+            for other in bucket:
+                # Members of a cluster this item already joined need no comparison
+                if other in checked or self._find(other) == self._find(item):
+                    continue
+                checked.add(other)
+                if np.count_nonzero(signature == self._signatures[other]) >= self._min_agreement:
+                    self._union(item, other)
+            bucket.append(item)
+        return item
+
+    def cluster_of(self, item: int) -> int:
+        """Position of the first indexed member of the item's cluster."""
+        return self._find(item)
+
+    def clusters(self) -> List[List[int]]:
+        """All clusters as lists of positions, ordered by their first member."""
+        groups: Dict[int, List[int]] = {}
+        for item in range(len(self._signatures)):
+            groups.setdefault(self._find(item), []).append(item)
+        return list(groups.values())
+
+
+class StreamingDuplicateIndex:
+    """Bounded LSH index over the most recently active clusters of a stream.
+
+    Each cluster is matched by its first member's signature, and a text joins
+    the most similar live cluster rather than merging several. Once more than
+    ``capacity`` clusters exist, the least recently active one is dropped with
+    its signature and bucket entries, so memory is O(capacity); a later copy
+    of it starts a new cluster.
+    """
+
+    def __init__(self, capacity: int, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.capacity = max(1, capacity)
+        self.hasher = MinHasher(num_perm)
+        self._min_agreement = threshold * num_perm
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        self._clusters: "OrderedDict[int, Tuple[np.ndarray, List[bytes]]]" = OrderedDict()
+        self._next_cluster = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def add(self, text: str) -> Tuple[int, bool]:
+        """Cluster id of the text and whether it started a new cluster."""
+        signature = self.hasher.signature(text)
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(len(self._buckets))]
+        best, best_agreement = None, 0
+        checked = set()
+        for buckets, key in zip(self._buckets, keys):
+            for cluster in buckets.get(key, ()):
+                if cluster in checked:
+                    continue
+                checked.add(cluster)
+                agreement = np.count_nonzero(signature == self._clusters[cluster][0])
+                if agreement < self._min_agreement:
+                    continue
+                # Ties go to the older cluster
+                if best is None or agreement > best_agreement or (agreement == best_agreement and cluster < best):
+                    best, best_agreement = cluster, agreement
+        if best is not None:
+            self._clusters.move_to_end(best)
+            return best, False
+
+        cluster = self._next_cluster
+        self._next_cluster += 1
+        self._clusters[cluster] = (signature, keys)
+        for buckets, key in zip(self._buckets, keys):
+            buckets.setdefault(key, set()).add(cluster)
+        while len(self._clusters) > self.capacity:
+            self._evict()
+        return cluster, True
+
+    def _evict(self) -> None:
+        cluster, (_, keys) = self._clusters.popitem(last=False)
+        for buckets, key in zip(self._buckets, keys):
+            bucket = buckets[key]
+            bucket.discard(cluster)
+            if not bucket:
+                del buckets[key]
+        self.evicted += 1
+
+
+def cluster_texts(texts: Iterable[str], threshold: float = THRESHOLD) -> List[List[int]]:
+    """Group near-duplicate texts; returns lists of indices into texts."""
+    index = NearDuplicateIndex(threshold)
+    for text in texts:
+        index.add(text)
+    return index.clusters()
+
+
+def cluster_items(items: List[Any], text_fn: Callable[[Any], str], threshold: float = THRESHOLD) -> List[List[Any]]:
+    """Group near-duplicate items by the text text_fn extracts from each."""
+    return [[items[i] for i in cluster] for cluster in cluster_texts((text_fn(item) for item in items), threshold)]
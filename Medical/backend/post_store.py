@@ -0,0 +1,395 @@
+# Medical/backend/post_store.py
+"""Embedded SQLite store for processed Reddit posts.
+
+Replaces the per-window JSON caches (``cached_posts_{time_filter}.json``,
+``health_misinfo_posts.json``). Those held 10-15 posts each, were rewritten
+wholesale and were reloaded in full on every read. Each post is now one row,
+upserted by id, so history accumulates across fetches. A time window is an
+indexed range query on ``created_at``, and a small fetch log records when
+each window was last refreshed from Reddit:
+
+    store = get_store()
+    store.save_posts(posts, window="week")
+    if store.is_fresh("week", 6 * 3600):
+        posts = store.window_posts("week", limit=15)
+
+The database runs in WAL mode so Flask threads read while a fetch writes.
+Each thread gets its own connection.
+
+Environment variables:
+
+    POST_STORE_PATH=posts.db          database file
+    POST_STORE_RETENTION_DAYS=90      posts not fetched again for this long are pruned; 0 keeps everything
+"""
+import os
+import time
+import base64
+import hashlib
+import logging
+import datetime
+import threading
+import sqlite3
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from instrumentation import timed
+from serialization import dumps, loads, load
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('POST_STORE_PATH', 'posts.db')
+RETENTION_DAYS = float(os.environ.get('POST_STORE_RETENTION_DAYS', '90'))
+
+# Reddit time_filter values and how far back each reaches
+TIME_WINDOWS = {
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+    "year": 365 * 86400,
+    "all": None,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    created_at REAL,
+    subreddit TEXT,
+    category TEXT,
+    is_false INTEGER NOT NULL DEFAULT 0,
+    engagement REAL NOT NULL DEFAULT 0,
+    false_confidence REAL,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts (created_at);
+CREATE INDEX IF NOT EXISTS idx_posts_category ON posts (category);
+CREATE INDEX IF NOT EXISTS idx_posts_subreddit ON posts (subreddit);
+CREATE INDEX IF NOT EXISTS idx_posts_engagement ON posts (engagement);
+CREATE INDEX IF NOT EXISTS idx_posts_fetched_at ON posts (fetched_at);
+CREATE INDEX IF NOT EXISTS idx_posts_rank ON posts (is_false DESC, engagement DESC, id);
+CREATE TABLE IF NOT EXISTS fetches (
+    time_filter TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    post_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetch_posts (
+    time_filter TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (time_filter, id)
+);
+"""
+
+_RESCORED_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS rescored (
+    id TEXT PRIMARY KEY,
+    fetched_at REAL,
+    category TEXT,
+    is_false INTEGER,
+    engagement REAL,
+    false_confidence REAL,
+    data TEXT
+)
+"""
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds from an ISO-8601 string or a number; None if unparseable."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def post_id(post: Dict[str, Any]) -> str:
+    """Stable id of a post: its permalink, else a hash of subreddit and title."""
+    if post.get("permalink"):
+        return post["permalink"]
+    key = f"{post.get('subreddit', '')}\n{post.get('title', '')}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def encode_cursor(is_false: int, engagement: float, last_id: str) -> str:
+    """Opaque keyset cursor for the sort key of the last post on a page."""
+    return base64.urlsafe_b64encode(dumps([is_false, engagement, last_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, float, str]:
+    """Sort key from a cursor; raises ValueError if the cursor is malformed."""
+    try:
+        is_false, engagement, last_id = loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(is_false), float(engagement), str(last_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class PostStore:
+    """Repository of processed posts backed by one SQLite database."""
+
+    def __init__(self, path: str = DB_PATH, retention_days: float = RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def save_posts(self, posts: Iterable[Dict[str, Any]], window: Optional[str] = None,
+                   fetched_at: Optional[float] = None) -> int:
+        """Upsert posts and, with a window, record that the window was just fetched."""
+        fetched_at = fetched_at or time.time()
+        rows = [
+            (post_id(post), parse_timestamp(post.get("created_at")), post.get("subreddit"), post.get("category"),
+             1 if post.get("isFalse") else 0, float(post.get("engagementScore") or 0),
+             post.get("false_confidence"), fetched_at, dumps(post))
+            for post in posts
+        ]
+        with timed("post_store_write"), self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO posts (id, created_at, subreddit, category, is_false, engagement, false_confidence, "
+                "fetched_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET created_at=excluded.created_at, subreddit=excluded.subreddit, "
+                "category=excluded.category, is_false=excluded.is_false, engagement=excluded.engagement, "
+                "false_confidence=excluded.false_confidence, fetched_at=excluded.fetched_at, data=excluded.data",
+                rows
+            )
+            if window is not None:
+                connection.execute(
+                    "INSERT OR REPLACE INTO fetches (time_filter, fetched_at, post_count) VALUES (?, ?, ?)",
+                    (window, fetched_at, len(rows))
+                )
+                # Remember which posts this fetch returned, for fetched_posts()
+                connection.execute("DELETE FROM fetch_posts WHERE time_filter = ?", (window,))
+                connection.executemany("INSERT OR IGNORE INTO fetch_posts (time_filter, id) VALUES (?, ?)",
+                                       [(window, row[0]) for row in rows])
+            if self.retention_days > 0:
+                connection.execute("DELETE FROM posts WHERE fetched_at < ?",
+                                   (fetched_at - self.retention_days * 86400,))
+        logger.info(f"Stored {len(rows)} posts" + (f" for window '{window}'" if window else ""))
+        return len(rows)
+
+    def last_fetch(self, window: str) -> Optional[float]:
+        """When a window was last fetched, as epoch seconds."""
+        row = self._connect().execute("SELECT fetched_at FROM fetches WHERE time_filter = ?", (window,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, window: str, max_age: float) -> bool:
+        fetched_at = self.last_fetch(window)
+        return fetched_at is not None and time.time() - fetched_at <= max_age
+
+    def window_posts(self, time_filter: str = "week", limit: Optional[int] = None,
+                     now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Posts created inside a Reddit time window, misinformation first, then by engagement."""
+        span = TIME_WINDOWS.get(time_filter, TIME_WINDOWS["week"])
+        query = "SELECT data FROM posts"
+        params: List[Any] = []
+        if span is not None:
+            query += " WHERE created_at >= ?"
+            params.append((now or time.time()) - span)
+        query += " ORDER BY is_false DESC, engagement DESC, id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with timed("post_store_read"):
+            rows = self._connect().execute(query, params).fetchall()
+        return [loads(data) for (data,) in rows]
+
+    def fetched_posts(self, window: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Posts saved by the latest fetch of a window, misinformation first, then by engagement."""
+        query = ("SELECT posts.data FROM fetch_posts JOIN posts ON posts.id = fetch_posts.id "
+                 "WHERE fetch_posts.time_filter = ? ORDER BY posts.is_false DESC, posts.engagement DESC, posts.id")
+        params: List[Any] = [window]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with timed("post_store_read"):
+            rows = self._connect().execute(query, params).fetchall()
+        return [loads(data) for (data,) in rows]
+
+    def page(self, time_filter: Optional[str] = None, category: Optional[str] = None,
+             subreddit: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+             min_confidence: Optional[float] = None, cursor: Optional[str] = None, limit: int = 15,
+             fields: Optional[Sequence[str]] = None, now: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of posts ordered by (isFalse, engagementScore, id) and the cursor of the next page.
+
+        Seeks past the cursor's sort key instead of using OFFSET, so any page
+        costs the same index walk as the first. Posts carry their store id,
+        and ``fields`` limits the keys returned.
+        """
+        conditions, params = [], []
+        span = TIME_WINDOWS.get(time_filter) if time_filter else None
+        if span is not None:
+            since = max(since or 0.0, (now or time.time()) - span)
+        for clause, value in (("created_at >= ?", since), ("created_at < ?", until),
+                              ("category = ?", category), ("subreddit = ?", subreddit),
+                              ("false_confidence >= ?", min_confidence)):
+            if value is not None:
+                conditions.append(clause)
+                params.append(value)
+        if cursor:
+            is_false, engagement, last_id = decode_cursor(cursor)
+            conditions.append("(is_false < ? OR (is_false = ? AND (engagement < ? OR (engagement = ? AND id > ?))))")
+            params.extend((is_false, is_false, engagement, engagement, last_id))
+
+        query = "SELECT id, is_false, engagement, data FROM posts"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        # One extra row tells whether another page follows
+        query += " ORDER BY is_false DESC, engagement DESC, id LIMIT ?"
+        params.append(limit + 1)
+        with timed("post_store_read"):
+            rows = self._connect().execute(query, params).fetchall()
+
+        posts = []
+        for row_id, _, _, data in rows[:limit]:
+            post = loads(data)
+            post["id"] = row_id
+            if fields:
+                post = {field: post[field] for field in fields if field in post}
+            posts.append(post)
+        next_cursor = None
+        if len(rows) > limit:
+            last_id, is_false, engagement, _ = rows[limit - 1]
+            next_cursor = encode_cursor(is_false, engagement, last_id)
+        return posts, next_cursor
+
+    def trend_rows(self, since: float) -> List[Tuple[str, Optional[float], Optional[str], Optional[str]]]:
+        """(id, created_at, category, subreddit) of posts created since a time, for replaying into trend_engine."""
+        return self._connect().execute(
+            "SELECT id, created_at, category, subreddit FROM posts WHERE created_at >= ?", (since,)
+        ).fetchall()
+
+    def stats_rows(self) -> List[Tuple[Optional[str], int, float]]:
+        """(category, is_false, engagement) of every stored post, for replaying into streaming_stats."""
+        return self._connect().execute("SELECT category, is_false, engagement FROM posts").fetchall()
+
+    def rows_after(self, rowid: int) -> List[Tuple[int, str, Optional[float], Optional[str], Optional[str], int, float]]:
+        """(rowid, id, created_at, category, subreddit, is_false, engagement) of posts first stored after a rowid.
+
+        New rows get increasing rowids and upserts keep them, so every post turns up once, whichever
+        process stored it; pass the last rowid seen to read only what was added since.
+        """
+        return self._connect().execute(
+            "SELECT rowid, id, created_at, category, subreddit, is_false, engagement FROM posts "
+            "WHERE rowid > ? ORDER BY rowid", (rowid,)
+        ).fetchall()
+
+    def unseen(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The posts whose ids are not stored yet."""
+        ids = [post_id(post) for post in posts]
+        known = set()
+        connection = self._connect()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            known.update(row[0] for row in connection.execute(
+                f"SELECT id FROM posts WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return [post for post, key in zip(posts, ids) if key not in known]
+
+    def iter_chunks(self, chunk_size: int = 1000) -> Iterator[List[Tuple[str, float, str]]]:
+        """Every post as chunks of (id, fetched_at, data) rows in id order, read by keyset so memory stays bounded."""
+        connection = self._connect()
+        last_id = ""
+        while True:
+            rows = connection.execute(
+                "SELECT id, fetched_at, data FROM posts WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def stage_rescored(self, posts: Iterable[Tuple[str, float, Dict[str, Any]]]) -> int:
+        """Hold re-scored (id, fetched_at, post) records on this connection until apply_rescored()."""
+        rows = [
+            (key_id, fetched_at, post.get("category"), 1 if post.get("isFalse") else 0,
+             float(post.get("engagementScore") or 0), post.get("false_confidence"), dumps(post))
+            for key_id, fetched_at, post in posts
+        ]
+        with self._connect() as connection:
+            connection.execute(_RESCORED_SCHEMA)
+            connection.executemany("INSERT OR REPLACE INTO temp.rescored VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def apply_rescored(self) -> int:
+        """Write every staged record back in one transaction; returns how many posts changed.
+
+        Posts refetched since they were read keep their newer data.
+        """
+        with timed("post_store_write"), self._connect() as connection:
+            connection.execute(_RESCORED_SCHEMA)
+            updated = connection.execute(
+                "UPDATE posts SET category = r.category, is_false = r.is_false, engagement = r.engagement, "
+                "false_confidence = r.false_confidence, data = r.data "
+                "FROM temp.rescored AS r WHERE posts.id = r.id AND posts.fetched_at = r.fetched_at"
+            ).rowcount
+            # Logged like a fetch so the generation, and with it HTTP ETags, moves on
+            connection.execute(
+                "INSERT OR REPLACE INTO fetches (time_filter, fetched_at, post_count) VALUES ('rescore', ?, ?)",
+                (time.time(), updated)
+            )
+            connection.execute("DROP TABLE temp.rescored")
+        logger.info(f"Re-scored {updated} posts")
+        return updated
+
+    def discard_rescored(self) -> None:
+        with self._connect() as connection:
+            connection.execute("DROP TABLE IF EXISTS temp.rescored")
+
+    def generation(self) -> Optional[float]:
+        """Time of the latest write, from the indexed fetched_at columns; changes whenever stored data does."""
+        return self._connect().execute(
+            "SELECT MAX(COALESCE((SELECT MAX(fetched_at) FROM posts), 0), "
+            "COALESCE((SELECT MAX(fetched_at) FROM fetches), 0))"
+        ).fetchone()[0] or None
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def import_json(self, path: str, window: Optional[str] = None) -> int:
+        """Load a legacy JSON cache file, dated by its modification time; 0 if absent or unreadable."""
+        try:
+            with open(path, 'rb') as f:
+                data = load(f)
+        except (OSError, ValueError):
+            return 0
+        # health_misinfo_tracker wrapped its list as {"timestamp": ..., "data": [...]}
+        posts = data.get("data", []) if isinstance(data, dict) else data
+        fetched_at = data.get("timestamp") if isinstance(data, dict) else os.path.getmtime(path)
+        return self.save_posts(posts, window, fetched_at)
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+_store: Optional[PostStore] = None
+_lock = threading.Lock()
+
+
+def get_store() -> PostStore:
+    """Process-wide store at POST_STORE_PATH, created on first use."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = PostStore()
+    return _store
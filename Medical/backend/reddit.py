@@ -1,5 +1,4 @@
 import os
-import json
 import time
 import logging
 import datetime
@@ -7,16 +6,13 @@ import praw
 import prawcore.exceptions
 from typing import List, Dict, Any
 from dotenv import load_dotenv
+from log_config import setup_logging
+from misinfo_classifier import contains_potential_misinformation, confidence_fields
+from semantic_classifier import annotate_posts
+from post_store import get_store
 
 # Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("reddit_extract.log"),
-        logging.StreamHandler()
-    ]
-)
+setup_logging("reddit_extract.log")
 logger = logging.getLogger("reddit_extract")
 
 # Load environment variables
@@ -66,71 +62,6 @@ def make_reddit_api_call(api_call, max_retries=3, initial_delay=2):
                 raise
     raise Exception("Max retries exceeded for Reddit API call")
 
-# Misinformation detection logic (copied from app.py)
-def contains_potential_misinformation(text: str) -> Dict[str, Any]:
-    """Detect potential misinformation in text related to health topics."""
-    misinformation_patterns = [
-        {"category": "Cancer", "terms": ['cure cancer', 'cures cancer', 'cancer cure', 'fight cancer naturally', 'alternative cancer', 'cancer treatment they', 'cancer fungus', 'baking soda cancer'], "evidence": 'Claims of simple cancer cures contradict established medical understanding that cancer is a complex group of diseases requiring various evidence-based treatments.'},
-        {"category": "Vaccines", "terms": ['vaccine injury', 'vaccine damaged', 'vaccine danger', 'vaccines cause', 'microchip', '5g', 'government track', 'vaccine autism', 'vaccine mercury', 'heavy metals'], "evidence": 'Vaccines undergo rigorous safety testing. Claims linking vaccines to autism have been debunked by large-scale studies. Modern vaccines do not contain microchips.'},
-        {"category": "Detox", "terms": ['detox', 'cleanse', 'toxin', 'flush toxins', 'body cleanse', 'clean your', 'rid your body', 'draw out toxins'], "evidence": 'The concept of "detoxing" is not medically recognized. The body has sophisticated detoxification systems through the liver and kidneys.'},
-        {"category": "Alkaline Treatments", "terms": ['alkaline', 'alkalize', 'ph balance', 'acid environment', 'acidic body', 'alkaline diet', 'ph diet'], "evidence": 'Blood pH is tightly regulated. Consuming alkaline foods cannot significantly change blood pH, and disease states like cancer are not caused by body acidity.'},
-        {"category": "Medical Conspiracies", "terms": ['big pharma', 'what doctors don\'t', 'don\'t want you to know', 'suppressed cure', 'suppressed treatment', 'government hiding', 'medical establishment', 'doctors won\'t tell', 'conspiracy'], "evidence": 'Conspiracy theories about hidden cures contradict the open nature of scientific research and regulatory processes.'},
-        {"category": "Miracle Cures", "terms": ['miracle', 'cure all', 'magical', 'ancient secret', 'secret cure', 'one simple', 'this one trick', 'doctors hate', 'breakthrough they'], "evidence": 'Claims of "miracle cures" lack scientific evidence and exploit hope among vulnerable populations.'},
-        {"category": "Natural Remedy Exaggeration", "terms": ['natural cure', 'heal yourself', 'natural treatment', 'essential oil cure', 'herbal cure', 'ancient remedy', 'superfood cure'], "evidence": 'While some natural substances have medicinal properties, claims of curing serious conditions often lack scientific support.'},
-        {"category": "COVID-19", "terms": ['covid hoax', 'plandemic', 'covid conspiracy', 'coronavirus fake', 'fake virus', 'covid cure', 'covid prevention', 'prevents covid'], "evidence": 'COVID-19 is a well-documented viral disease caused by SARS-CoV-2, studied extensively worldwide.'},
-        {"category": "Alternative Medicine Claims", "terms": ['homeopathy cure', 'alternative medicine cure', 'acupuncture cure', 'energy healing', 'quantum healing', 'vibrational medicine', 'frequency healing'], "evidence": 'Claims of curing serious diseases with alternative therapies often lack rigorous scientific evidence.'},
-        {"category": "Supplement Claims", "terms": ['vitamin c cure', 'megadose', 'vitamin d cure', 'zinc cure', 'supplement cure', 'boost immune system instantly', 'supercharge immunity'], "evidence": 'No supplement has been proven to prevent or cure serious diseases on its own. High doses can cause adverse effects.'},
-        {"category": "Mental Health", "terms": ['depression cure', 'anxiety cure', 'mental health miracle', 'natural depression', 'herbal anxiety', 'cure mental illness'], "evidence": 'Mental health conditions require evidence-based treatments like therapy and medication. Natural remedies may support but not cure.'},
-        {"category": "Women's Health", "terms": ['fertility cure', 'hormone cleanse', 'natural fertility', 'menopause cure', 'pcos cure'], "evidence": 'Women’s health conditions like PCOS or infertility require medical evaluation. Natural remedies alone are insufficient.'}
-    ]
-    
-    lower_text = text.lower()
-    
-    for pattern in misinformation_patterns:
-        for term in pattern["terms"]:
-            if term in lower_text:
-                return {
-                    "isLikelyFalse": True,
-                    "category": pattern["category"],
-                    "evidence": pattern["evidence"]
-                }
-    
-    word_pairs = [
-        {"pair": ['cure', 'disease'], "distance": 10},
-        {"pair": ['prevent', 'disease'], "distance": 10},
-        {"pair": ['secret', 'treatment'], "distance": 15},
-        {"pair": ['natural', 'cure'], "distance": 10},
-        {"pair": ['alternative', 'treatment'], "distance": 10}
-    ]
-    
-    words = lower_text.split()
-    
-    for pair_info in word_pairs:
-        pair = pair_info["pair"]
-        distance = pair_info["distance"]
-        first_word_indices = []
-        
-        for index, word in enumerate(words):
-            if pair[0] in word:
-                first_word_indices.append(index)
-        
-        for index in first_word_indices:
-            start_range = max(0, index - distance)
-            end_range = min(len(words) - 1, index + distance)
-            
-            for i in range(start_range, end_range + 1):
-                if pair[1] in words[i]:
-                    return {
-                        "isLikelyFalse": True,
-                        "category": "Health Claims",
-                        "evidence": "This post contains language patterns associated with medical misinformation."
-                    }
-    
-    return {
-        "isLikelyFalse": False,
-        "evidence": "This post doesn't contain common misinformation markers."
-    }
-
 # Extract content from Reddit posts
 def extract_reddit_posts() -> List[Dict[str, Any]]:
     """Extract content from specified Reddit posts."""
@@ -190,9 +121,8 @@ def extract_reddit_posts() -> List[Dict[str, Any]]:
                 "category": potential_misinformation.get("category", "General Health"),
                 "evidence": potential_misinformation["evidence"],
                 "created_at": datetime.datetime.fromtimestamp(post.created_utc).isoformat(),
-                "false_confidence": 0.85 + (0.15 * (engagement_score / 1000)),
-                "true_confidence": 0.15 - (0.05 * (engagement_score / 1000)),
-                "not_known_confidence": 0.05 - (0.01 * (engagement_score / 1000))
+                "labels": list(potential_misinformation["labels"]),
+                **confidence_fields(potential_misinformation)
             }
             
             processed_posts.append(post_data)
@@ -209,6 +139,9 @@ def extract_reddit_posts() -> List[Dict[str, Any]]:
             logger.error(f"Error fetching post {url}: {e}")
             continue
 
+    # Semantic pass over the whole batch catches paraphrases the keyword rules miss
+    annotate_posts(processed_posts)
+
     # Sort by misinformation status and engagement
     processed_posts.sort(key=lambda x: (-1 if x["isFalse"] else 0, -x["engagementScore"]))
     
@@ -217,23 +150,22 @@ def extract_reddit_posts() -> List[Dict[str, Any]]:
     
     return processed_posts
 
-# Save posts to JSON file
-def save_posts_to_file(posts: List[Dict[str, Any]], filename: str = "cached_posts_week.json"):
-    """Save posts to a JSON file."""
+# Save posts to the post store
+def save_posts(posts: List[Dict[str, Any]], time_filter: str = "week"):
+    """Store posts and mark the time window as freshly fetched for app.py."""
     try:
-        with open(filename, 'w') as f:
-            json.dump(posts, f, indent=2)
-        logger.info(f"Saved {len(posts)} posts to {filename}")
+        get_store().save_posts(posts, window=time_filter)
+        logger.info(f"Saved {len(posts)} posts to {get_store().path}")
     except Exception as e:
-        logger.error(f"Error saving posts to {filename}: {e}")
+        logger.error(f"Error saving posts to the post store: {e}")
 
 # Main execution
 if __name__ == "__main__":
     try:
         posts = extract_reddit_posts()
         if posts:
-            save_posts_to_file(posts)
+            save_posts(posts)
         else:
-            logger.warning("No posts fetched, output file not created")
+            logger.warning("No posts fetched, nothing stored")
     except Exception as e:
         logger.error(f"Program failed: {e}")
\ No newline at end of file
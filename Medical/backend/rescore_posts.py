@@ -0,0 +1,157 @@
+# Medical/backend/rescore_posts.py
+"""Offline re-scoring of every stored post with the current classifiers.
+
+Posts keep the isFalse/category/confidence values they were given at fetch
+time. After a rule table or scoring change, this job streams the whole post
+store through the keyword rules, the semantic classifier and the
+engagement formula again:
+
+    python rescore_posts.py                      # all cores, semantic pass on
+    python rescore_posts.py --workers 8 --chunk-size 2000 --no-semantic
+    python rescore_posts.py --dry-run            # report what would change
+
+Chunks of rows are read by keyset and handed to a process pool, and at
+most two chunks per worker are in flight, so memory stays flat however
+large the store is. Results are staged on the job's connection and
+applied in a single transaction at the end. Readers see either the old
+scores or the new ones, never a mix. A post refetched while the job runs
+keeps its fresher data. The running app replays its trend and engagement
+summaries from the store at startup, so restart it to pick up re-scored
+categories there.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+from collections import deque
+from typing import List, Dict, Any, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from log_config import setup_logging
+from misinfo_classifier import contains_potential_misinformation, confidence_fields, rules_version
+from semantic_classifier import annotate_posts, get_model
+from serialization import loads
+from post_store import get_store
+
+logger = logging.getLogger(__name__)
+
+_semantic = True
+
+
+def engagement_score(post: Dict[str, Any]) -> float:
+    """Engagement score of a stored post record, the formula fetch_health_misinformation_posts applies to submissions."""
+    return (post.get("score") or 0) + (post.get("comments") or 0) * 2 + (post.get("awards") or 0) * 1.5
+
+
+def rescore_post(post: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace a post's keyword classification and engagement score with freshly computed ones."""
+    content = post.get("content") or ""
+    result = contains_potential_misinformation(post.get("title", "") + " " + content)
+    for field in ("semantic_category", "semantic_similarity", "semantic_margin"):
+        post.pop(field, None)
+    post.update({
+        "engagementScore": engagement_score(post),
+        "isFalse": result["isLikelyFalse"],
+        "category": result.get("category", "General Health"),
+        "evidence": result["evidence"],
+        "labels": list(result["labels"]),
+        **confidence_fields(result)
+    })
+    return post
+
+
+def _init_worker(semantic: bool) -> None:
+    global _semantic
+    _semantic = semantic
+    # Each worker loads the rules (and the sentence model) once, not once per chunk
+    if semantic:
+        get_model()
+
+
+def rescore_chunk(rows: List[Tuple[str, float, str]]) -> Tuple[List[Tuple[str, float, Dict[str, Any]]], Dict[str, int]]:
+    """Worker: re-score one chunk of (id, fetched_at, data) rows; returns the records and change counts."""
+    ids, stamps, posts, before = [], [], [], []
+    for key_id, fetched_at, data in rows:
+        post = loads(data)
+        before.append((bool(post.get("isFalse")), post.get("category"), post.get("false_confidence")))
+        ids.append(key_id)
+        stamps.append(fetched_at)
+        posts.append(rescore_post(post))
+    if _semantic and posts:
+        annotate_posts(posts)
+
+    changes = {"posts": len(posts), "label_changed": 0, "category_changed": 0, "confidence_changed": 0}
+    for post, (was_false, category, false_confidence) in zip(posts, before):
+        changes["label_changed"] += bool(post.get("isFalse")) != was_false
+        changes["category_changed"] += post.get("category") != category
+        changes["confidence_changed"] += post.get("false_confidence") != false_confidence
+    return list(zip(ids, stamps, posts)), changes
+
+
+def run(workers: int, chunk_size: int, semantic: bool = True, dry_run: bool = False) -> Dict[str, Any]:
+    """Re-score the whole store and return totals with throughput."""
+    store = get_store()
+    total = store.count()
+    totals = {"posts": 0, "label_changed": 0, "category_changed": 0, "confidence_changed": 0}
+    logger.info(f"Re-scoring {total} posts with rules v{rules_version()} on {workers} workers")
+    start = time.perf_counter()
+    last_report = start
+
+    def collect(result) -> None:
+        nonlocal last_report
+        records, changes = result.get()
+        for key, value in changes.items():
+            totals[key] += value
+        if not dry_run:
+            store.stage_rescored(records)
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            rate = totals["posts"] / (now - start)
+            print(f"  {totals['posts']}/{total} posts, {rate:.0f} posts/sec")
+
+    store.discard_rescored()
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(semantic,)) as pool:
+        pending = deque()
+        # Bounded window of chunks in flight; imap would read the whole table ahead of the workers
+        for rows in store.iter_chunks(chunk_size):
+            pending.append(pool.apply_async(rescore_chunk, (rows,)))
+            if len(pending) >= 2 * workers:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+
+    scored = time.perf_counter() - start
+    totals["updated"] = store.apply_rescored() if not dry_run else 0
+    elapsed = time.perf_counter() - start
+    totals.update({
+        "rules_version": rules_version(),
+        "seconds": round(elapsed, 2),
+        "apply_seconds": round(elapsed - scored, 2),
+        "posts_per_sec": round(totals["posts"] / elapsed, 1) if elapsed else 0.0,
+        "dry_run": dry_run
+    })
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score every stored post with the current classifiers.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Posts per work unit")
+    parser.add_argument('--no-semantic', action='store_true', help="Skip the embedding classifier pass")
+    parser.add_argument('--dry-run', action='store_true', help="Score and report without writing back")
+    args = parser.parse_args()
+
+    setup_logging("rescore_posts.log")
+    totals = run(max(1, args.workers), max(1, args.chunk_size), not args.no_semantic, args.dry_run)
+    print(f"Re-scored {totals['posts']} posts in {totals['seconds']}s "
+          f"({totals['posts_per_sec']} posts/sec, write-back {totals['apply_seconds']}s)")
+    print(f"  isFalse changed: {totals['label_changed']}, category changed: {totals['category_changed']}, "
+          f"confidence changed: {totals['confidence_changed']}, rows updated: {totals['updated']}"
+          + (" (dry run)" if totals['dry_run'] else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+# Medical/backend/semantic_classifier.py
+"""Embedding-based misinformation classifier for Reddit posts.
+
+Catches paraphrases the keyword rules miss ("lemon water kills tumors") by
+comparing post embeddings against one centroid per rule category. Each
+centroid is the weighted mean of the category's term embeddings plus its
+evidence text. Centroids are built once per rule table version, so
+classifying a batch is one encode call and one matrix multiply. Long posts
+are split into overlapping sentence windows (see ``text_chunking``) and the
+chunk scores are pooled back to one row per post.
+
+A post is flagged only when its best category clears SEMANTIC_THRESHOLD
+*and* beats a "benign" centroid by SEMANTIC_MARGIN. The benign centroid
+averages ordinary health talk (BENIGN_TEXTS). Everyday posts about diet or
+vaccines share their topic with the category centroids and can score close
+to the threshold on topic alone. The margin requires a post to sit closer
+to a misinformation category than to sound advice on the same subject.
+The threshold itself is an absolute cosine that has not been calibrated
+against labelled posts, so the margin is what keeps it from firing on
+topic matches:
+
+    from semantic_classifier import annotate_posts
+    annotate_posts(processed_posts)
+
+Environment variables:
+
+    SEMANTIC_CLASSIFIER=1         set to 0 to skip the stage
+    SEMANTIC_MODEL=all-MiniLM-L6-v2
+    SEMANTIC_THRESHOLD=0.55       cosine similarity needed to flag a post
+    SEMANTIC_MARGIN=0.05          lead over the benign centroid needed to flag a post
+    SEMANTIC_BATCH_SIZE=64        encoder batch size
+    SEMANTIC_POOLING=max          max: best chunk decides; mean: averaged chunk embeddings
+"""
+import os
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from instrumentation import timed
+from misinfo_classifier import get_rules, confidence_fields
+from text_chunking import chunk_texts, pool
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get('SEMANTIC_CLASSIFIER', '1') != '0'
+MODEL_NAME = os.environ.get('SEMANTIC_MODEL', 'all-MiniLM-L6-v2')
+THRESHOLD = float(os.environ.get('SEMANTIC_THRESHOLD', '0.55'))
+MARGIN = float(os.environ.get('SEMANTIC_MARGIN', '0.05'))
+BATCH_SIZE = int(os.environ.get('SEMANTIC_BATCH_SIZE', '64'))
+POOLING = os.environ.get('SEMANTIC_POOLING', 'max').lower()
+
+_model = None
+_model_failed = False
+_lock = threading.Lock()
+_centroids = None
+
+# Mainstream health statements on the topics the rule categories cover
+BENIGN_TEXTS = (
+    "Vaccines are tested in clinical trials and approved by health authorities",
+    "Talk to your doctor before starting or stopping any medication",
+    "Eating fruit and vegetables and exercising regularly supports good health",
+    "Cancer is treated with surgery, chemotherapy, radiation or immunotherapy",
+    "Antibiotics treat bacterial infections but not viruses like the flu",
+    "Drinking enough water and getting enough sleep helps you recover",
+    "Wash your hands and stay home when you are sick to avoid spreading infection",
+    "Follow the dosage on the label and ask a pharmacist about side effects",
+)
+
+
+class CentroidMatrix:
+    """Unit-length category centroids and the benign centroid for one rule table and encoder."""
+
+    def __init__(self, labels: List[str], evidence: List[str], matrix: np.ndarray, rules_version: int,
+                 benign: np.ndarray):
+        self.labels = labels
+        self.evidence = evidence
+        self.matrix = matrix
+        self.rules_version = rules_version
+        self.benign = benign
+        # Benign centroid stacked as the last row, so one multiply scores both
+        self.scoring = np.vstack([matrix, benign[None, :]])
+
+
+def get_model():
+    """Load the sentence model on first use; None if it is unavailable or disabled."""
+    global _model, _model_failed
+    if not ENABLED or _model_failed:
+        return None
+    if _model is None:
+        with _lock:
+            if _model is None and not _model_failed:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(MODEL_NAME)
+                    logger.info(f"Loaded semantic classifier model {MODEL_NAME}")
+                except Exception as e:
+                    logger.error(f"Semantic classifier disabled, could not load {MODEL_NAME}: {e}")
+                    _model_failed = True
+    return _model
+
+
+def build_centroids(model, rules=None) -> CentroidMatrix:
+    """Encode every rule term and evidence text and average them per category, plus the benign centroid."""
+    rules = rules or get_rules()
+    grouped: Dict[int, List[Any]] = {}
+    for term, (index, weight) in rules.term_index.items():
+        grouped.setdefault(index, []).append((term, weight))
+
+    indices = sorted(grouped)
+    texts, weights, owners = [], [], []
+    for row, index in enumerate(indices):
+        for term, weight in grouped[index]:
+            texts.append(term)
+            weights.append(weight)
+            owners.append(row)
+        texts.append(rules.evidence[index])
+        weights.append(1.0)
+        owners.append(row)
+    for text in BENIGN_TEXTS:
+        texts.append(text)
+        weights.append(1.0)
+        owners.append(len(indices))
+
+    embeddings = np.asarray(model.encode(texts, batch_size=BATCH_SIZE, show_progress_bar=False,
+                                         convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+    matrix = np.zeros((len(indices) + 1, embeddings.shape[1]), dtype=np.float32)
+    np.add.at(matrix, owners, embeddings * np.asarray(weights, dtype=np.float32)[:, None])
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    return CentroidMatrix([rules.labels[i] for i in indices], [rules.evidence[i] for i in indices],
+                          matrix[:-1], rules.version, benign=matrix[-1])
+
+
+def get_centroids(model) -> CentroidMatrix:
+    """Centroids for the active rule table, rebuilt when the rules or model change."""
+    global _centroids
+    rules = get_rules()
+    cached = _centroids
+    if cached is None or cached[0] is not rules or cached[1] is not model:
+        with timed("semantic_centroids"):
+            cached = (rules, model, build_centroids(model, rules))
+        _centroids = cached
+        logger.info(f"Built {len(cached[2].labels)} semantic centroids for rules v{rules.version}")
+    return cached[2]
+
+
+def classify_texts(texts: List[str], model=None, threshold: float = THRESHOLD,
+                   pooling: str = POOLING, margin: float = MARGIN) -> Optional[List[Dict[str, Any]]]:
+    """Nearest category centroid for each text and its lead over the benign centroid; None without a model."""
+    model = model or get_model()
+    if model is None:
+        return None
+    if not texts:
+        return []
+    centroids = get_centroids(model)
+    with timed("semantic_classify"):
+        # Every chunk of the batch goes through the encoder together
+        chunks, owners = chunk_texts(texts)
+        embeddings = np.asarray(model.encode(chunks, batch_size=BATCH_SIZE, show_progress_bar=False,
+                                             convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+        if pooling == "mean":
+            embeddings = pool(embeddings, owners, len(texts), "mean")
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        scores = embeddings @ centroids.scoring.T
+        similarities = scores[:, :-1]
+        # Lead is measured within each chunk, so a benign paragraph cannot mask a false one
+        leads = similarities - scores[:, -1:]
+        if pooling != "mean":
+            similarities = pool(similarities, owners, len(texts), "max")
+            leads = pool(leads, owners, len(texts), "max")
+        best = similarities.argmax(axis=1)
+        rows = np.arange(len(texts))
+        best_scores = similarities[rows, best]
+        best_leads = leads[rows, best]
+    return [
+        {
+            "isLikelyFalse": bool(score >= threshold and lead >= margin),
+            "category": centroids.labels[index],
+            "evidence": centroids.evidence[index],
+            "similarity": round(float(score), 4),
+            "margin": round(float(lead), 4)
+        }
+        for index, score, lead in zip(best.tolist(), best_scores.tolist(), best_leads.tolist())
+    ]
+
+
+def annotate_posts(posts: List[Dict[str, Any]], model=None, threshold: float = THRESHOLD) -> List[Dict[str, Any]]:
+    """Add semantic labels to post records and flag posts the keyword rules missed."""
+    results = classify_texts([post["title"] + "\n" + (post.get("content") or "") for post in posts],
+                             model, threshold)
+    if results is None:
+        return posts
+    for post, result in zip(posts, results):
+        post["semantic_category"] = result["category"]
+        post["semantic_similarity"] = result["similarity"]
+        post["semantic_margin"] = result["margin"]
+        if result["isLikelyFalse"] and not post.get("isFalse"):
+            post["isFalse"] = True
+            post["category"] = result["category"]
+            post["evidence"] = result["evidence"]
+            post.setdefault("labels", []).append(
+                {"category": result["category"], "score": result["similarity"], "source": "semantic"}
+            )
+            post.update(confidence_fields({"isLikelyFalse": True, "confidence": result["similarity"]}))
+    return posts
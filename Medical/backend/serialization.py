@@ -0,0 +1,116 @@
+# Medical/backend/serialization.py
+"""JSON encoding for API responses, the post store and log payloads.
+
+Uses orjson when it is installed and the standard library otherwise. Every
+caller goes through the same functions, so the backend can be switched
+without touching them:
+
+    data = dumps_bytes(posts)       # bytes, for HTTP bodies
+    text = dumps(post)              # str, for SQLite columns and log lines
+    posts = loads(data)             # accepts str or bytes
+
+``init_app(app)`` installs a Flask JSON provider on top of these, so
+``jsonify`` and ``request.get_json`` use the same backend.
+
+Both backends emit compact output with non-ASCII text left as UTF-8.
+``indent=2`` is honoured for debugging. Values neither backend knows
+(sets, Decimals, numpy scalars on the stdlib path) go through
+``_default``. The differences that remain are that orjson writes NaN as
+null and datetimes as RFC 3339.
+
+Environment variables:
+
+    JSON_BACKEND=auto    auto (orjson if installed), orjson or json
+"""
+import io
+import os
+import json
+import decimal
+import logging
+import datetime
+from typing import Any, IO, Union
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_requested = os.environ.get('JSON_BACKEND', 'auto').lower()
+if _requested == 'orjson' and orjson is None:
+    logger.warning("JSON_BACKEND=orjson but orjson is not installed; using the json module")
+BACKEND = "orjson" if orjson is not None and _requested in ("auto", "orjson") else "json"
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for values the encoder has no native representation for."""
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    # numpy scalars and arrays on the stdlib path
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Encode obj as UTF-8 JSON bytes."""
+    if BACKEND == "orjson":
+        return orjson.dumps(obj, default=_default,
+                            option=_ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+    return dumps(obj, indent).encode('utf-8')
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode obj as a JSON string."""
+    if BACKEND == "orjson":
+        return dumps_bytes(obj, indent).decode('utf-8')
+    return json.dumps(obj, default=_default, ensure_ascii=False,
+                      indent=2 if indent else None, separators=None if indent else (',', ':'))
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Decode JSON from str or bytes."""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def load(f: IO) -> Any:
+    """Decode a JSON file opened in text or binary mode."""
+    return loads(f.read())
+
+
+def dump(obj: Any, f: IO, indent: bool = False) -> None:
+    """Write obj as JSON to a file opened in text or binary mode."""
+    f.write(dumps(obj, indent) if isinstance(f, io.TextIOBase) else dumps_bytes(obj, indent))
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by this module, so jsonify skips the stdlib encoder."""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, bool(kwargs.get("indent")))
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def init_app(app) -> None:
+    """Route a Flask app's JSON encoding and decoding through this module."""
+    app.json = FastJSONProvider(app)
+    logger.info(f"JSON backend: {BACKEND}")
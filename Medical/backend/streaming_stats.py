@@ -0,0 +1,197 @@
+# Medical/backend/streaming_stats.py
+"""Streaming engagement summaries with percentile sketches.
+
+Reddit engagement is heavy-tailed, so a mean says little. Every post is
+folded once into a running count/sum/min/max plus a DDSketch for overall,
+per misinformation label and per category. /api/stats then reads p50/p90/p99
+from the sketches in time bounded by the sketch size, however many posts
+have been seen:
+
+    stats = EngagementStats()
+    stats.ingest(new_posts)
+    stats.snapshot()["overall"]["p90"]
+
+A DDSketch maps each value to a logarithmic bucket, so every quantile it
+reports is within ``relative_accuracy`` of the true value. Once
+``max_bins`` buckets are in use, the lowest buckets are merged, which
+costs accuracy only in the bottom tail.
+
+Environment variables:
+
+    STATS_RELATIVE_ACCURACY=0.01   relative error bound of reported quantiles
+    STATS_MAX_BINS=2048            buckets per sketch before the lowest are merged
+"""
+import os
+import math
+import logging
+import threading
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RELATIVE_ACCURACY = float(os.environ.get('STATS_RELATIVE_ACCURACY', '0.01'))
+MAX_BINS = int(os.environ.get('STATS_MAX_BINS', '2048'))
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+# Values this close to zero share the zero bucket
+MIN_INDEXABLE = 1e-9
+
+
+class DDSketch:
+    """Quantile sketch with relative-error guarantees (Masson et al., VLDB 2019)."""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY, max_bins: int = MAX_BINS):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        if value > MIN_INDEXABLE:
+            bins = self.positive
+            key = self._key(value)
+        elif value < -MIN_INDEXABLE:
+            bins = self.negative
+            key = self._key(-value)
+        else:
+            self.zero_count += weight
+            self.count += weight
+            return
+        bins[key] = bins.get(key, 0) + weight
+        self.count += weight
+        if len(self.positive) + len(self.negative) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        # Fold the lowest values into their neighbour: the most negative first, then the smallest positive
+        bins, lowest = (self.negative, max(self.negative)) if self.negative else (self.positive, min(self.positive))
+        count = bins.pop(lowest)
+        if bins:
+            neighbour = max(bins) if bins is self.negative else min(bins)
+            bins[neighbour] += count
+        else:
+            self.zero_count += count
+
+    def merge(self, other: "DDSketch") -> None:
+        """Add another sketch with the same relative accuracy into this one."""
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        while len(self.positive) + len(self.negative) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile, or None for an empty sketch."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+
+class RunningSummary:
+    """Count, sum, min, max and a quantile sketch of one stream of values."""
+
+    __slots__ = ("count", "total", "minimum", "maximum", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.sketch = DDSketch()
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.sketch.add(value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = {"count": self.count, "mean": round(self.mean, 2)}
+        for name, q in QUANTILES:
+            value = self.sketch.quantile(q)
+            # The extremes are tracked exactly, so estimates never leave the observed range
+            summary[name] = round(min(max(value, self.minimum), self.maximum), 2) if value is not None else 0
+        summary["min"] = round(self.minimum, 2) if self.count else 0
+        summary["max"] = round(self.maximum, 2) if self.count else 0
+        return summary
+
+
+class EngagementStats:
+    """Engagement summaries overall, per misinformation label and per category."""
+
+    def __init__(self):
+        self.overall = RunningSummary()
+        self.by_label = {"misinformation": RunningSummary(), "verified": RunningSummary()}
+        self.by_category: Dict[str, RunningSummary] = {}
+        self._lock = threading.Lock()
+
+    def add(self, category: Optional[str], is_false: bool, engagement: float) -> None:
+        category = category or "Uncategorized"
+        engagement = float(engagement or 0)
+        with self._lock:
+            self.overall.add(engagement)
+            self.by_label["misinformation" if is_false else "verified"].add(engagement)
+            summary = self.by_category.get(category)
+            if summary is None:
+                summary = self.by_category[category] = RunningSummary()
+            summary.add(engagement)
+
+    def ingest(self, posts: Iterable[Dict[str, Any]]) -> int:
+        """Fold in posts; callers pass each post once, e.g. only those new to the post store."""
+        added = 0
+        for post in posts:
+            self.add(post.get("category"), bool(post.get("isFalse")), post.get("engagementScore", 0))
+            added += 1
+        return added
+
+    def load(self, rows: Iterable[Tuple[Optional[str], Any, float]]) -> int:
+        """Replay (category, is_false, engagement) rows, e.g. from the post store at startup."""
+        added = 0
+        for category, is_false, engagement in rows:
+            self.add(category, bool(is_false), engagement)
+            added += 1
+        logger.info(f"Engagement stats loaded {added} posts")
+        return added
+
+    @property
+    def count(self) -> int:
+        return self.overall.count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summaries of every stream; categories ordered by post count."""
+        with self._lock:
+            categories = sorted(self.by_category.items(), key=lambda item: (-item[1].count, item[0]))
+            return {
+                "overall": self.overall.to_dict(),
+                "labels": {label: summary.to_dict() for label, summary in self.by_label.items()},
+                "categories": [dict(summary.to_dict(), name=name) for name, summary in categories]
+            }
@@ -0,0 +1,151 @@
+# Medical/backend/submission_adapter.py
+"""Fetch-free access to PRAW submissions from search listings.
+
+PRAW submissions are lazy. Reading an attribute that the listing JSON did
+not include, or calling ``hasattr`` on one, makes PRAW fetch the whole
+submission with one more Reddit request. ``post.author.name`` can do the
+same for the author. The adapter reads only what the listing already put
+in ``vars(submission)``, and the related Redditor and Subreddit objects
+are read the same way:
+
+    adapter = SubmissionAdapter(submission, stats)
+    if adapter.engagement >= min_engagement_score:
+        adapter.author_name, adapter.subreddit_name, adapter.selftext
+
+Fields that are missing from the listing fall back to the defaults the
+crawlers used before ("Unknown", "r/unknown", "", 0). The exception is
+the identifying fields (id, title, permalink, created_utc). Without them
+there is no post, so the adapter does the lazy fetch once and counts it
+in ``CrawlStats.lazy_fetches`` and ``reddit_lazy_fetches_total``.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from instrumentation import inc, registry
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("id", "title", "permalink", "created_utc")
+LAZY_FETCHES = registry.histogram("reddit_lazy_fetches_per_crawl",
+                                  "Extra submission fetches a crawl needed beyond its search listings.",
+                                  (0, 1, 2, 5, 10, 25, 50, 100, 250))
+
+
+class CrawlStats:
+    """Per-crawl counts of submissions seen, dropped by the engagement filter and fetched lazily."""
+
+    __slots__ = ("seen", "below_engagement", "lazy_fetches")
+
+    def __init__(self):
+        self.seen = 0
+        self.below_engagement = 0
+        self.lazy_fetches = 0
+
+    def record(self) -> None:
+        """Export the crawl's totals to metrics."""
+        inc("ingest_submissions_total", self.seen - self.below_engagement, result="kept")
+        inc("ingest_submissions_total", self.below_engagement, result="below_engagement")
+        LAZY_FETCHES.labels().observe(self.lazy_fetches)
+        logger.info(f"Crawl read {self.seen} submissions, {self.below_engagement} below the engagement minimum, "
+                    f"{self.lazy_fetches} lazy fetches")
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"seen": self.seen, "below_engagement": self.below_engagement, "lazy_fetches": self.lazy_fetches}
+
+
+def _listing_fields(obj: Any) -> Dict[str, Any]:
+    try:
+        return vars(obj)
+    except TypeError:
+        return {}
+
+
+class SubmissionAdapter:
+    """Read-only view of a PRAW submission over the fields its listing already carries."""
+
+    __slots__ = ("submission", "_fields", "_stats", "_fetched")
+
+    def __init__(self, submission: Any, stats: Optional[CrawlStats] = None):
+        self.submission = submission
+        self._fields = _listing_fields(submission)
+        self._stats = stats
+        self._fetched = False
+
+    def _get(self, name: str, default: Any = None) -> Any:
+        value = self._fields.get(name, default)
+        return default if value is None else value
+
+    def _required(self, name: str) -> Any:
+        if name in self._fields:
+            return self._fields[name]
+        if not self._fetched:
+            self._fetched = True
+            if self._stats is not None:
+                self._stats.lazy_fetches += 1
+            inc("reddit_lazy_fetches_total", field=name)
+            logger.debug(f"Listing lacked '{name}', fetching submission {self._fields.get('id', 'unknown')}")
+        # PRAW fetches on first access and refreshes __dict__, so later fields are read without a request
+        value = getattr(self.submission, name)
+        self._fields = _listing_fields(self.submission)
+        return value
+
+    @property
+    def id(self) -> str:
+        return self._required("id")
+
+    @property
+    def title(self) -> str:
+        return self._required("title")
+
+    @property
+    def permalink(self) -> str:
+        return self._required("permalink")
+
+    @property
+    def created_utc(self) -> float:
+        return self._required("created_utc")
+
+    @property
+    def selftext(self) -> str:
+        return self._get("selftext", "")
+
+    @property
+    def score(self) -> int:
+        return self._get("score", 0)
+
+    @property
+    def num_comments(self) -> int:
+        return self._get("num_comments", 0)
+
+    @property
+    def total_awards_received(self) -> int:
+        return self._get("total_awards_received", 0)
+
+    @property
+    def stickied(self) -> bool:
+        return bool(self._get("stickied", False))
+
+    @property
+    def engagement(self) -> float:
+        """Engagement score from listing counts alone, cheap enough to filter on before anything else."""
+        return self.score + self.num_comments * 2 + self.total_awards_received * 1.5
+
+    @property
+    def author_name(self) -> str:
+        author = self._fields.get("author")
+        if author is None:
+            return "Unknown"
+        if isinstance(author, str):
+            return author
+        return _listing_fields(author).get("name") or "Unknown"
+
+    @property
+    def subreddit_name(self) -> str:
+        prefixed = self._fields.get("subreddit_name_prefixed")
+        if prefixed:
+            return prefixed
+        subreddit = self._fields.get("subreddit")
+        if subreddit is None:
+            return "r/unknown"
+        name = subreddit if isinstance(subreddit, str) else _listing_fields(subreddit).get("display_name")
+        return f"r/{name}" if name else "r/unknown"
@@ -0,0 +1,92 @@
+# Medical/backend/text_chunking.py
+"""Overlapping sentence windows for embedding long Reddit posts.
+
+MiniLM truncates its input at 256 word pieces, so everything past the first
+couple of paragraphs of a long selftext is silently ignored. Posts are split
+into sentence windows that fit the model, every chunk of a batch is encoded
+in one call, and per-chunk rows are pooled back to one row per post:
+
+    chunks, owners = chunk_texts(texts)
+    embeddings = model.encode(chunks, normalize_embeddings=True)
+    per_post = pool(embeddings, owners, len(texts), "mean")
+
+Environment variables:
+
+    CHUNK_WORDS=160               words per window (about 210 MiniLM tokens)
+    CHUNK_OVERLAP_SENTENCES=1     sentences repeated between windows
+    CHUNK_MAX=16                  windows kept per post
+"""
+import os
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+WINDOW_WORDS = int(os.environ.get('CHUNK_WORDS', '160'))
+OVERLAP_SENTENCES = int(os.environ.get('CHUNK_OVERLAP_SENTENCES', '1'))
+MAX_CHUNKS = int(os.environ.get('CHUNK_MAX', '16'))
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def split_sentences(text: str, max_words: int = WINDOW_WORDS) -> List[str]:
+    """Split text into sentences, breaking any sentence longer than max_words."""
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            sentences.append(" ".join(words[start:start + max_words]))
+    return sentences
+
+
+def chunk_text(text: str, window_words: int = WINDOW_WORDS, overlap: int = OVERLAP_SENTENCES,
+               max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """Group sentences into windows of at most window_words, overlapping by whole sentences."""
+    if len(text.split()) <= window_words:
+        return [text]
+    sentences = split_sentences(text, window_words)
+    lengths = [len(sentence.split()) for sentence in sentences]
+    chunks = []
+    start = 0
+    while start < len(sentences):
+        end = start
+        words = 0
+        while end < len(sentences) and (end == start or words + lengths[end] <= window_words):
+            words += lengths[end]
+            end += 1
+        chunks.append(" ".join(sentences[start:end]))
+        if end >= len(sentences):
+            break
+        # Step back by the overlap, but always move forward at least one sentence
+        start = max(start + 1, end - overlap)
+    if len(chunks) > max_chunks:
+        # Keep evenly spaced windows so cost per post stays bounded but the whole post is covered
+        step = (len(chunks) - 1) / (max_chunks - 1) if max_chunks > 1 else 0
+        chunks = [chunks[round(i * step)] for i in range(max_chunks)]
+    return chunks
+
+
+def chunk_texts(texts: List[str], window_words: int = WINDOW_WORDS, overlap: int = OVERLAP_SENTENCES,
+                max_chunks: int = MAX_CHUNKS) -> Tuple[List[str], List[int]]:
+    """Flatten the chunks of a batch of texts; owners[i] is the text index of chunks[i]."""
+    chunks, owners = [], []
+    for index, text in enumerate(texts):
+        text_chunks = chunk_text(text, window_words, overlap, max_chunks)
+        chunks.extend(text_chunks)
+        owners.extend([index] * len(text_chunks))
+    return chunks, owners
+
+
+def pool(rows: np.ndarray, owners: List[int], count: int, mode: str = "mean") -> np.ndarray:
+    """Reduce per-chunk rows to one row per text with mean or max pooling."""
+    owners = np.asarray(owners, dtype=np.intp)
+    if mode == "max":
+        pooled = np.full((count, rows.shape[1]), -np.inf, dtype=rows.dtype)
+        np.maximum.at(pooled, owners, rows)
+        return pooled
+    if mode != "mean":
+        raise ValueError(f"Unknown pooling mode: {mode}")
+    pooled = np.zeros((count, rows.shape[1]), dtype=rows.dtype)
+    np.add.at(pooled, owners, rows)
+    pooled /= np.maximum(np.bincount(owners, minlength=count), 1)[:, None]
+    return pooled
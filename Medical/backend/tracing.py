@@ -0,0 +1,225 @@
+# Medical/backend/tracing.py
+"""Lightweight OpenTelemetry-style spans for the verification pipeline.
+
+Tracing is off by default and every ``span()`` call returns a shared no-op
+object. Enable it with environment variables:
+
+    TRACING_EXPORTER=console|file   (default: none)
+    TRACING_FILE=traces.jsonl       (file exporter target)
+    TRACING_SAMPLE_RATE=0.05        (fraction of root spans recorded)
+
+Sampling is decided once per trace at the root span; children of an
+unsampled trace are no-ops, so unsampled requests pay one random draw.
+A finished trace is exported in a single write when its root span ends.
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import functools
+import contextvars
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _NoopSpan:
+    """Span stand-in used when tracing is disabled or the trace is not sampled."""
+
+    __slots__ = ()
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Marks the context of a trace that lost the sampling draw."""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+class Span:
+    """A timed, attributed unit of work within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "events", "status", "_trace", "_token")
+    recording = True
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        if parent is None:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id = None
+            self._trace: List["Span"] = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self._trace = parent._trace
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.status = "ok"
+        self.start_ns = 0
+        self.end_ns = 0
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self._trace.append(self)
+        if self.parent_id is None and _exporter is not None:
+            try:
+                _exporter.export(self._trace)
+            except Exception as e:
+                logger.warning(f"Failed to export trace {self.trace_id}: {e}")
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.add_event("exception", type=type(exc).__name__, message=str(exc))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events
+        }
+
+
+# Exporters
+class ConsoleExporter:
+    """Writes one JSON line per span to stderr."""
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stderr
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        payload = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock:
+            self._stream.write(payload)
+            self._stream.flush()
+
+
+class FileExporter:
+    """Appends one JSON line per span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        payload = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(payload)
+
+
+_exporter = None
+_sample_rate = 1.0
+
+
+def configure(exporter: Optional[str] = None, sample_rate: Optional[float] = None,
+              path: Optional[str] = None) -> None:
+    """Select the exporter ('none', 'console' or 'file') and root sampling rate."""
+    global _exporter, _sample_rate
+    exporter = (exporter or os.environ.get('TRACING_EXPORTER', 'none')).lower()
+    if sample_rate is None:
+        sample_rate = float(os.environ.get('TRACING_SAMPLE_RATE', '1.0'))
+    _sample_rate = max(0.0, min(1.0, sample_rate))
+    if exporter == 'console':
+        _exporter = ConsoleExporter()
+    elif exporter == 'file':
+        _exporter = FileExporter(path or os.environ.get('TRACING_FILE', 'traces.jsonl'))
+    else:
+        _exporter = None
+
+
+def span(name: str, **attributes):
+    """Start a span as a child of the current one; use as a context manager."""
+    if _exporter is None:
+        return NOOP_SPAN
+    parent = _current_span.get()
+    if parent is None:
+        if _sample_rate < 1.0 and random.random() >= _sample_rate:
+            return _UnsampledRoot()
+        return Span(name, None, attributes)
+    if not parent.recording:
+        return NOOP_SPAN
+    return Span(name, parent, attributes)
+
+
+def current_span():
+    """Return the active span, or the no-op span outside a sampled trace."""
+    active = _current_span.get()
+    return active if active is not None and active.recording else NOOP_SPAN
+
+
+def traced(name: Optional[str] = None):
+    """Decorator that wraps a function call in a span."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+configure()
@@ -0,0 +1,237 @@
+# Medical/backend/trend_engine.py
+"""Time-bucketed counters for rising and falling misinformation topics.
+
+Every ingested post increments an hourly and a daily ring buffer for its
+category, its subreddit and its (category, subreddit) pair, bucketed by the
+post's creation time. Ingesting a post is O(1). A trending query over any
+window costs O(keys x buckets) however many posts were stored, and reports
+for each topic:
+
+    count         posts in the latest window
+    velocity      count minus the previous window's count
+    acceleration  velocity minus the previous window's velocity
+    zscore        current count against earlier windows of the same length
+    anomaly       zscore >= TREND_Z_THRESHOLD with at least TREND_MIN_COUNT posts
+
+Windows up to a quarter of the hourly horizon use hourly buckets; longer
+windows use daily buckets:
+
+    engine.ingest(posts)
+    engine.trending(window=6 * 3600, by="category")
+
+Environment variables:
+
+    TREND_HOURLY_BUCKETS=336     hourly ring length (14 days)
+    TREND_DAILY_BUCKETS=120      daily ring length
+    TREND_Z_THRESHOLD=3.0        z-score flagged as an anomaly
+    TREND_MIN_COUNT=3            posts a window needs before it can be an anomaly
+"""
+import os
+import re
+import math
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from post_store import TIME_WINDOWS, parse_timestamp, post_id
+
+logger = logging.getLogger(__name__)
+
+HOURLY_BUCKETS = int(os.environ.get('TREND_HOURLY_BUCKETS', '336'))
+DAILY_BUCKETS = int(os.environ.get('TREND_DAILY_BUCKETS', '120'))
+Z_THRESHOLD = float(os.environ.get('TREND_Z_THRESHOLD', '3.0'))
+MIN_COUNT = int(os.environ.get('TREND_MIN_COUNT', '3'))
+DIMENSIONS = ("category", "subreddit", "pair")
+SORT_KEYS = ("count", "velocity", "acceleration", "zscore")
+
+_DURATION = re.compile(r'^(\d+(?:\.\d+)?)\s*([smhdw]?)$')
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_window(value: Any) -> float:
+    """Window length in seconds from a time_filter name, "6h"/"3d"-style duration or seconds."""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    elif str(value) in TIME_WINDOWS and TIME_WINDOWS[str(value)]:
+        seconds = float(TIME_WINDOWS[str(value)])
+    else:
+        match = _DURATION.match(str(value).strip().lower())
+        if not match:
+            raise ValueError(f"Invalid window: {value!r}")
+        seconds = float(match.group(1)) * _UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError(f"Invalid window: {value!r}")
+    return seconds
+
+
+class BucketRing:
+    """Counts per key in a fixed number of equal time buckets; old slots are reused as time advances."""
+
+    def __init__(self, width: float, size: int):
+        self.width = width
+        self.size = size
+        self._rows: Dict[Any, int] = {}
+        self._counts = np.zeros((0, size), dtype=np.int32)
+        self.newest: Optional[int] = None
+        self.oldest: Optional[int] = None
+
+    def bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.width)
+
+    def _advance(self, bucket: int) -> None:
+        if self.newest is None:
+            self.newest = self.oldest = bucket
+            return
+        if bucket <= self.newest:
+            return
+        # Slots of the buckets being entered still hold counts from one ring length ago
+        steps = min(bucket - self.newest, self.size)
+        slots = [(self.newest + i) % self.size for i in range(1, steps + 1)]
+        self._counts[:, slots] = 0
+        self.newest = bucket
+        self.oldest = max(self.oldest, bucket - self.size + 1)
+
+    def add(self, key: Any, timestamp: float, now: float) -> bool:
+        """Count one event for key; False if it falls outside the ring."""
+        self._advance(self.bucket(now))
+        bucket = self.bucket(timestamp)
+        if bucket > self.newest or bucket <= self.newest - self.size:
+            return False
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._rows)
+            if row >= self._counts.shape[0]:
+                grown = np.zeros((max(8, 2 * self._counts.shape[0]), self.size), dtype=np.int32)
+                grown[:self._counts.shape[0]] = self._counts
+                self._counts = grown
+        self._counts[row, bucket % self.size] += 1
+        self.oldest = min(self.oldest, bucket)
+        return True
+
+    def series(self, keys: List[Any], now: float) -> Tuple[np.ndarray, int]:
+        """Chronological counts, oldest first, for the buckets up to now, and how many of them hold data."""
+        self._advance(self.bucket(now))
+        if self.newest is None:
+            return np.zeros((len(keys), self.size), dtype=np.int32), 0
+        order = [(self.newest + 1 + i) % self.size for i in range(self.size)]
+        rows = [self._rows[key] for key in keys]
+        return self._counts[np.ix_(rows, order)], self.newest - self.oldest + 1
+
+    def keys(self, dimension: str) -> List[Any]:
+        return [key for key in self._rows if key[0] == dimension]
+
+
+class TrendEngine:
+    """Hourly and daily ring buffers per category, subreddit and pair, fed as posts are ingested."""
+
+    def __init__(self, hourly_buckets: int = HOURLY_BUCKETS, daily_buckets: int = DAILY_BUCKETS,
+                 z_threshold: float = Z_THRESHOLD, min_count: int = MIN_COUNT):
+        self.rings = {"hour": BucketRing(3600, hourly_buckets), "day": BucketRing(86400, daily_buckets)}
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self._seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key_id: str, created_at: Optional[float], category: Optional[str], subreddit: Optional[str],
+            now: Optional[float] = None) -> bool:
+        """Count one post, once per id; False if it was already counted or is too old."""
+        now = now or time.time()
+        created_at = created_at if created_at is not None else now
+        category = category or "Uncategorized"
+        subreddit = subreddit or "unknown"
+        with self._lock:
+            if key_id in self._seen:
+                return False
+            counted = False
+            for ring in self.rings.values():
+                for key in (("category", category), ("subreddit", subreddit), ("pair", category, subreddit)):
+                    counted = ring.add(key, created_at, now) or counted
+            if counted:
+                self._seen[key_id] = created_at
+            return counted
+
+    def ingest(self, posts: Iterable[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """Count posts not seen before; returns how many were new."""
+        now = now or time.time()
+        added = sum(
+            self.add(post_id(post), parse_timestamp(post.get("created_at")), post.get("category"),
+                     post.get("subreddit"), now)
+            for post in posts
+        )
+        self._prune(now)
+        return added
+
+    def load(self, rows: Iterable[Tuple[str, Optional[float], Optional[str], Optional[str]]]) -> int:
+        """Replay (id, created_at, category, subreddit) rows, e.g. from the post store at startup."""
+        now = time.time()
+        added = sum(self.add(*row, now=now) for row in rows)
+        self._prune(now)
+        logger.info(f"Trend engine loaded {added} posts")
+        return added
+
+    def _prune(self, now: float) -> None:
+        # Ids only need remembering while their posts can still be re-ingested into a ring
+        horizon = now - max(ring.width * ring.size for ring in self.rings.values())
+        with self._lock:
+            self._seen = {key_id: created_at for key_id, created_at in self._seen.items() if created_at >= horizon}
+
+    def trending(self, window: float = 7 * 86400, by: str = "category", limit: int = 10,
+                 sort: str = "count", now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Topics of one dimension with their window count, velocity, acceleration and z-score."""
+        if by not in DIMENSIONS:
+            raise ValueError(f"Invalid dimension: {by!r}")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Invalid sort key: {sort!r}")
+        now = now or time.time()
+        hourly = self.rings["hour"]
+        ring = hourly if window <= hourly.width * hourly.size / 4 else self.rings["day"]
+        span = min(max(1, math.ceil(window / ring.width)), ring.size)
+        with self._lock:
+            keys = ring.keys(by)
+            if not keys:
+                return []
+            counts, filled = ring.series(keys, now)
+            pairs = ring.keys("pair") if by == "category" else []
+            pair_counts = ring.series(pairs, now)[0][:, -span:].sum(axis=1) if pairs else None
+
+        # Split the ring, newest first, into consecutive windows of `span` buckets
+        windows = max(1, min(ring.size, filled) // span)
+        sums = counts[:, counts.shape[1] - windows * span:].reshape(len(keys), windows, span).sum(axis=2)
+        # Without history before the first window, velocity and acceleration stay 0
+        current = sums[:, -1]
+        previous = sums[:, -2] if windows > 1 else current
+        before = sums[:, -3] if windows > 2 else previous
+        velocity = current - previous
+        acceleration = velocity - (previous - before) if windows > 2 else np.zeros_like(current)
+        if windows > 1:
+            history = sums[:, :-1]
+            mean = history.mean(axis=1)
+            # Poisson floor keeps quiet topics from flagging on a single post
+            std = np.maximum(history.std(axis=1), np.sqrt(np.maximum(mean, 1.0)))
+            zscore = (current - mean) / std
+        else:
+            zscore = np.zeros(len(keys))
+
+        topics = []
+        for i, key in enumerate(keys):
+            if current[i] == 0 and previous[i] == 0:
+                continue
+            topic = {
+                by: " / ".join(key[1:]),
+                "count": int(current[i]),
+                "previous_count": int(previous[i]),
+                "velocity": int(velocity[i]),
+                "acceleration": int(acceleration[i]),
+                "zscore": round(float(zscore[i]), 3),
+                "anomaly": bool(zscore[i] >= self.z_threshold and current[i] >= self.min_count)
+            }
+            if pair_counts is not None:
+                top = sorted(((int(pair_counts[j]), pair[2]) for j, pair in enumerate(pairs)
+                              if pair[1] == key[1] and pair_counts[j]), reverse=True)[:3]
+                topic["subreddits"] = [{"subreddit": name, "count": count} for count, name in top]
+            topics.append(topic)
+        topics.sort(key=lambda topic: (-topic[sort], topic[by]))
+        return topics[:limit]
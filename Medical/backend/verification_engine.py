@@ -0,0 +1,400 @@
+# Medical/backend/verification_engine.py
+"""Claim verification engine shared by app.py and app2.py.
+
+Verification is retrieval followed by scoring. The two steps are pluggable
+and chosen per profile, so both apps share one copy of the embedding cache,
+the verdict cache, claim segmentation, adaptive retrieval and
+instrumentation:
+
+    engine = create_engine(client, sentence_model, "app")
+    prediction, true_conf, false_conf, not_known_conf = engine.verify_cached(claim)
+
+Retrievers:
+
+    weaviate    nearVector query using the scorer's k and distance cutoff
+    hybrid      the same query fused with BM25 hits from bm25_index
+
+Scorers:
+
+    vote        true/false vote over fact/is_true/category facts, tempered by distance
+    semantic    re-embeds diseaseName/cause/symptoms/measures/cure facts and
+                blends cosine similarity with lexical overlap
+
+Environment variables (PROFILE is APP or APP2; defaults shown as app / app2):
+
+    VERIFY_<PROFILE>_RETRIEVER    weaviate / hybrid
+    VERIFY_<PROFILE>_SCORER       vote / semantic
+    VERIFY_<PROFILE>_SEGMENT      0 / 1; 1 splits compound claims before verifying
+"""
+import os
+import time
+import logging
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from instrumentation import timed, observe, lru_cache_gauge
+from tracing import span, current_span
+from adaptive_retrieval import RetrievalSettings, settings_for, near_vector, record_hits
+from bm25_index import get_index, tokenize, reciprocal_rank_fusion
+from claim_canonicalizer import canonicalize, verdict_cache
+from claim_segmentation import segment_claim
+
+logger = logging.getLogger(__name__)
+
+Verdict = Tuple[str, float, float, float]
+NOT_KNOWN: Verdict = ("not_known", 0.1, 0.1, 0.8)
+ERROR: Verdict = ("error", 0.0, 0.0, 1.0)
+
+FACT_FIELDS = ["diseaseName", "cause", "symptoms", "measures", "cure"]
+PROFILES = {
+    "app": ("weaviate", "vote", False),
+    "app2": ("hybrid", "semantic", True),
+}
+
+
+@lru_cache(maxsize=512)
+def get_embedding(text: str, model) -> List[float]:
+    """Cached sentence embedding of a text."""
+    with timed("encode"):
+        return model.encode(text, show_progress_bar=False).tolist()
+
+lru_cache_gauge("embedding", get_embedding)
+
+
+def cosine_similarity(a, b) -> float:
+    """Cosine similarity of two vectors; 0 for zero-length or malformed input."""
+    try:
+        a_np = np.asarray(a, dtype=float).ravel()
+        b_np = np.asarray(b, dtype=float).ravel()
+        norm_a = np.linalg.norm(a_np)
+        norm_b = np.linalg.norm(b_np)
+        if norm_a == 0 or norm_b == 0:
+            return 0.0
+        return float(np.dot(a_np, b_np) / (norm_a * norm_b))
+    except Exception as e:
+        logger.warning("Error in cosine_similarity: %s", e)
+        return 0.0
+
+
+class Hit:
+    """One retrieved fact: its properties, vector distance and normalized BM25 score."""
+
+    __slots__ = ("properties", "distance", "lexical")
+
+    def __init__(self, properties: Dict[str, Any], distance: Optional[float] = None,
+                 lexical: Optional[float] = None):
+        self.properties = properties
+        self.distance = distance
+        self.lexical = lexical
+
+
+# Retrievers
+class WeaviateRetriever:
+    """Nearest facts by vector, with the distance cutoff applied server-side."""
+
+    name = "weaviate"
+
+    def __init__(self, client, class_name: str = "MedicalFact"):
+        self.client = client
+        self.class_name = class_name
+
+    def _query(self, embedding: List[float], fields: List[str], settings: RetrievalSettings) -> List[Dict[str, Any]]:
+        with span("weaviate_query", limit=settings.k) as query_span, timed("weaviate_query"):
+            response = self.client.query.get(self.class_name, fields) \
+                .with_near_vector(near_vector(embedding, settings)) \
+                .with_limit(settings.k) \
+                .with_additional(["id", "distance"]) \
+                .do()
+            objects = response.get('data', {}).get('Get', {}).get(self.class_name, []) or []
+            query_span.set_attribute("hits_returned", len(objects))
+        return [item for item in objects if isinstance(item, dict)]
+
+    def retrieve(self, claim: str, embedding: List[float], fields: List[str],
+                 settings: RetrievalSettings) -> List[Hit]:
+        return [Hit(item, (item.get('_additional') or {}).get('distance'))
+                for item in self._query(embedding, fields, settings)]
+
+
+class HybridRetriever(WeaviateRetriever):
+    """Vector hits fused with BM25 hits by reciprocal rank; falls back to vector-only without an index."""
+
+    name = "hybrid"
+
+    def retrieve(self, claim: str, embedding: List[float], fields: List[str],
+                 settings: RetrievalSettings) -> List[Hit]:
+        vector_hits = self._query(embedding, fields, settings)
+        index = get_index(self.client, self.class_name)
+        if index is None:
+            return [Hit(item, (item.get('_additional') or {}).get('distance')) for item in vector_hits]
+        with span("bm25_fusion") as fusion_span:
+            hits = self.fuse(claim, vector_hits, index, settings.k)
+            fusion_span.set_attribute("candidates", len(hits))
+        return hits
+
+    @staticmethod
+    def fuse(claim: str, vector_hits: List[Dict[str, Any]], index, limit: int) -> List[Hit]:
+        """Fused candidates, each scored lexically by the fraction of claim terms it contains.
+
+        Coverage does not depend on how well the other candidates match, so the
+        same fact gets the same lexical score whatever else the query retrieved.
+        """
+        lexical_hits = index.search(claim, limit)
+        candidates_by_key: Dict[Any, Dict[str, Any]] = {}
+        vector_ranking = []
+        for position, item in enumerate(vector_hits):
+            doc = index.position((item.get("_additional") or {}).get("id"))
+            key = doc if doc is not None else f"vector-{position}"
+            candidates_by_key[key] = item
+            vector_ranking.append(key)
+        for doc, _ in lexical_hits:
+            candidates_by_key.setdefault(doc, index.documents[doc])
+
+        fused = reciprocal_rank_fusion([vector_ranking, [doc for doc, _ in lexical_hits]])[:limit]
+        query_terms = set(tokenize(claim))
+        hits = []
+        for key, _ in fused:
+            item = candidates_by_key[key]
+            # Vector hits the index has not seen yet fall back to the scorer's own word overlap
+            lexical = index.coverage(query_terms, key) if isinstance(key, int) else None
+            hits.append(Hit(item, (item.get('_additional') or {}).get('distance'), lexical))
+        return hits
+
+
+# Scorers
+class VoteScorer:
+    """Majority of is_true labels among the nearest facts, tempered by their mean distance."""
+
+    name = "vote"
+    endpoint = "compare"
+    fields = ["fact", "is_true", "category"]
+
+    def score(self, claim: str, embedding: List[float], hits: List[Hit],
+              settings: RetrievalSettings) -> Tuple[Verdict, int]:
+        true_count = 0
+        false_count = 0
+        total_distance = 0.0
+        used = 0
+        for hit in hits:
+            used += 1
+            is_true = hit.properties.get('is_true')
+            distance = hit.distance if hit.distance is not None else 1.0
+            total_distance += distance
+            if is_true is True:
+                true_count += 1
+            elif is_true is False:
+                false_count += 1
+            # Hits come nearest first; a near-exact labelled fact settles the vote
+            if settings.stop is not None and distance <= settings.stop and is_true is not None:
+                break
+
+        avg_distance = total_distance / used
+        logger.debug("True: %s, False: %s, Unknown: %s, Avg Distance: %s",
+                     true_count, false_count, used - true_count - false_count, avg_distance)
+
+        if true_count > false_count:
+            prediction = "true"
+            true_confidence = 0.7 + (true_count / used * 0.2) - (avg_distance * 0.1)
+            false_confidence = 0.2 - (true_count / used * 0.1) + (avg_distance * 0.05)
+            not_known_confidence = 0.1
+        elif false_count > true_count:
+            prediction = "false"
+            false_confidence = 0.7 + (false_count / used * 0.2) - (avg_distance * 0.1)
+            true_confidence = 0.2 - (false_count / used * 0.1) + (avg_distance * 0.05)
+            not_known_confidence = 0.1
+        else:
+            prediction = "not_known"
+            not_known_confidence = 0.7 + (avg_distance * 0.1)
+            true_confidence = 0.15 - (avg_distance * 0.05)
+            false_confidence = 0.15 - (avg_distance * 0.05)
+
+        # Ensure confidences sum to 1 and are non-negative
+        total = true_confidence + false_confidence + not_known_confidence
+        return (prediction, max(0, true_confidence / total), max(0, false_confidence / total),
+                max(0, not_known_confidence / total)), used
+
+
+class SemanticScorer:
+    """Best blended semantic/lexical match among the facts, with supporting-evidence counts."""
+
+    name = "semantic"
+    endpoint = "search"
+    fields = FACT_FIELDS
+
+    def __init__(self, model, true_threshold: float = 0.65, false_threshold: float = 0.80):
+        self.model = model
+        self.true_threshold = true_threshold
+        self.false_threshold = false_threshold
+
+    def score(self, claim: str, embedding: List[float], hits: List[Hit],
+              settings: RetrievalSettings) -> Tuple[Verdict, int]:
+        best_match = None
+        supporting_evidence_count = 0
+        used = 0
+        claim_lower = claim.lower()
+        claim_words = set(claim_lower.split())
+        with span("score_hits", hits=len(hits)) as score_span:
+            for hit in hits:
+                used += 1
+                combined_text = " ".join(str(hit.properties.get(field, "")) for field in FACT_FIELDS)
+                if not combined_text.strip():
+                    continue
+                try:
+                    semantic_similarity = cosine_similarity(embedding, get_embedding(combined_text, self.model))
+                except Exception as e:
+                    logger.debug("Error scoring hit: %s", e)
+                    continue
+
+                if hit.lexical is not None:
+                    word_overlap_ratio = hit.lexical
+                elif claim_words:
+                    word_overlap_ratio = len(claim_words & set(combined_text.lower().split())) / len(claim_words)
+                else:
+                    word_overlap_ratio = 0
+
+                match_score = (semantic_similarity * 0.75) + (word_overlap_ratio * 0.25)
+                if best_match is None or match_score > best_match["score"]:
+                    best_match = {"score": match_score, "similarity": semantic_similarity,
+                                  "overlap": word_overlap_ratio}
+                if match_score > 0.60:
+                    supporting_evidence_count += 1
+
+                # A clear-cut match decides the claim; skip re-encoding the remaining hits
+                if settings.stop is not None and match_score >= settings.stop:
+                    break
+            score_span.set_attributes({"supporting_evidence": supporting_evidence_count, "hits_used": used})
+
+        if best_match is None or best_match["score"] <= 0:
+            return NOT_KNOWN, used
+
+        def sigmoid(x):
+            return 1 / (1 + np.exp(-5 * (x - 0.5)))
+
+        true_confidence = sigmoid(best_match['score']) * 0.8 + (supporting_evidence_count / 10) * 0.2
+        false_confidence = sigmoid(1 - best_match['score']) * 0.7 + (1 - (supporting_evidence_count / 10)) * 0.3
+        not_known_confidence = max(0, 1 - (true_confidence + false_confidence))
+
+        total = true_confidence + false_confidence + not_known_confidence
+        true_confidence = float(true_confidence / total)
+        false_confidence = float(false_confidence / total)
+        not_known_confidence = float(not_known_confidence / total)
+
+        if true_confidence >= false_confidence and true_confidence >= not_known_confidence:
+            result = "true"
+        elif false_confidence >= true_confidence and false_confidence >= not_known_confidence:
+            result = "false"
+        else:
+            result = "not_known"
+        return (result, true_confidence, false_confidence, not_known_confidence), used
+
+
+RETRIEVERS = {"weaviate": WeaviateRetriever, "hybrid": HybridRetriever}
+SCORERS = {"vote": VoteScorer, "semantic": SemanticScorer}
+
+
+# Engine
+class VerificationEngine:
+    """Retrieves facts for a claim and scores them into a verdict."""
+
+    def __init__(self, retriever, scorer, model, segment: bool = False, cache=verdict_cache):
+        self.retriever = retriever
+        self.scorer = scorer
+        self.model = model
+        self.segment = segment
+        self.cache = cache
+        self.settings = settings_for(scorer.endpoint)
+
+    def __repr__(self) -> str:
+        return f"VerificationEngine({self.retriever.name}+{self.scorer.name}, segment={self.segment})"
+
+    def verify_single(self, claim: str) -> Verdict:
+        """Verdict for one claim without segmentation; ERROR if retrieval or scoring fails."""
+        claim = claim if isinstance(claim, str) else str(claim)
+        if not claim.strip():
+            return NOT_KNOWN
+        with span("verify_single", retriever=self.retriever.name, scorer=self.scorer.name):
+            try:
+                embedding = get_embedding(claim, self.model)
+                hits = self.retriever.retrieve(claim, embedding, self.scorer.fields, self.settings)
+                if not hits:
+                    record_hits(self.scorer.endpoint, 0, 0)
+                    logger.debug("No similar facts found for '%s'", claim)
+                    return NOT_KNOWN
+                scoring_start = time.perf_counter()
+                verdict, used = self.scorer.score(claim, embedding, hits, self.settings)
+                observe("scoring", time.perf_counter() - scoring_start)
+                record_hits(self.scorer.endpoint, len(hits), used)
+            except Exception as e:
+                logger.error("Verification of '%s' failed: %s", claim, e)
+                return ERROR
+        logger.debug("Prediction: %s, True: %.3f, False: %.3f, Not Known: %.3f", *verdict)
+        return verdict
+
+    def verify(self, claim: str) -> Verdict:
+        """Verdict for a claim; compound claims are split and their segment verdicts combined."""
+        if not self.segment:
+            return self.verify_single(claim)
+        with span("preprocess_claim"):
+            subclaims = segment_claim(claim if isinstance(claim, str) else str(claim))
+        current_span().set_attribute("subclaim_count", len(subclaims))
+        if not subclaims:
+            return NOT_KNOWN
+
+        verdicts = []
+        for subclaim in subclaims:
+            verdict = self.verify_single(subclaim)
+            if verdict[0] == "error":
+                continue
+            # Any segment that is clearly true makes the claim true
+            if verdict[0] == "true" and verdict[1] > 0.7:
+                return verdict
+            verdicts.append(verdict)
+        if not verdicts:
+            return ERROR
+        if len(verdicts) == 1:
+            return verdicts[0]
+
+        avg_true = sum(v[1] for v in verdicts) / len(verdicts)
+        avg_false = sum(v[2] for v in verdicts) / len(verdicts)
+        avg_not_known = sum(v[3] for v in verdicts) / len(verdicts)
+        if avg_true >= avg_false and avg_true >= avg_not_known:
+            return "true", avg_true, avg_false, avg_not_known
+        if avg_false >= avg_true and avg_false >= avg_not_known:
+            return "false", avg_true, avg_false, avg_not_known
+        return "not_known", avg_true, avg_false, avg_not_known
+
+    def verify_cached(self, claim: str) -> Verdict:
+        """verify(), reusing the verdict of a recent identical or near-identical claim.
+
+        The canonical form only keys the cache; the raw claim is verified so
+        segmentation still sees its punctuation.
+        """
+        canonical = canonicalize(claim) or claim
+        embedding = get_embedding(canonical, self.model)
+        verdict = self.cache.lookup(canonical, embedding)
+        if verdict is None:
+            verdict = self.verify(claim)
+            if verdict[0] != "error":
+                self.cache.store(canonical, verdict, embedding)
+        return verdict
+
+
+def profile_config(profile: str) -> Tuple[str, str, bool]:
+    """Retriever name, scorer name and segmentation flag of a profile, after environment overrides."""
+    retriever_name, scorer_name, segment = PROFILES[profile]
+    prefix = f"VERIFY_{profile.upper()}_"
+    return (os.environ.get(prefix + "RETRIEVER", retriever_name),
+            os.environ.get(prefix + "SCORER", scorer_name),
+            os.environ.get(prefix + "SEGMENT", "1" if segment else "0") != "0")
+
+
+def create_engine(client, model, profile: str = "app", class_name: str = "MedicalFact",
+                  **scorer_options) -> VerificationEngine:
+    """Engine for a configured profile."""
+    retriever_name, scorer_name, segment = profile_config(profile)
+    retriever = RETRIEVERS[retriever_name](client, class_name)
+    scorer = SemanticScorer(model, **scorer_options) if scorer_name == "semantic" else SCORERS[scorer_name]()
+    engine = VerificationEngine(retriever, scorer, model, segment)
+    logger.info(f"Verification engine for {profile}: {engine}")
+    return engine